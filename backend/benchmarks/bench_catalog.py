@@ -0,0 +1,142 @@
+"""
+Latency and top-1 accuracy of the catalog index versus the original
+find_item_by_name scan, on a synthetic catalog, for clean queries and for
+queries with one misheard word (dropped / doubled / swapped letter).
+
+    python benchmarks/bench_catalog.py [--items 50000] [--queries 500]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from catalog_index import CatalogIndex  # noqa: E402
+
+BRANDS = "fresho amul tata britannia haldiram mtr nestle organic daily classic".split()
+PRODUCTS = (
+    "bread eggs milk butter cheese paneer curd pasta noodles rice atta dal sugar salt "
+    "tea coffee juice biscuits cookies chips namkeen chocolate jam ketchup sauce oil "
+    "ghee apples bananas tomatoes onions potatoes spinach soap shampoo detergent"
+).split()
+VARIANTS = "whole wheat multigrain toned masala classic spicy salted lite premium fresh".split()
+SIZES = "100g 200g 250g 500g 1kg 2kg 1l 500ml 6pc 12pc".split()
+CATEGORIES = "Groceries Dairy Snacks Beverages Produce Household".split()
+FILLER = "i want some please add a pack of".split()
+
+
+@dataclass
+class Item:
+    id: int
+    name: str
+    category: str
+    price: float
+    tags: list[str] = field(default_factory=list)
+
+
+def legacy_find(catalog: list[Item], name: str) -> Item | None:
+    """The scan find_item_by_name used before the index (kept for comparison)."""
+    name_lower = name.strip().lower()
+    best_match = None
+    best_score = 0
+    for item in catalog:
+        item_name = item.name.lower()
+        score = 0
+        for token in name_lower.split():
+            if token in item_name:
+                score += 1
+        if score > best_score:
+            best_score = score
+            best_match = item
+    return best_match
+
+
+def make_catalog(n: int, rng: random.Random) -> list[Item]:
+    items, seen = [], set()
+    while len(items) < n:
+        brand, product = rng.choice(BRANDS), rng.choice(PRODUCTS)
+        variant, size = rng.choice(VARIANTS), rng.choice(SIZES)
+        # a made-up line name keeps 50k names distinct
+        line = "".join(rng.choices("bcdfgklmnprstvz", k=2)) + rng.choice("aeiou") + rng.choice("nrs")
+        name = f"{brand.title()} {line.title()} {variant.title()} {product.title()} {size}"
+        if name in seen:
+            continue
+        seen.add(name)
+        items.append(
+            Item(len(items) + 1, name, rng.choice(CATEGORIES), rng.randint(10, 900), [product, brand])
+        )
+    return items
+
+
+def make_query(item: Item, rng: random.Random) -> str:
+    words = item.name.lower().split()
+    spoken = rng.sample(words[:4], rng.randint(2, 4))
+    return " ".join(rng.sample(FILLER, 2) + spoken)
+
+
+def mishear(query: str, rng: random.Random) -> str:
+    words = query.split()
+    i = max(range(len(words)), key=lambda j: (len(words[j]) > 4 and words[j].isalpha(), rng.random()))
+    w = words[i]
+    if len(w) < 4:
+        return query
+    pos = rng.randrange(1, len(w) - 1)
+    edit = rng.choice(("drop", "double", "swap"))
+    if edit == "drop":
+        w = w[:pos] + w[pos + 1 :]
+    elif edit == "double":
+        w = w[:pos] + w[pos] + w[pos:]
+    else:
+        w = w[: pos - 1] + w[pos] + w[pos - 1] + w[pos + 1 :]
+    words[i] = w
+    return " ".join(words)
+
+
+def run(name: str, find, queries: list[tuple[str, int]]) -> None:
+    latencies, hits = [], 0
+    for query, expected in queries:
+        started = time.perf_counter()
+        item = find(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += bool(item and item.id == expected)
+    latencies.sort()
+    print(
+        f"{name:<10} p50 {statistics.median(latencies):8.3f} ms   "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:8.3f} ms   "
+        f"top-1 {hits / len(queries):6.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalog = make_catalog(args.items, rng)
+    queries = [(make_query(item, rng), item.id) for item in rng.sample(catalog, min(args.queries, len(catalog)))]
+
+    started = time.perf_counter()
+    index = CatalogIndex(catalog)
+    print(f"index build: {(time.perf_counter() - started) * 1000:.1f} ms for {len(catalog)} items")
+
+    run("legacy", lambda q: legacy_find(catalog, q), queries)
+    run("index", index.best, queries)
+    run("match", index.match, queries)
+
+    print("misheard:")
+    misheard = [(mishear(q, rng), expected) for q, expected in queries]
+    run("legacy", lambda q: legacy_find(catalog, q), misheard)
+    run("index", index.best, misheard)
+    run("match", index.match, misheard)
+
+
+if __name__ == "__main__":
+    main()
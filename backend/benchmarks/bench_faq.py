@@ -0,0 +1,103 @@
+"""
+Latency and top-1 accuracy of the BM25 FAQ index versus the original
+substring scorer, on a synthetic FAQ.
+
+    python benchmarks/bench_faq.py [--entries 10000] [--queries 300]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from faq_index import FAQIndex  # noqa: E402
+
+FILLER = "what is the how do i can you a is it for my does are there of to in".split()
+SYLLABLES = "ka ri to mo la ne su vi pa de ro mi ta ze lo ba nu ki fe do".split()
+
+
+@dataclass
+class Entry:
+    id: str
+    question: str
+    answer: str
+    tags: list[str] = field(default_factory=list)
+
+
+def legacy_search(faqs: list[Entry], query: str) -> Entry | None:
+    """The scorer search_faq used before the index (kept for comparison)."""
+    query_lower = query.lower()
+    best_score = 0
+    best_entry = None
+    for entry in faqs:
+        text = " ".join([entry.question, entry.answer, " ".join(entry.tags)]).lower()
+        score = 0
+        for term in query_lower.split():
+            if term in text:
+                score += 1
+        if score > best_score:
+            best_score = score
+            best_entry = entry
+    return best_entry
+
+
+def make_corpus(n: int, rng: random.Random) -> tuple[list[Entry], list[list[str]]]:
+    vocab = sorted({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(n * 2)})
+    entries, topics = [], []
+    for i in range(n):
+        topic = rng.sample(vocab, 4)
+        question = " ".join(rng.sample(FILLER, 3) + topic)
+        answer = " ".join(rng.choices(vocab, k=30) + rng.choices(FILLER, k=10) + topic[:2])
+        entries.append(Entry(id=f"faq_{i}", question=question, answer=answer, tags=topic[2:]))
+        topics.append(topic)
+    return entries, topics
+
+
+def make_query(topic: list[str], rng: random.Random) -> str:
+    words = rng.sample(topic, rng.randint(2, 3))
+    words = [w + "s" if rng.random() < 0.2 else w for w in words]  # spoken plurals
+    return " ".join(rng.sample(FILLER, 3) + words)
+
+
+def run(name: str, search, queries: list[tuple[str, str]]) -> None:
+    latencies, hits = [], 0
+    for query, expected in queries:
+        started = time.perf_counter()
+        result = search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += bool(result and result.id == expected)
+    latencies.sort()
+    print(
+        f"{name:<10} p50 {statistics.median(latencies):8.3f} ms   "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:8.3f} ms   "
+        f"top-1 {hits / len(queries):6.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries, topics = make_corpus(args.entries, rng)
+    picks = rng.sample(range(len(entries)), args.queries)
+    queries = [(make_query(topics[i], rng), entries[i].id) for i in picks]
+
+    started = time.perf_counter()
+    index = FAQIndex(entries, min_score=0.0)
+    print(f"index build: {(time.perf_counter() - started) * 1000:.1f} ms for {len(entries)} entries")
+
+    run("legacy", lambda q: legacy_search(entries, q), queries)
+    run("bm25", index.best, queries)
+
+
+if __name__ == "__main__":
+    main()
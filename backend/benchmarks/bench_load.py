@@ -0,0 +1,276 @@
+"""
+Concurrent sessions per worker process, ramped until turn latency degrades.
+
+Each step runs N simulated callers at once in this process, as one worker
+would host N rooms. Every caller plays the agent's harness scenario
+(src/harness.py) --rounds times: scripted LLM with --think-ms think time,
+fake TTS with --tts-ms time to first byte, typed user turns. All callers
+share the prewarmed data (indexes, fraud cases, order store) and the
+scratch data files, so writes to the same JSON files contend the way they
+do in production.
+
+Per step it reports:
+
+    turn p50/p95/p99   wall time of a user turn, end to end
+    tool p50/p99       function tool time (tool_metrics histograms)
+    lag p99/max        event-loop lag: how late a 10 ms sleep wakes up
+    RSS/session        resident memory growth over the idle baseline, / N
+    writes             persistence jobs submitted / coalesced, and how long
+                       the write-behind queue took to drain after the step
+
+The knee is the first N whose turn p95 exceeds --knee-factor times the
+N=1 p95, or whose loop-lag p99 exceeds --lag-budget-ms.
+
+    python benchmarks/bench_load.py --agent food [--ramp 1,2,4,8,16,32] [--think-ms 300]
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC)
+
+import harness  # noqa: E402
+import persistence  # noqa: E402
+from agent import resolve_name  # noqa: E402
+from latency_metrics import PROCESS_STATS, TOOL_PREFIX, Histogram  # noqa: E402
+
+DEFAULT_RAMP = "1,2,4,8,16,32"
+LAG_INTERVAL = 0.01
+
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoopProbe:
+    """Samples event-loop lag and peak RSS while a step runs."""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.lag = Histogram()
+        self.peak_rss = 0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag.record(max(0.0, time.perf_counter() - started - self.interval))
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def tool_histogram(agent: str) -> Histogram:
+    """All of ``agent``'s tool calls so far, merged into one histogram."""
+    merged = Histogram()
+    for (name, stage), hist in PROCESS_STATS.items():
+        if name == agent and stage.startswith(TOOL_PREFIX):
+            merged.merge(hist)
+    return merged
+
+
+def since(now: Histogram, before: Histogram) -> Histogram:
+    """Calls recorded between two tool_histogram() readings."""
+    diff = Histogram()
+    for key, n in now.buckets.items():
+        left = n - before.buckets.get(key, 0)
+        if left > 0:
+            diff.buckets[key] = left
+    diff.count = now.count - before.count
+    diff.total_us = now.total_us - before.total_us
+    # max over the window isn't recoverable from two readings; use the top bucket
+    diff.max_us = round(diff._value(max(diff.buckets)) if diff.buckets else 0)
+    return diff
+
+
+@dataclass
+class Step:
+    sessions: int
+    turns: int
+    turn: Histogram
+    tool: Histogram
+    lag: Histogram
+    rss_per_session: float
+    writes_submitted: int
+    writes_coalesced: int
+    drain_ms: float
+    seconds: float
+
+
+async def run_step(
+    scenario: harness.Scenario,
+    module,
+    data: dict,
+    sessions: int,
+    rounds: int,
+    think_time: float,
+    tts_ttfb: float,
+) -> Step:
+    async def caller() -> list[harness.TurnResult]:
+        results = []
+        for _ in range(rounds):
+            results += await harness.run_session(
+                scenario,
+                module,
+                data,
+                harness.ScriptedLLM(think_time=think_time),
+                harness.FakeTTS(ttfb=tts_ttfb),
+            )
+        return results
+
+    queue = persistence.get_queue()
+    writes_before = queue.stats()
+    tools_before = tool_histogram(scenario.agent)
+    baseline_rss = rss_bytes()
+    probe = LoopProbe()
+    probe.start()
+
+    started = time.perf_counter()
+    per_caller = await asyncio.gather(*(caller() for _ in range(sessions)))
+    seconds = time.perf_counter() - started
+    await probe.stop()
+
+    drain_started = time.perf_counter()
+    await queue.drain()
+    drain_ms = (time.perf_counter() - drain_started) * 1000
+    writes_after = queue.stats()
+
+    turn = Histogram()
+    for results in per_caller:
+        for r in results:
+            turn.record(r.wall_ms / 1000)
+    return Step(
+        sessions=sessions,
+        turns=turn.count,
+        turn=turn,
+        tool=since(tool_histogram(scenario.agent), tools_before),
+        lag=probe.lag,
+        rss_per_session=max(0, probe.peak_rss - baseline_rss) / sessions,
+        writes_submitted=writes_after["submitted"] - writes_before["submitted"],
+        writes_coalesced=writes_after["coalesced"] - writes_before["coalesced"],
+        drain_ms=drain_ms,
+        seconds=seconds,
+    )
+
+
+def find_knee(steps: list[Step], knee_factor: float, lag_budget_ms: float) -> Step | None:
+    """First step past the latency or loop-lag threshold, or None."""
+    if not steps:
+        return None
+    base_p95 = steps[0].turn.quantile(0.95)
+    for step in steps:
+        if step.turn.quantile(0.95) > base_p95 * knee_factor:
+            return step
+        if step.lag.quantile(0.99) * 1000 > lag_budget_ms:
+            return step
+    return None
+
+
+def ms(hist: Histogram, q: float) -> float:
+    return hist.quantile(q) * 1000
+
+
+def print_step(step: Step) -> None:
+    print(
+        f"{step.sessions:>5} {step.turns:>6} "
+        f"{ms(step.turn, 0.5):8.1f} {ms(step.turn, 0.95):8.1f} {ms(step.turn, 0.99):8.1f} "
+        f"{ms(step.tool, 0.5):8.2f} {ms(step.tool, 0.99):8.2f} "
+        f"{ms(step.lag, 0.99):8.1f} {step.lag.max_us / 1000:8.1f} "
+        f"{step.rss_per_session / 1024:9.0f} "
+        f"{step.writes_submitted:>7}/{step.writes_coalesced:<6} {step.drain_ms:7.1f}",
+        flush=True,
+    )
+
+
+async def ramp(args, sizes: list[int], data_dir: str) -> list[Step]:
+    scenario = harness.SCENARIOS[args.agent]
+    steps = []
+    with harness.sandbox(data_dir):
+        module, data = harness.prepare(scenario)
+        # one untimed session so imports and lazy caches don't land in N=1
+        await harness.run_session(scenario, module, data)
+
+        print(
+            f"{'N':>5} {'turns':>6} {'turn p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'tool p50':>8} {'p99':>8} {'lag p99':>8} {'max':>8} "
+            f"{'RSS/sess':>9} {'writes/coal':>14} {'drain':>7}   (ms, KB)"
+        )
+        for n in sizes:
+            step = await run_step(
+                scenario,
+                module,
+                data,
+                sessions=n,
+                rounds=args.rounds,
+                think_time=args.think_ms / 1000,
+                tts_ttfb=args.tts_ms / 1000,
+            )
+            print_step(step)
+            steps.append(step)
+            if args.stop_at_knee and find_knee(steps, args.knee_factor, args.lag_budget_ms):
+                break
+    return steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agent", default="food", help="agent name or alias (see src/agent.py)")
+    parser.add_argument("--ramp", default=DEFAULT_RAMP, help="concurrent sessions per step")
+    parser.add_argument("--rounds", type=int, default=2, help="scenario runs per caller per step")
+    parser.add_argument("--think-ms", type=float, default=300.0, help="scripted LLM think time")
+    parser.add_argument("--tts-ms", type=float, default=100.0, help="fake TTS time to first byte")
+    parser.add_argument("--knee-factor", type=float, default=1.5)
+    parser.add_argument("--lag-budget-ms", type=float, default=50.0)
+    parser.add_argument("--stop-at-knee", action="store_true")
+    args = parser.parse_args()
+
+    name = resolve_name(args.agent)
+    if name not in harness.SCENARIOS:
+        parser.error(f"unknown agent {args.agent!r}")
+    args.agent = name
+    try:
+        sizes = [int(n) for n in args.ramp.split(",") if n.strip()]
+    except ValueError:
+        parser.error(f"--ramp must be comma separated integers, got {args.ramp!r}")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        steps = asyncio.run(ramp(args, sizes, data_dir))
+
+    knee = find_knee(steps, args.knee_factor, args.lag_budget_ms)
+    if knee is None:
+        print(f"no knee up to N={steps[-1].sessions}")
+        return
+    healthy = [s.sessions for s in steps if s.sessions < knee.sessions]
+    print(
+        f"knee at N={knee.sessions} "
+        f"(turn p95 {ms(knee.turn, 0.95):.0f} ms vs {ms(steps[0].turn, 0.95):.0f} ms at N=1, "
+        f"lag p99 {ms(knee.lag, 0.99):.0f} ms); "
+        f"last healthy N={healthy[-1] if healthy else 'none'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Worker cold start per agent, each measured in a fresh interpreter:
+
+    import     importing the agent module (no plugins, see src/pipeline.py)
+    plugins    registering every plugin, as the worker's main process does
+    prewarm    the module's prewarm: VAD plus its datasets
+    session    building the STT / LLM / TTS / noise-cancellation objects
+               the entrypoint creates before session.start
+
+"ready" is the sum: the time from a cold process to a session that can
+start speaking. Audio itself needs the live STT/LLM/TTS services, so it
+isn't measured here. The turn detector is skipped because it only builds
+inside a job context. Exits with status 1 if any agent's ready time is
+over the budget.
+
+    python benchmarks/bench_startup.py [--agents food,sdr] [--runs 3] [--budget-ms 4000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC)
+
+from agent import REGISTRY, resolve_name  # noqa: E402
+
+STAGES = ("import", "plugins", "prewarm", "session")
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "4000"))
+
+# Runs in the child interpreter; prints one JSON line of stage timings (ms).
+CHILD = r"""
+import importlib, json, sys, time
+
+sys.path.insert(0, {src!r})
+timings = {{}}
+
+def stage(name, fn):
+    started = time.perf_counter()
+    result = fn()
+    timings[name] = (time.perf_counter() - started) * 1000
+    return result
+
+module = stage("import", lambda: importlib.import_module({module!r}))
+import pipeline
+
+stage("plugins", pipeline.register_plugins)
+
+class Proc:
+    userdata = {{}}
+
+stage("prewarm", lambda: module.prewarm(Proc()))
+stage("session", lambda: (
+    pipeline.stt(),
+    pipeline.llm(),
+    pipeline.tts(voice="en-US-matthew", style="Conversation", text_pacing=True),
+    pipeline.noise_cancellation(),
+))
+print(json.dumps(timings))
+"""
+
+# the plugins only check that a key is set when they are constructed
+FAKE_KEYS = {"DEEPGRAM_API_KEY": "bench", "GOOGLE_API_KEY": "bench", "MURF_API_KEY": "bench"}
+
+
+def measure(module: str) -> dict[str, float]:
+    env = {**FAKE_KEYS, **os.environ}
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(src=os.path.abspath(SRC), module=module)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", default="", help="comma separated; default all")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    names = [resolve_name(n) for n in args.agents.split(",") if n.strip()] or list(REGISTRY)
+    if None in names:
+        parser.error(f"unknown agent in {args.agents!r}")
+
+    print(f"{'agent':<12}" + "".join(f"{s:>10}" for s in (*STAGES, "ready")) + "   (median ms)")
+    over = []
+    for name in names:
+        runs = [measure(REGISTRY[name].module) for _ in range(args.runs)]
+        medians = {s: statistics.median(r[s] for r in runs) for s in STAGES}
+        ready = statistics.median(sum(r[s] for s in STAGES) for r in runs)
+        print(f"{name:<12}" + "".join(f"{medians[s]:10.0f}" for s in STAGES) + f"{ready:10.0f}")
+        if ready > args.budget_ms:
+            over.append(name)
+
+    if over:
+        print(f"over the {args.budget_ms:.0f} ms startup budget: {', '.join(over)}")
+        sys.exit(1)
+    print(f"all agents within the {args.budget_ms:.0f} ms startup budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Write cost of every persisted store at 1k and 100k records.
+
+Compares the original in-place ``json.dump(indent=4)`` rewrite with the
+atomic writer in pretty, compact and orjson (when installed) modes, and
+the legacy wellness array rewrite with a journal append.
+
+    python benchmarks/bench_stores.py [--sizes 1000 100000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import persistence  # noqa: E402
+from wellness_journal import WellnessJournal  # noqa: E402
+
+
+def wellness_entry(i: int) -> dict:
+    return {
+        "timestamp": f"2025-11-{i % 28 + 1:02d}T09:00:00",
+        "mood": "calm",
+        "energy": "medium",
+        "stress": "deadlines at work",
+        "goals": ["Go for a walk", "Finish the report"],
+        "summary": "Today you are feeling calm, energy is medium.",
+    }
+
+
+def tutor_progress(n: int) -> dict:
+    return {
+        f"concept_{i}": {"learn": i % 5, "quiz": i % 3, "teach_back": 1, "last_updated": "2025-11-25T18:15:00"}
+        for i in range(n)
+    }
+
+
+def fraud_cases(n: int) -> list[dict]:
+    return [
+        {
+            "userName": f"user{i}",
+            "securityIdentifier": f"S{i}",
+            "securityQuestion": "What is your favorite color?",
+            "securityAnswer": "blue",
+            "cardEnding": f"{i % 10000:04d}",
+            "transactionAmount": "$189.99",
+            "transactionName": "ABC Industries",
+            "transactionTime": "2025-02-11 14:10",
+            "transactionLocation": "New Delhi",
+            "transactionCategory": "e-commerce",
+            "transactionSource": "alibaba.com",
+            "status": "pending_review",
+            "notes": "",
+        }
+        for i in range(n)
+    ]
+
+
+def order(n: int) -> dict:
+    items = [
+        {"id": i, "name": f"Item {i}", "category": "Groceries", "price": 40.0, "quantity": 2, "line_total": 80.0}
+        for i in range(n)
+    ]
+    return {"timestamp": "2025-11-23T12:36:24", "customer_name": "Guest", "address": "-", "items": items, "total": 80.0 * n}
+
+
+def legacy_write(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def timed(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def bench_snapshot_store(name: str, data, tmp: str, repeats: int) -> list[tuple[str, str, float]]:
+    path = os.path.join(tmp, f"{name}.json")
+    rows = [
+        (name, "legacy in-place indent=4", timed(lambda: legacy_write(path, data), repeats)),
+        (name, "atomic pretty", timed(lambda: persistence.atomic_write_json(path, data, compact=False, fast=False), repeats)),
+        (name, "atomic compact", timed(lambda: persistence.atomic_write_json(path, data, compact=True, fast=False), repeats)),
+    ]
+    if persistence.orjson is not None:
+        rows.append((name, "atomic compact orjson", timed(lambda: persistence.atomic_write_json(path, data, compact=True, fast=True), repeats)))
+    return rows
+
+
+def bench_wellness(n: int, tmp: str, repeats: int) -> list[tuple[str, str, float]]:
+    legacy_path = os.path.join(tmp, "wellness_log.json")
+    legacy_write(legacy_path, [wellness_entry(i) for i in range(n)])
+
+    def legacy_save() -> None:
+        with open(legacy_path, "r") as f:
+            data = json.load(f)
+        data.append(wellness_entry(n))
+        legacy_write(legacy_path, data)
+
+    legacy_ms = timed(legacy_save, repeats)
+
+    journal = WellnessJournal(os.path.join(tmp, "wellness_log.jsonl"))
+    journal.migrate_legacy(legacy_path)
+    return [
+        ("wellness", "legacy load + rewrite", legacy_ms),
+        ("wellness", "journal append + fsync", timed(lambda: journal.append(wellness_entry(n)), repeats)),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'records':>8}  {'store':<10} {'strategy':<28} {'ms/write':>10}")
+    for n in args.sizes:
+        repeats = 20 if n <= 10_000 else 3
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = bench_wellness(n, tmp, repeats)
+            rows += bench_snapshot_store("tutor", tutor_progress(n), tmp, repeats)
+            rows += bench_snapshot_store("fraud", fraud_cases(n), tmp, repeats)
+            rows += bench_snapshot_store("order", order(n), tmp, repeats)
+        for store, strategy, ms in rows:
+            print(f"{n:>8}  {store:<10} {strategy:<28} {ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import importlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from types import ModuleType
+
+from dotenv import load_dotenv
+
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli
+
+import latency_metrics
+import pipeline
+
+load_dotenv(".env.local")
+logger = logging.getLogger("agent")
+
+# ======================================================
+#   One worker for every day's agent
+# ======================================================
+#
+# Each agent_dayN module keeps its own prewarm/entrypoint (and can still be
+# run on its own). This worker registers all of them by name, loads the
+# Silero VAD once per process and runs each module's prewarm on top of it,
+# so one process holds one VAD plus every dataset (wellness store, FAQ
+# index, fraud cases, catalog, recipes, orders) instead of six processes
+# holding six copies.
+#
+# The agent for a job is picked from, in order:
+#
+#   1. the dispatch metadata   {"agent": "food"} or just "food"
+#   2. the room metadata       same formats
+#   3. the room name prefix    "food-1234", "day7_abcd"
+#   4. DEFAULT_AGENT           (env, "wellness" if unset)
+#
+# AGENTS=food,sdr limits which agents this worker prewarms and serves.
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    name: str
+    module: str
+    aliases: tuple[str, ...] = field(default_factory=tuple)
+
+
+REGISTRY: dict[str, AgentSpec] = {
+    spec.name: spec
+    for spec in (
+        AgentSpec("wellness", "agent_day3", ("day3",)),
+        AgentSpec("tutor", "agent_day4", ("day4",)),
+        AgentSpec("sdr", "agent_day5", ("day5",)),
+        AgentSpec("fraud", "agent_day6", ("day6",)),
+        AgentSpec("food", "agent_day7", ("day7", "grocery")),
+        AgentSpec("game_master", "agent_day8", ("day8", "game", "gm")),
+    )
+}
+
+_NAMES: dict[str, str] = {
+    key: spec.name
+    for spec in REGISTRY.values()
+    for key in (spec.name, spec.module, *spec.aliases)
+}
+
+
+def resolve_name(name: str | None) -> str | None:
+    if not name:
+        return None
+    return _NAMES.get(name.strip().lower().replace("-", "_"))
+
+
+def enabled_agents() -> list[str]:
+    raw = os.getenv("AGENTS", "")
+    if not raw.strip():
+        return list(REGISTRY)
+    names = []
+    for part in raw.split(","):
+        name = resolve_name(part)
+        if name is None:
+            raise ValueError(f"Unknown agent {part.strip()!r} in AGENTS")
+        if name not in names:
+            names.append(name)
+    return names
+
+
+DEFAULT_AGENT = resolve_name(os.getenv("DEFAULT_AGENT", "wellness"))
+if DEFAULT_AGENT is None:
+    raise ValueError(f"Unknown DEFAULT_AGENT {os.getenv('DEFAULT_AGENT')!r}")
+
+
+def load_module(name: str) -> ModuleType:
+    return importlib.import_module(REGISTRY[name].module)
+
+
+# ---------------------------------------------------------
+# Dispatch
+# ---------------------------------------------------------
+
+def _from_metadata(metadata: str | None) -> str | None:
+    if not metadata:
+        return None
+    try:
+        data = json.loads(metadata)
+    except ValueError:
+        return resolve_name(metadata)
+    if isinstance(data, dict):
+        return resolve_name(data.get("agent"))
+    if isinstance(data, str):
+        return resolve_name(data)
+    return None
+
+
+def _from_room_name(room_name: str | None) -> str | None:
+    if not room_name:
+        return None
+    for sep in ("-", "_", ":"):
+        name = resolve_name(room_name.split(sep, 1)[0])
+        if name is not None:
+            return name
+    return None
+
+
+def pick_agent(
+    dispatch_metadata: str | None,
+    room_metadata: str | None,
+    room_name: str | None,
+    enabled: list[str],
+) -> str:
+    for name in (
+        _from_metadata(dispatch_metadata),
+        _from_metadata(room_metadata),
+        _from_room_name(room_name),
+    ):
+        if name is not None:
+            if name in enabled:
+                return name
+            logger.warning("Agent %r requested but not enabled on this worker", name)
+    return DEFAULT_AGENT if DEFAULT_AGENT in enabled else enabled[0]
+
+
+# ---------------------------------------------------------
+# Worker
+# ---------------------------------------------------------
+
+def prewarm(proc: JobProcess):
+    proc.userdata["vad"] = pipeline.load_vad()
+    for name in enabled_agents():
+        # each module sees the VAD already loaded and only adds its datasets
+        load_module(name).prewarm(proc)
+
+
+async def entrypoint(ctx: JobContext):
+    name = pick_agent(
+        ctx.job.metadata,
+        ctx.job.room.metadata,
+        ctx.job.room.name,
+        enabled_agents(),
+    )
+    logger.info("Room %s -> %s agent", ctx.job.room.name, name)
+    await load_module(name).entrypoint(ctx)
+
+
+if __name__ == "__main__":
+    pipeline.register_plugins()
+    latency_metrics.serve_metrics()
+    cli.run_app(
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+        )
+    )
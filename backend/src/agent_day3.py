@@ -1,9 +1,8 @@
 import logging
-import json
 import os
 from datetime import datetime
-from typing import Annotated
-from dataclasses import dataclass, field
+from typing import Annotated, Literal
+from dataclasses import asdict, dataclass, field
 
 from dotenv import load_dotenv
 from pydantic import Field
@@ -22,8 +21,15 @@ from livekit.agents import (
     MetricsCollectedEvent,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+import persistence
+import latency_metrics
+import greetings
+import pipeline
+import tts_cache
+from tool_metrics import timed_tools
+from state_publisher import bind_session
+from wellness_store import DEFAULT_USER_ID, WellnessStore
+from wellness_trends import WellnessTrends
 
 load_dotenv(".env.local")
 logger = logging.getLogger("wellness")
@@ -40,34 +46,47 @@ class WellnessState:
     goals: list[str] = field(default_factory=list)
     summary: str | None = None
 
+WELLNESS_FOLDER = os.path.join(os.path.dirname(__file__), "..", "wellness")
+os.makedirs(WELLNESS_FOLDER, exist_ok=True)
+
+USERS_FOLDER = os.path.join(WELLNESS_FOLDER, "users")
+LEGACY_LOG_FILE = os.path.join(WELLNESS_FOLDER, "wellness_log.json")
+
 @dataclass
 class Userdata:
     wellness: WellnessState
+    store: WellnessStore
+    # participant identity; selects the caller's own partition
+    user_id: str = DEFAULT_USER_ID
     session_start: datetime = field(default_factory=datetime.now)
 
-WELLNESS_FOLDER = os.path.join(os.path.dirname(__file__), "..", "wellness")
-os.makedirs(WELLNESS_FOLDER, exist_ok=True)
-
-LOG_FILE = os.path.join(WELLNESS_FOLDER, "wellness_log.json")
-
 # ======================================================
-#   JSON Read & Write
+#   Partitioned Read & Write
 # ======================================================
 
-def load_previous_entries():
-    if not os.path.exists(LOG_FILE):
-        return []
-    try:
-        with open(LOG_FILE, "r") as f:
-            return json.load(f)
-    except:
-        return []
-
-def save_entry(entry: dict):
-    data = load_previous_entries()
-    data.append(entry)
-    with open(LOG_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def load_store() -> WellnessStore:
+    store = WellnessStore(USERS_FOLDER)
+    # history from before partitioning belongs to the default user
+    store.journal(DEFAULT_USER_ID).migrate_legacy(LEGACY_LOG_FILE)
+    return store
+
+async def last_entries(userdata: Userdata, n: int = 1) -> list[dict]:
+    return await userdata.store.last_entries(userdata.user_id, n)
+
+async def load_trends(userdata: Userdata) -> WellnessTrends:
+    return await userdata.store.trends(userdata.user_id)
+
+def save_entry(userdata: Userdata, entry: dict):
+    userdata.store.append(userdata.user_id, entry)
+
+def session_state(userdata: Userdata) -> dict:
+    """What the UI shows, pushed over the data channel as it changes."""
+    return {
+        "checkin": {
+            "timestamp": userdata.session_start.isoformat(),
+            **asdict(userdata.wellness),
+        }
+    }
 
 # ======================================================
 #   LLM Tools
@@ -113,17 +132,52 @@ async def complete_checkin(ctx: RunContext[Userdata]):
         "summary": w.summary
     }
 
-    save_entry(entry)
+    save_entry(ctx.userdata, entry)
     return f"Your check-in is saved. Summary: {summary}"
 
 @function_tool
-async def read_past(ctx: RunContext[Userdata]):
-    data = load_previous_entries()
-    if not data:
+async def read_past(ctx: RunContext[Userdata],
+    count: Annotated[int, Field(description="How many recent check-ins to recall", ge=1, le=7)] = 1):
+    entries = await last_entries(ctx.userdata, count)
+    if not entries:
         return "This seems like our first check-in together."
 
-    last = data[-1]
-    return f"Last time you said your mood was {last['mood']} and your energy was {last['energy']}. How does today compare?"
+    if len(entries) == 1:
+        last = entries[0]
+        return f"Last time you said your mood was {last['mood']} and your energy was {last['energy']}. How does today compare?"
+
+    lines = [
+        f"- {e['timestamp'].split('T')[0]}: mood {e['mood']}, energy {e['energy']}"
+        for e in entries
+    ]
+    return "Here are your recent check-ins:\n" + "\n".join(lines) + "\nHow does today compare?"
+
+@function_tool
+async def read_trends(ctx: RunContext[Userdata],
+    period: Annotated[Literal["week", "month"], Field(description="Look back over the last week or month")] = "week"):
+    days = 7 if period == "week" else 30
+    stats = (await load_trends(ctx.userdata)).window(days)
+    if not stats["checkins"]:
+        return f"I don't have any check-ins from the past {period} yet."
+
+    parts = [f"Over the past {period} you checked in {stats['checkins']} times."]
+    if stats["top_mood"]:
+        parts.append(f"Your most common mood was {stats['top_mood']}.")
+    if stats["top_energy"]:
+        parts.append(f"Your energy was mostly {stats['top_energy']}.")
+    if stats["avg_energy"] is not None:
+        parts.append(f"On a scale of 1 to 3, your average energy was {stats['avg_energy']}.")
+    if stats["streak"] > 1:
+        parts.append(f"You're on a {stats['streak']}-day check-in streak.")
+    return " ".join(parts)
+
+# fixed tool results the LLM reads back as is; pre-synthesized (see tts_cache)
+TTS_VOICE, TTS_STYLE = "en-US-matthew", "Conversation"
+SPOKEN_PHRASES = (
+    "Thanks for being honest about what's stressing you.",
+    "We still haven't covered everything. Please continue.",
+    "This seems like our first check-in together.",
+)
 
 # ======================================================
 #   Agent Instructions
@@ -148,38 +202,62 @@ Each session, follow this structure:
 7. Save the check-in using complete_checkin.
 
 If user asks about past progress, call read_past.
+If user asks how their mood or energy has been this week or month, call read_trends.
 """,
-            tools=[set_mood, set_energy, set_stress, set_goals, complete_checkin, read_past],
+            tools=timed_tools("wellness", [set_mood, set_energy, set_stress, set_goals, complete_checkin, read_past, read_trends]),
         )
 
+    def tts_node(self, text, model_settings):
+        return tts_cache.tts_node(self, text, model_settings)
+
 # ======================================================
 #   Session
 # ======================================================
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    if "vad" not in proc.userdata:  # already loaded when run under agent.py
+        proc.userdata["vad"] = pipeline.load_vad()
+    proc.userdata["wellness_store"] = load_store()
+    tts_cache.prewarm(TTS_VOICE, TTS_STYLE, SPOKEN_PHRASES)
+    greetings.prewarm("wellness", TTS_VOICE, TTS_STYLE, WellnessAgent)
 
 async def entrypoint(ctx: JobContext):
-    userdata = Userdata(wellness=WellnessState())
+    store = ctx.proc.userdata.get("wellness_store") or load_store()
+    userdata = Userdata(wellness=WellnessState(), store=store)
 
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(voice="en-US-matthew", style="Conversation", text_pacing=True),
-        turn_detection=MultilingualModel(),
+        stt=pipeline.stt(),
+        llm=pipeline.llm(),
+        tts=pipeline.tts(voice=TTS_VOICE, style=TTS_STYLE, text_pacing=True),
+        turn_detection=pipeline.turn_detection(),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata
     )
 
+    publisher = bind_session(session, ctx.room, lambda: session_state(userdata))
+    ctx.add_shutdown_callback(publisher.aclose)
+    ctx.add_shutdown_callback(persistence.drain)
+
+    latency_metrics.instrument_session(session, ctx, "wellness")
+
+    # tools read and write the caller's own partition, so know who it is
+    # before the session (and its greeting) can run any of them
+    await ctx.connect()
+    participant = await ctx.wait_for_participant()
+    userdata.user_id = participant.identity
+
     await session.start(
         agent=WellnessAgent(),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC()
+            noise_cancellation=pipeline.noise_cancellation(),
+            participant_identity=participant.identity,
         ),
     )
 
-    await ctx.connect()
+    await publisher.publish_full()
+    greetings.greet(session, "wellness", TTS_VOICE, TTS_STYLE)
 
 if __name__ == "__main__":
+    pipeline.register_plugins()
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
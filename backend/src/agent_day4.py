@@ -2,6 +2,7 @@ import logging
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
 from typing import Annotated, Literal
 from dataclasses import dataclass, field
 
@@ -22,8 +23,14 @@ from livekit.agents import (
     MetricsCollectedEvent,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+import persistence
+import latency_metrics
+import greetings
+import pipeline
+import tts_cache
+from tool_metrics import timed_tools
+from state_publisher import bind_session
+from progress_counters import ProgressCounters
 
 # ---------- env & logger ----------
 load_dotenv(".env.local")
@@ -44,8 +51,14 @@ def load_tutor_content() -> list[dict]:
         logger.error("Day4 content file not found at %s", CONTENT_PATH)
         return []
 
-TUTOR_CONTENT = load_tutor_content()
-CONCEPT_BY_ID = {c["id"]: c for c in TUTOR_CONTENT}
+@lru_cache(maxsize=1)
+def tutor_content() -> list[dict]:
+    """Loaded on first use (prewarm), not at import."""
+    return load_tutor_content()
+
+@lru_cache(maxsize=1)
+def concepts_by_id() -> dict[str, dict]:
+    return {c["id"]: c for c in tutor_content()}
 
 # ======================================================
 #   Progress persistence (for frontend card)
@@ -56,28 +69,12 @@ os.makedirs(TUTOR_FOLDER, exist_ok=True)
 PROGRESS_FILE = os.path.join(TUTOR_FOLDER, "tutor_progress.json")
 
 def load_progress() -> dict:
-    if not os.path.exists(PROGRESS_FILE):
-        return {}
-    try:
-        with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-def save_progress(data: dict):
-    with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-
-def bump_progress(concept_id: str, mode: str):
-    data = load_progress()
-    c = data.setdefault(
-        concept_id,
-        {"learn": 0, "quiz": 0, "teach_back": 0, "last_updated": None},
-    )
-    if mode in ("learn", "quiz", "teach_back"):
-        c[mode] += 1
-        c["last_updated"] = datetime.now().isoformat()
-        save_progress(data)
+    return persistence.read_json(PROGRESS_FILE, {})
+
+def bump_progress(progress: ProgressCounters, concept_id: str, mode: str):
+    # in-memory only; deltas are merged into PROGRESS_FILE by the counters'
+    # flush timer and at session end
+    progress.bump(concept_id, mode)
 
 # ======================================================
 #   Tutor state
@@ -91,14 +88,32 @@ class TutorState:
 @dataclass
 class Userdata:
     tutor: TutorState
+    progress: ProgressCounters
+    # progress file as of session start; session bumps are added on top
+    progress_base: dict = field(default_factory=dict)
     session_start: datetime = field(default_factory=datetime.now)
 
+def session_state(userdata: Userdata) -> dict:
+    """What the UI shows, pushed over the data channel as it changes."""
+    totals = {cid: dict(entry) for cid, entry in userdata.progress_base.items()}
+    for cid, counts in userdata.progress.session_counts().items():
+        entry = totals.setdefault(cid, {"learn": 0, "quiz": 0, "teach_back": 0})
+        for mode, n in counts.items():
+            entry[mode] = entry.get(mode, 0) + n
+    return {
+        "tutor": {
+            "mode": userdata.tutor.mode,
+            "concept_id": userdata.tutor.current_concept_id,
+            "progress": totals,
+        }
+    }
+
 # ======================================================
 #   Tools (LLM helpers)
 # ======================================================
 
 def _get_default_concept_id() -> str | None:
-    return TUTOR_CONTENT[0]["id"] if TUTOR_CONTENT else None
+    return tutor_content()[0]["id"] if tutor_content() else None
 
 @function_tool
 async def set_mode(
@@ -124,17 +139,17 @@ async def set_concept(
         str,
         Field(
             description=(
-                "ID of concept to focus on. "
-                "Expected values: " + ", ".join(CONCEPT_BY_ID.keys())
+                "ID of concept to focus on, as listed in the instructions "
+                "or by list_concepts."
             )
         ),
     ],
 ) -> str:
     """Choose which concept the user wants to study."""
-    if concept_id not in CONCEPT_BY_ID:
-        return f"I don’t know the concept '{concept_id}'. Available ones are: {', '.join(CONCEPT_BY_ID.keys())}."
+    if concept_id not in concepts_by_id():
+        return f"I don’t know the concept '{concept_id}'. Available ones are: {', '.join(concepts_by_id().keys())}."
     ctx.userdata.tutor.current_concept_id = concept_id
-    concept = CONCEPT_BY_ID[concept_id]
+    concept = concepts_by_id()[concept_id]
     return f"Great, we’ll work on {concept['title']}."
 
 @function_tool
@@ -144,12 +159,12 @@ async def learn_concept(ctx: RunContext[Userdata]) -> str:
     using the summary from the content file.
     """
     concept_id = ctx.userdata.tutor.current_concept_id or _get_default_concept_id()
-    if not concept_id or concept_id not in CONCEPT_BY_ID:
+    if not concept_id or concept_id not in concepts_by_id():
         return "I don’t have any concepts loaded. Please pick a topic like 'variables' or 'loops'."
 
     ctx.userdata.tutor.current_concept_id = concept_id
-    concept = CONCEPT_BY_ID[concept_id]
-    bump_progress(concept_id, "learn")
+    concept = concepts_by_id()[concept_id]
+    bump_progress(ctx.userdata.progress, concept_id, "learn")
 
     return (
         f"Let’s learn **{concept['title']}**.\n\n"
@@ -165,12 +180,12 @@ async def quiz_concept(ctx: RunContext[Userdata]) -> str:
     The LLM should WAIT for the user's spoken answer after this.
     """
     concept_id = ctx.userdata.tutor.current_concept_id or _get_default_concept_id()
-    if not concept_id or concept_id not in CONCEPT_BY_ID:
+    if not concept_id or concept_id not in concepts_by_id():
         return "First choose a concept to quiz on, for example 'variables' or 'loops'."
 
     ctx.userdata.tutor.current_concept_id = concept_id
-    concept = CONCEPT_BY_ID[concept_id]
-    bump_progress(concept_id, "quiz")
+    concept = concepts_by_id()[concept_id]
+    bump_progress(ctx.userdata.progress, concept_id, "quiz")
 
     return (
         f"Quiz time for **{concept['title']}**.\n"
@@ -185,12 +200,12 @@ async def teach_back_prompt(ctx: RunContext[Userdata]) -> str:
     The LLM should listen and then give encouraging, qualitative feedback.
     """
     concept_id = ctx.userdata.tutor.current_concept_id or _get_default_concept_id()
-    if not concept_id or concept_id not in CONCEPT_BY_ID:
+    if not concept_id or concept_id not in concepts_by_id():
         return "Pick a concept first, then we’ll do a teach-back round."
 
     ctx.userdata.tutor.current_concept_id = concept_id
-    concept = CONCEPT_BY_ID[concept_id]
-    bump_progress(concept_id, "teach_back")
+    concept = concepts_by_id()[concept_id]
+    bump_progress(ctx.userdata.progress, concept_id, "teach_back")
 
     return (
         f"Teach-back round on **{concept['title']}**.\n"
@@ -201,10 +216,10 @@ async def teach_back_prompt(ctx: RunContext[Userdata]) -> str:
 @function_tool
 async def list_concepts(ctx: RunContext[Userdata]) -> str:
     """List the available concepts and IDs for the user."""
-    if not TUTOR_CONTENT:
+    if not tutor_content():
         return "No tutor content is configured yet."
     lines = []
-    for c in TUTOR_CONTENT:
+    for c in tutor_content():
         lines.append(f"- {c['title']} (id: {c['id']})")
     return "Here are the concepts you can study:\n" + "\n".join(lines)
 
@@ -213,7 +228,9 @@ async def list_concepts(ctx: RunContext[Userdata]) -> str:
 # ======================================================
 
 def _build_instructions() -> str:
-    concept_titles = ", ".join(c["title"] for c in TUTOR_CONTENT) or "no content"
+    concept_titles = (
+        ", ".join(f"{c['title']} (id: {c['id']})" for c in tutor_content()) or "no content"
+    )
     return f"""
 You are an *Active Recall Coding Tutor*.
 
@@ -243,45 +260,71 @@ VERY IMPORTANT:
 - If the user asks for something outside this tutor scope, gently steer back.
 """
 
+# fixed tool results the LLM reads back as is; pre-synthesized (see tts_cache)
+TTS_VOICE, TTS_STYLE = "en-US-matthew", "Conversation"
+SPOKEN_PHRASES = (
+    "Switched to LEARN mode. I’ll explain concepts step by step.",
+    "Switched to QUIZ mode. I’ll ask you questions to test understanding.",
+    "Switched to TEACH-BACK mode. You’ll explain concepts to me and I’ll give feedback.",
+    "First choose a concept to quiz on, for example 'variables' or 'loops'.",
+    "Pick a concept first, then we’ll do a teach-back round.",
+)
+
 class TutorAgent(Agent):
     def __init__(self):
         super().__init__(
             instructions=_build_instructions(),
-            tools=[
+            tools=timed_tools("tutor", [
                 set_mode,
                 set_concept,
                 learn_concept,
                 quiz_concept,
                 teach_back_prompt,
                 list_concepts,
-            ],
+            ]),
         )
 
+    def tts_node(self, text, model_settings):
+        return tts_cache.tts_node(self, text, model_settings)
+
 # ======================================================
 #   Session setup
 # ======================================================
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    if "vad" not in proc.userdata:  # already loaded when run under agent.py
+        proc.userdata["vad"] = pipeline.load_vad()
+    tutor_content()
+    tts_cache.prewarm(TTS_VOICE, TTS_STYLE, SPOKEN_PHRASES)
+    greetings.prewarm("tutor", TTS_VOICE, TTS_STYLE, TutorAgent)
 
 async def entrypoint(ctx: JobContext):
     ctx.log_context_fields = {"room": ctx.room.name}
 
-    userdata = Userdata(tutor=TutorState())
+    progress = ProgressCounters(PROGRESS_FILE)
+    # read on the writer thread, behind any progress merge still queued
+    progress_base = await persistence.run(load_progress)
+    userdata = Userdata(tutor=TutorState(), progress=progress, progress_base=progress_base)
 
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
-            voice="en-US-matthew",   # base voice; agar chaaho to mode ke hisaab se mutate kar sakte ho
-            style="Conversation",
+        stt=pipeline.stt(),
+        llm=pipeline.llm(),
+        tts=pipeline.tts(
+            voice=TTS_VOICE,   # base voice; agar chaaho to mode ke hisaab se mutate kar sakte ho
+            style=TTS_STYLE,
             text_pacing=True,
         ),
-        turn_detection=MultilingualModel(),
+        turn_detection=pipeline.turn_detection(),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata,
     )
 
+    progress.start()
+    publisher = bind_session(session, ctx.room, lambda: session_state(userdata))
+    ctx.add_shutdown_callback(publisher.aclose)
+    ctx.add_shutdown_callback(progress.aclose)
+    ctx.add_shutdown_callback(persistence.drain)
+
     usage = metrics.UsageCollector()
 
     @session.on("metrics_collected")
@@ -289,15 +332,20 @@ async def entrypoint(ctx: JobContext):
         metrics.log_metrics(ev.metrics)
         usage.collect(ev.metrics)
 
+    latency_metrics.instrument_session(session, ctx, "tutor")
+
     await session.start(
         agent=TutorAgent(),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC()
+            noise_cancellation=pipeline.noise_cancellation()
         ),
     )
 
     await ctx.connect()
+    await publisher.publish_full()
+    greetings.greet(session, "tutor", TTS_VOICE, TTS_STYLE)
 
 if __name__ == "__main__":
+    pipeline.register_plugins()
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -22,8 +22,13 @@ from livekit.agents import (
     MetricsCollectedEvent,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+import persistence
+import latency_metrics
+import greetings
+import pipeline
+from tool_metrics import timed_tools
+from state_publisher import bind_session
+from faq_index import FAQIndex
 
 # -------------------------------------------------------------------
 #  ENV + LOGGING
@@ -87,13 +92,24 @@ class LeadState:
 
 @dataclass
 class Userdata:
-    faqs: list[FAQEntry]
+    faqs: FAQIndex[FAQEntry]
     lead: LeadState = field(default_factory=LeadState)
     session_start: datetime = field(default_factory=datetime.now)
 
 
+def session_state(userdata: Userdata) -> dict:
+    """What the UI shows, pushed over the data channel as it changes."""
+    return {
+        "lead": {
+            "timestamp": userdata.session_start.isoformat(),
+            "summary": userdata.lead.notes,
+            "lead": userdata.lead.to_dict(),
+        }
+    }
+
+
 # -------------------------------------------------------------------
-#  FAQ LOAD + SIMPLE SEARCH
+#  FAQ LOAD + BM25 SEARCH
 # -------------------------------------------------------------------
 
 def load_faqs() -> list[FAQEntry]:
@@ -118,24 +134,13 @@ def load_faqs() -> list[FAQEntry]:
     return faqs
 
 
-def search_faq(faqs: list[FAQEntry], query: str) -> FAQEntry | None:
-    """Bahut simple keyword based search. Works fine for small FAQ."""
+def build_faq_index() -> FAQIndex[FAQEntry]:
+    return FAQIndex(load_faqs())
 
-    query_lower = query.lower()
-    best_score = 0
-    best_entry: FAQEntry | None = None
 
-    for entry in faqs:
-        text = " ".join([entry.question, entry.answer, " ".join(entry.tags)]).lower()
-        score = 0
-        for term in query_lower.split():
-            if term in text:
-                score += 1
-        if score > best_score:
-            best_score = score
-            best_entry = entry
-
-    return best_entry
+def search_faq(faqs: FAQIndex[FAQEntry], query: str) -> FAQEntry | None:
+    """BM25 lookup; weak matches below the index's min score return None."""
+    return faqs.best(query)
 
 
 def save_lead_to_json(lead: LeadState, summary: str) -> str:
@@ -149,15 +154,13 @@ def save_lead_to_json(lead: LeadState, summary: str) -> str:
         "lead": lead.to_dict(),
     }
 
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=4, ensure_ascii=False)
+    persistence.write_json(path, payload)
 
     # latest_lead.json for frontend
     latest_path = os.path.join(LEADS_DIR, "latest_lead.json")
-    with open(latest_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=4, ensure_ascii=False)
+    persistence.write_json(latest_path, payload)
 
-    logger.info("Lead saved to %s", path)
+    logger.info("Lead queued for %s", path)
     return path
 
 
@@ -288,6 +291,8 @@ async def finalize_lead(ctx: RunContext[Userdata]) -> str:
 #  SDR AGENT
 # -------------------------------------------------------------------
 
+TTS_VOICE, TTS_STYLE = "en-US-matthew", "Professional"
+
 class SDRAgent(Agent):
     def __init__(self):
         super().__init__(
@@ -320,7 +325,7 @@ Very important:
 - If something is not in the FAQ, state that clearly.
 - Keep a very helpful, friendly, professional tone.
 """,
-            tools=[
+            tools=timed_tools("sdr", [
                 faq_lookup,
                 set_name,
                 set_company,
@@ -330,7 +335,7 @@ Very important:
                 set_team_size,
                 set_timeline,
                 finalize_lead,
-            ],
+            ]),
         )
 
 
@@ -339,48 +344,59 @@ Very important:
 # -------------------------------------------------------------------
 
 def prewarm(proc: JobProcess):
-    # VAD load
-    proc.userdata["vad"] = silero.VAD.load()
-    # FAQ preload
-    proc.userdata["faqs"] = load_faqs()
+    # VAD load (already done when run under agent.py)
+    if "vad" not in proc.userdata:
+        proc.userdata["vad"] = pipeline.load_vad()
+    # FAQ preload + index build
+    proc.userdata["faqs"] = build_faq_index()
+    greetings.prewarm("sdr", TTS_VOICE, TTS_STYLE, SDRAgent)
 
 
 async def entrypoint(ctx: JobContext):
-    faqs = ctx.proc.userdata.get("faqs") or load_faqs()
+    faqs = ctx.proc.userdata.get("faqs") or build_faq_index()
     userdata = Userdata(faqs=faqs)
 
     
-    tts = murf.TTS(
-    voice="en-US-matthew",
-    style="Professional",
+    tts = pipeline.tts(
+    voice=TTS_VOICE,
+    style=TTS_STYLE,
     text_pacing=True,)
 
 
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
+        stt=pipeline.stt(),
+        llm=pipeline.llm(),
         tts=tts,
-        turn_detection=MultilingualModel(),
+        turn_detection=pipeline.turn_detection(),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata,
     )
 
+    publisher = bind_session(session, ctx.room, lambda: session_state(userdata))
+    ctx.add_shutdown_callback(publisher.aclose)
+    ctx.add_shutdown_callback(persistence.drain)
+
     usage_collector = metrics.UsageCollector()
 
     @session.on("metrics_collected")
     def _on_metrics(ev: MetricsCollectedEvent):
         usage_collector.collect(ev.metrics)
 
+    latency_metrics.instrument_session(session, ctx, "sdr")
+
     await session.start(
         agent=SDRAgent(),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC()
+            noise_cancellation=pipeline.noise_cancellation()
         ),
     )
 
     await ctx.connect()
+    await publisher.publish_full()
+    greetings.greet(session, "sdr", TTS_VOICE, TTS_STYLE)
 
 
 if __name__ == "__main__":
+    pipeline.register_plugins()
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -1,8 +1,9 @@
+import bisect
 import logging
 import json
 import os
 from datetime import datetime
-from typing import Annotated, List
+from typing import Annotated, Iterable
 from dataclasses import dataclass, field
 
 from dotenv import load_dotenv
@@ -22,8 +23,12 @@ from livekit.agents import (
     MetricsCollectedEvent,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+import persistence
+import latency_metrics
+import greetings
+import pipeline
+import tts_cache
+from tool_metrics import timed_tools
 
 # ---------------------------------------------------------
 # ENV + LOGGING
@@ -39,6 +44,11 @@ os.makedirs(FRAUD_DIR, exist_ok=True)
 CASE_FILE = os.path.join(FRAUD_DIR, "fraud_case.json")
 
 
+def case_updates_file() -> str:
+    """Case changes made since CASE_FILE was last rewritten, one JSON line each."""
+    return os.path.splitext(CASE_FILE)[0] + ".updates.jsonl"
+
+
 # ---------------------------------------------------------
 # DATA MODELS
 # ---------------------------------------------------------
@@ -97,9 +107,81 @@ class FraudCase:
         }
 
 
+def normalize_username(name: str) -> str:
+    return name.strip().lower()
+
+
+class FraudCaseStore:
+    """
+    All fraud cases plus hash indices by normalized userName and by
+    securityIdentifier, so lookups and updates are O(1) instead of a scan.
+    When several cases share a key the earliest one wins, as with the old
+    linear search.
+    """
+
+    def __init__(self, cases: Iterable[FraudCase] = ()):
+        self.cases: list[FraudCase] = []
+        # key -> slots in self.cases, ascending (almost always one)
+        self._by_name: dict[str, list[int]] = {}
+        self._by_security_id: dict[str, list[int]] = {}
+        self._slot_of: dict[int, int] = {}  # id(case) -> slot
+        for case in cases:
+            self.add(case)
+
+    def __len__(self) -> int:
+        return len(self.cases)
+
+    @staticmethod
+    def _keys(case: FraudCase) -> tuple[str, str]:
+        return normalize_username(case.userName), case.securityIdentifier.strip()
+
+    def _index(self, slot: int, case: FraudCase) -> None:
+        name, security_id = self._keys(case)
+        bisect.insort(self._by_name.setdefault(name, []), slot)
+        if security_id:
+            bisect.insort(self._by_security_id.setdefault(security_id, []), slot)
+
+    def _unindex(self, slot: int, case: FraudCase) -> None:
+        for index, key in zip((self._by_name, self._by_security_id), self._keys(case)):
+            slots = index.get(key)
+            if slots and slot in slots:
+                slots.remove(slot)
+                if not slots:
+                    del index[key]
+
+    def add(self, case: FraudCase) -> None:
+        slot = len(self.cases)
+        self.cases.append(case)
+        self._slot_of[id(case)] = slot
+        self._index(slot, case)
+
+    def get_by_username(self, username: str) -> FraudCase | None:
+        slots = self._by_name.get(normalize_username(username))
+        return self.cases[slots[0]] if slots else None
+
+    def get_by_security_id(self, security_identifier: str) -> FraudCase | None:
+        slots = self._by_security_id.get(security_identifier.strip())
+        return self.cases[slots[0]] if slots else None
+
+    def slot(self, case: FraudCase) -> int:
+        """Position of a stored case in the list (and in CASE_FILE)."""
+        return self._slot_of[id(case)]
+
+    def update(self, case: FraudCase, **changes) -> None:
+        """Apply field changes to a stored case, keeping the indices in sync."""
+        slot = self._slot_of[id(case)]
+        self._unindex(slot, case)
+        for name, value in changes.items():
+            setattr(case, name, value)
+        self._index(slot, case)
+
+    def to_dicts(self) -> list[dict]:
+        return [c.to_dict() for c in self.cases]
+
+
 @dataclass
 class Userdata:
-    fraud_cases: List[FraudCase] = field(default_factory=list)
+    fraud_cases: FraudCaseStore = field(default_factory=FraudCaseStore)
     fraud_case: FraudCase | None = None
     verified_username: bool = False
     verified_security: bool = False
@@ -110,6 +192,13 @@ class Userdata:
 # ---------------------------------------------------------
 # JSON LOAD + SAVE (MULTI CASE SUPPORT)
 # ---------------------------------------------------------
+#
+# A status change appends one line to the update log instead of rewriting
+# CASE_FILE, so it costs the same with 3 cases or 300k. Loading replays
+# the log over CASE_FILE; prewarm folds it back in and removes it. Lines
+# name the case by its slot (position in CASE_FILE, which compaction
+# keeps) and are checked against its securityIdentifier. Appends and
+# compaction hold the CASE_FILE lock, so no worker's update is lost.
 
 def load_all_fraud_cases() -> list[FraudCase]:
     if not os.path.exists(CASE_FILE):
@@ -121,20 +210,73 @@ def load_all_fraud_cases() -> list[FraudCase]:
     if isinstance(raw, dict):
         raw = [raw]
 
-    return [FraudCase.from_dict(x) for x in raw]
-
-
-def save_all_fraud_cases(cases: list[FraudCase]) -> None:
-    with open(CASE_FILE, "w", encoding="utf-8") as f:
-        json.dump([c.to_dict() for c in cases], f, indent=4, ensure_ascii=False)
-
-
-def find_case_by_username(cases: list[FraudCase], username: str):
-    username = username.strip().lower()
-    for case in cases:
-        if case.userName.strip().lower() == username:
-            return case
-    return None
+    cases = [FraudCase.from_dict(x) for x in raw]
+    replay_case_updates(cases)
+    return cases
+
+
+def replay_case_updates(cases: list[FraudCase]) -> int:
+    """Apply the update log to ``cases`` in place; returns how many lines applied."""
+    try:
+        with open(case_updates_file(), "rb") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return 0
+
+    applied = 0
+    for line in lines:
+        try:
+            record = json.loads(line)
+            case = cases[record["slot"]]
+            if case.securityIdentifier != record["securityIdentifier"]:
+                raise ValueError("slot no longer holds this case")
+            for name, value in record["changes"].items():
+                if name in FraudCase.__dataclass_fields__:
+                    setattr(case, name, value)
+        except (ValueError, KeyError, TypeError, IndexError):
+            # e.g. a line torn by a crash mid-append
+            logger.warning("Skipping bad line in %s", case_updates_file())
+            continue
+        applied += 1
+    return applied
+
+
+def compact_fraud_cases() -> FraudCaseStore:
+    """Load every case and fold the update log back into CASE_FILE."""
+    with persistence.file_lock(CASE_FILE):
+        cases = load_all_fraud_cases()
+        if os.path.exists(case_updates_file()):
+            persistence.atomic_write_json(CASE_FILE, [c.to_dict() for c in cases])
+            os.unlink(case_updates_file())
+    return FraudCaseStore(cases)
+
+
+def save_case_update(store: FraudCaseStore, case: FraudCase, changes: dict) -> None:
+    """Queue one update-log line for ``case``; the write happens off the event loop."""
+    record = {
+        "slot": store.slot(case),
+        "securityIdentifier": case.securityIdentifier,
+        "changes": changes,
+    }
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    case_file, path = CASE_FILE, case_updates_file()
+
+    def _append() -> None:
+        with persistence.file_lock(case_file):
+            fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                # keep a line torn by an earlier crash from swallowing this one
+                os.write(fd, line if not size or os.pread(fd, 1, size - 1) == b"\n" else b"\n" + line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    persistence.submit(None, _append)
+
+
+def find_case_by_username(store: FraudCaseStore, username: str) -> FraudCase | None:
+    return store.get_by_username(username)
 
 
 # ---------------------------------------------------------
@@ -146,9 +288,7 @@ async def verify_username(
     ctx: RunContext[Userdata],
     username: Annotated[str, Field(description="Name the caller claims to be.")],
 ):
-    claimed = username.strip().lower()
-
-    match = find_case_by_username(ctx.userdata.fraud_cases, claimed)
+    match = find_case_by_username(ctx.userdata.fraud_cases, username)
     if not match:
         ctx.userdata.verification_attempts += 1
         return (
@@ -197,43 +337,62 @@ async def get_transaction_summary(ctx: RunContext[Userdata]):
     )
 
 
-def update_case(ctx: RunContext[Userdata], status: str, notes: str):
-    c = ctx.userdata.fraud_case
-    all_cases = ctx.userdata.fraud_cases
+NO_CASE = "I could not find your case, so nothing has been recorded."
+
 
-    c.status = status
-    c.notes = notes
+def update_case(ctx: RunContext[Userdata], status: str, notes: str) -> bool:
+    """Record the outcome on the caller's case; False if no case is loaded."""
+    c = ctx.userdata.fraud_case
+    if c is None:
+        return False
+    store = ctx.userdata.fraud_cases
 
-    # update entry
-    for i, case in enumerate(all_cases):
-        if case.userName.lower() == c.userName.lower():
-            all_cases[i] = c
-            break
+    store.update(c, status=status, notes=notes)
 
-    save_all_fraud_cases(all_cases)
+    save_case_update(store, c, {"status": status, "notes": notes})
+    return True
 
 
 @function_tool
 async def mark_transaction_safe(ctx: RunContext[Userdata]):
-    update_case(ctx, "confirmed_safe", "Customer confirmed transaction as legitimate.")
+    if not update_case(ctx, "confirmed_safe", "Customer confirmed transaction as legitimate."):
+        return NO_CASE + " Please provide your name first."
     return "I have marked this transaction as safe."
 
 
 @function_tool
 async def mark_transaction_fraud(ctx: RunContext[Userdata]):
-    update_case(ctx, "confirmed_fraud", "Customer denied transaction. (Demo only.)")
+    if not update_case(ctx, "confirmed_fraud", "Customer denied transaction. (Demo only.)"):
+        return NO_CASE + " Please provide your name first."
     return "I have marked this transaction as fraudulent."
 
 
 @function_tool
 async def mark_verification_failed(ctx: RunContext[Userdata]):
-    update_case(ctx, "verification_failed", "Identity verification failed.")
+    if not update_case(ctx, "verification_failed", "Identity verification failed."):
+        return NO_CASE + " Please contact SecureTrust Bank through official channels."
     return (
         "Since we could not verify your identity, I cannot continue. "
         "Please contact SecureTrust Bank through official channels."
     )
 
 
+# fixed tool results the LLM reads back as is; pre-synthesized (see tts_cache)
+TTS_VOICE, TTS_STYLE = "en-US-matthew", "Professional"
+SPOKEN_PHRASES = (
+    "I could not locate any fraud alert case under that name. "
+    "Please try again with the correct account name.",
+    "We have not found your case yet. Please provide your name first.",
+    "Thank you. Your identity is verified.",
+    "That answer does not match our records.",
+    "We have not accessed your case yet.",
+    "I have marked this transaction as safe.",
+    "I have marked this transaction as fraudulent.",
+    "Since we could not verify your identity, I cannot continue. "
+    "Please contact SecureTrust Bank through official channels.",
+)
+
+
 # ---------------------------------------------------------
 # AGENT
 # ---------------------------------------------------------
@@ -273,41 +432,47 @@ NEVER ask:
 Keep responses short, clear, and professional.
 """
 ,
-            tools=[
+            tools=timed_tools("fraud", [
                 verify_username,
                 verify_security_answer,
                 get_transaction_summary,
                 mark_transaction_safe,
                 mark_transaction_fraud,
                 mark_verification_failed,
-            ],
+            ]),
         )
 
+    def tts_node(self, text, model_settings):
+        return tts_cache.tts_node(self, text, model_settings)
+
 
 # ---------------------------------------------------------
 # PREWARM + ENTRYPOINT
 # ---------------------------------------------------------
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
-    proc.userdata["fraud_cases"] = load_all_fraud_cases()
+    if "vad" not in proc.userdata:  # already loaded when run under agent.py
+        proc.userdata["vad"] = pipeline.load_vad()
+    proc.userdata["fraud_cases"] = compact_fraud_cases()
+    tts_cache.prewarm(TTS_VOICE, TTS_STYLE, SPOKEN_PHRASES)
+    greetings.prewarm("fraud", TTS_VOICE, TTS_STYLE, FraudAgent)
 
 
 async def entrypoint(ctx: JobContext):
     all_cases = ctx.proc.userdata["fraud_cases"]
     userdata = Userdata(fraud_cases=all_cases)
 
-    tts = murf.TTS(
-        voice="en-US-matthew",
-        style="Professional",
+    tts = pipeline.tts(
+        voice=TTS_VOICE,
+        style=TTS_STYLE,
         text_pacing=True,
     )
 
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
+        stt=pipeline.stt(),
+        llm=pipeline.llm(),
         tts=tts,
-        turn_detection=MultilingualModel(),
+        turn_detection=pipeline.turn_detection(),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata,
     )
@@ -330,18 +495,24 @@ async def entrypoint(ctx: JobContext):
 
     session.on("agent_message", enforce_security_question)
 
+    ctx.add_shutdown_callback(persistence.drain)
+
     # -----------------------
     # START SESSION
     # -----------------------
+    latency_metrics.instrument_session(session, ctx, "fraud")
+
     await session.start(
         agent=FraudAgent(),
         room=ctx.room,
-        room_input_options=RoomInputOptions(noise_cancellation=noise_cancellation.BVC()),
+        room_input_options=RoomInputOptions(noise_cancellation=pipeline.noise_cancellation()),
     )
 
     await ctx.connect()
+    greetings.greet(session, "fraud", TTS_VOICE, TTS_STYLE)
 
 
 
 if __name__ == "__main__":
+    pipeline.register_plugins()
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -1,8 +1,10 @@
+import asyncio
 import logging
 import json
 import os
 from datetime import datetime
-from typing import Annotated, List, Dict
+from decimal import Decimal
+from typing import Annotated, Any, List, Dict
 from dataclasses import dataclass, field
 
 from dotenv import load_dotenv
@@ -21,8 +23,19 @@ from livekit.agents import (
     metrics,
     MetricsCollectedEvent,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+import persistence
+import latency_metrics
+import greetings
+import pipeline
+import tts_cache
+from tool_metrics import timed_tools
+from state_publisher import bind_session
+from catalog_index import CatalogIndex
+from money import Paise, format_inr, rupees_to_paise, speak_inr, to_paise
+from order_store import OrderStore
+from recipe_book import RecipeBook
+from trigram_index import DEFAULT_THRESHOLD, similarity
 
 # ---------------------------------------------------------
 # ENV + LOGGING
@@ -37,9 +50,6 @@ CATALOG_FILE = os.path.join(SHARED_DATA_DIR, "day7_catalog.json")
 RECIPES_FILE = os.path.join(SHARED_DATA_DIR, "day7_recipes.json")
 
 ORDERS_DIR = os.path.join(BASE_DIR, "orders")
-os.makedirs(ORDERS_DIR, exist_ok=True)
-
-LATEST_ORDER_FILE = os.path.join(ORDERS_DIR, "day7_latest_order.json")
 
 
 # ---------------------------------------------------------
@@ -51,16 +61,17 @@ class CatalogItem:
     id: int
     name: str
     category: str
-    price: float
+    price: Paise
     tags: List[str] = field(default_factory=list)
 
     @classmethod
-    def from_dict(cls, data: dict) -> "CatalogItem":
+    def from_dict(cls, data: dict, price: Paise | None = None) -> "CatalogItem":
+        """``data["price"]`` is in rupees, as in the catalog file."""
         return cls(
             id=data["id"],
             name=data["name"],
             category=data.get("category", ""),
-            price=float(data.get("price", 0)),
+            price=to_paise(data.get("price", 0)) if price is None else price,
             tags=data.get("tags", []),
         )
 
@@ -69,7 +80,7 @@ class CatalogItem:
             "id": self.id,
             "name": self.name,
             "category": self.category,
-            "price": self.price,
+            "price_paise": self.price,
             "tags": self.tags,
         }
 
@@ -84,22 +95,95 @@ class CartItem:
             "id": self.item.id,
             "name": self.item.name,
             "category": self.item.category,
-            "price": self.item.price,
+            "price_paise": self.item.price,
             "quantity": self.quantity,
-            "line_total": self.item.price * self.quantity,
+            "line_total_paise": self.item.price * self.quantity,
         }
 
 
+class Cart:
+    """
+    Cart lines keyed by catalog id, in the order they were first added,
+    with the total kept up to date on every change, so adding, updating
+    and removing a line are O(1) however big the order gets.
+    """
+
+    def __init__(self):
+        self._lines: Dict[int, CartItem] = {}
+        self.total: Paise = 0
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines.values())
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._lines
+
+    def get(self, item_id: int) -> CartItem | None:
+        return self._lines.get(item_id)
+
+    def add(self, item: CatalogItem, quantity: int = 1) -> CartItem:
+        line = self._lines.get(item.id)
+        if line is None:
+            line = self._lines[item.id] = CartItem(item=item, quantity=0)
+        line.quantity += quantity
+        self.total += item.price * quantity
+        return line
+
+    def set_quantity(self, item_id: int, quantity: int) -> CartItem | None:
+        """Set a line's quantity; 0 removes it. Returns the line, if any."""
+        line = self._lines.get(item_id)
+        if line is None:
+            return None
+        if quantity <= 0:
+            return self.remove(item_id)
+        self.total += line.item.price * (quantity - line.quantity)
+        line.quantity = quantity
+        return line
+
+    def remove(self, item_id: int) -> CartItem | None:
+        line = self._lines.pop(item_id, None)
+        if line is not None:
+            self.total -= line.item.price * line.quantity
+        return line
+
+    def to_dicts(self) -> List[dict]:
+        return [ci.to_dict() for ci in self._lines.values()]
+
+
 @dataclass
 class Userdata:
-    catalog: List[CatalogItem]
-    recipes: Dict[str, List[str]]
-    cart: List[CartItem] = field(default_factory=list)
+    catalog: CatalogIndex[CatalogItem]
+    recipes: RecipeBook[CatalogItem]
+    orders: OrderStore
+    cart: Cart = field(default_factory=Cart)
     customer_name: str | None = None
     address: str | None = None
+    last_order_id: int | None = None
     session_start: datetime = field(default_factory=datetime.now)
 
 
+def session_state(userdata: Userdata) -> dict:
+    """What the UI shows, pushed over the data channel as it changes."""
+    return {
+        "cart": {
+            "customer_name": userdata.customer_name,
+            "lines": {
+                str(ci.item.id): {
+                    "name": ci.item.name,
+                    "quantity": ci.quantity,
+                    "price_paise": ci.item.price,
+                }
+                for ci in userdata.cart
+            },
+            "total_paise": userdata.cart.total,
+            "last_order_id": userdata.last_order_id,
+        }
+    }
+
+
 # ---------------------------------------------------------
 # HELPERS – LOAD CATALOG & RECIPES
 # ---------------------------------------------------------
@@ -109,14 +193,16 @@ def load_catalog() -> List[CatalogItem]:
         raise FileNotFoundError(f"Catalog JSON not found at {CATALOG_FILE}")
 
     with open(CATALOG_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
+        # Decimal keeps fractional rupee prices exact on the way to paise
+        data = json.load(f, parse_float=Decimal)
 
-    items = [CatalogItem.from_dict(d) for d in data]
+    prices = rupees_to_paise([d.get("price", 0) for d in data])
+    items = [CatalogItem.from_dict(d, price=p) for d, p in zip(data, prices)]
     logger.info("Loaded %d catalog items", len(items))
     return items
 
 
-def load_recipes() -> Dict[str, List[str]]:
+def load_recipes() -> Dict[str, Any]:
     if not os.path.exists(RECIPES_FILE):
         logger.warning("Recipes JSON not found at %s, using empty recipes", RECIPES_FILE)
         return {}
@@ -125,55 +211,69 @@ def load_recipes() -> Dict[str, List[str]]:
         data = json.load(f)
 
     logger.info("Loaded %d recipe mappings", len(data))
-    # normalize keys to lower-case for matching
-    return {k.lower(): v for k, v in data.items()}
+    return data
 
 
-def find_item_by_name(catalog: List[CatalogItem], name: str) -> CatalogItem | None:
-    """Very simple name match: case-insensitive substring search."""
-    name_lower = name.strip().lower()
-    best_match = None
-    best_score = 0
+def build_recipe_book(catalog: CatalogIndex[CatalogItem]) -> RecipeBook[CatalogItem]:
+    """Resolve every recipe ingredient to a catalog item once, up front."""
+    return RecipeBook(load_recipes(), catalog)
+
 
-    for item in catalog:
-        item_name = item.name.lower()
-        # crude scoring by number of matching tokens
-        score = 0
-        for token in name_lower.split():
-            if token in item_name:
-                score += 1
+def build_catalog_index() -> CatalogIndex[CatalogItem]:
+    return CatalogIndex(load_catalog())
 
-        if score > best_score:
-            best_score = score
-            best_match = item
 
-    return best_match
+def find_item_by_name(catalog: CatalogIndex[CatalogItem], name: str) -> CatalogItem | None:
+    """Best catalog match for a spoken item name, tolerant of misheard words."""
+    return catalog.match(name)
 
 
-def get_cart_total(cart: List[CartItem]) -> float:
-    return sum(ci.item.price * ci.quantity for ci in cart)
+def find_cart_items(userdata: Userdata, name: str) -> List[CartItem]:
+    """
+    Cart lines matching a spoken name: the catalog match if it is in the
+    cart, else every line whose name contains it, else the line with the
+    closest trigram similarity.
+    """
+    cart = userdata.cart
+    item = find_item_by_name(userdata.catalog, name)
+    if item is not None and item.id in cart:
+        return [cart.get(item.id)]
+
+    name_lower = name.strip().lower()
+    matches = [ci for ci in cart if name_lower in ci.item.name.lower()]
+    if matches or not cart:
+        return matches
+
+    score, best = max(
+        ((similarity(name, ci.item.name), ci) for ci in cart), key=lambda pair: pair[0]
+    )
+    return [best] if score >= DEFAULT_THRESHOLD else []
 
 
 def save_order_to_json(userdata: Userdata) -> dict:
-    """Build order payload and persist to JSON."""
+    """Build the order payload and store it (blocking; run it off the event loop)."""
     if not userdata.cart:
         raise ValueError("Cannot save order: cart is empty.")
 
-    order_items = [ci.to_dict() for ci in userdata.cart]
-    total = get_cart_total(userdata.cart)
+    order_items = userdata.cart.to_dicts()
+    total = userdata.cart.total
 
     order = {
         "timestamp": datetime.now().isoformat(),
         "customer_name": userdata.customer_name or "Guest",
         "address": userdata.address or "Not provided",
         "items": order_items,
-        "total": total,
+        "total_paise": total,
     }
 
-    with open(LATEST_ORDER_FILE, "w", encoding="utf-8") as f:
-        json.dump(order, f, indent=4, ensure_ascii=False)
+    order = userdata.orders.save(order)
 
-    logger.info("Saved latest order with %d items, total=%.2f", len(order_items), total)
+    logger.info(
+        "Saved order %d with %d items, total=%s",
+        order["order_id"],
+        len(order_items),
+        format_inr(total),
+    )
     return order
 
 
@@ -205,13 +305,7 @@ async def add_item_to_cart(
             "Please try a different name or ask what’s available."
         )
 
-    # check if already in cart
-    for ci in ctx.userdata.cart:
-        if ci.item.id == item.id:
-            ci.quantity += quantity
-            break
-    else:
-        ctx.userdata.cart.append(CartItem(item=item, quantity=quantity))
+    ctx.userdata.cart.add(item, quantity)
 
     return f"Added {quantity} x {item.name} to your cart."
 
@@ -221,22 +315,16 @@ async def remove_item_from_cart(
     ctx: RunContext[Userdata],
     item_name: Annotated[str, Field(description="Name of the item to remove from cart")],
 ) -> str:
-    name_lower = item_name.strip().lower()
     cart = ctx.userdata.cart
 
     if not cart:
         return "Your cart is currently empty."
 
-    remaining: List[CartItem] = []
-    removed_any = False
-
-    for ci in cart:
-        if name_lower in ci.item.name.lower():
-            removed_any = True
-            continue
-        remaining.append(ci)
+    matches = find_cart_items(ctx.userdata, item_name)
+    removed_any = bool(matches)
 
-    ctx.userdata.cart = remaining
+    for ci in matches:
+        cart.remove(ci.item.id)
 
     if removed_any:
         return f"I’ve removed items matching '{item_name}' from your cart."
@@ -250,22 +338,20 @@ async def update_item_quantity(
     item_name: Annotated[str, Field(description="Name of the item in the cart")],
     quantity: Annotated[int, Field(description="New quantity (0 to remove)", ge=0)],
 ) -> str:
-    name_lower = item_name.strip().lower()
     cart = ctx.userdata.cart
 
     if not cart:
         return "Your cart is currently empty."
 
-    for ci in cart:
-        if name_lower in ci.item.name.lower():
-            if quantity == 0:
-                cart.remove(ci)
-                return f"I’ve removed {ci.item.name} from your cart."
-            else:
-                ci.quantity = quantity
-                return f"I’ve updated {ci.item.name} to quantity {quantity}."
+    matches = find_cart_items(ctx.userdata, item_name)
+    if not matches:
+        return f"I couldn’t find any items matching '{item_name}' in your cart."
 
-    return f"I couldn’t find any items matching '{item_name}' in your cart."
+    ci = cart.set_quantity(matches[0].item.id, quantity)
+    if quantity == 0:
+        return f"I’ve removed {ci.item.name} from your cart."
+    else:
+        return f"I’ve updated {ci.item.name} to quantity {quantity}."
 
 
 @function_tool
@@ -277,10 +363,12 @@ async def list_cart(ctx: RunContext[Userdata]) -> str:
     lines = []
     for ci in cart:
         line_total = ci.item.price * ci.quantity
-        lines.append(f"{ci.quantity} x {ci.item.name} ({ci.item.price} each) = {line_total}")
+        lines.append(
+            f"{ci.quantity} x {ci.item.name} ({format_inr(ci.item.price)} each) = {format_inr(line_total)}"
+        )
 
-    total = get_cart_total(cart)
-    summary = "Here’s what is currently in your cart:\n" + "\n".join(lines) + f"\nTotal: {total}"
+    total = cart.total
+    summary = "Here’s what is currently in your cart:\n" + "\n".join(lines) + f"\nTotal: {format_inr(total)}"
     return summary
 
 
@@ -288,32 +376,21 @@ async def list_cart(ctx: RunContext[Userdata]) -> str:
 async def add_ingredients_for_dish(
     ctx: RunContext[Userdata],
     dish_name: Annotated[str, Field(description="Dish name, e.g. 'peanut butter sandwich' or 'pasta'")],
+    servings: Annotated[
+        int | None, Field(description="How many people to cook for, if the user said so", ge=1)
+    ] = None,
 ) -> str:
-    recipes = ctx.userdata.recipes
-    catalog = ctx.userdata.catalog
-
-    key = dish_name.strip().lower()
-    if key not in recipes:
+    recipe = ctx.userdata.recipes.find(dish_name)
+    if recipe is None:
         return (
             f"I don’t have a recipe mapping for '{dish_name}' yet. "
             "You can still add individual items by name."
         )
 
-    ingredient_names = recipes[key]
     added_items = []
-
-    for ing in ingredient_names:
-        item = find_item_by_name(catalog, ing)
-        if item:
-            # default quantity 1 per ingredient
-            # if already in cart, increment
-            for ci in ctx.userdata.cart:
-                if ci.item.id == item.id:
-                    ci.quantity += 1
-                    break
-            else:
-                ctx.userdata.cart.append(CartItem(item=item, quantity=1))
-            added_items.append(item.name)
+    for item, quantity in recipe.scaled(servings):
+        ctx.userdata.cart.add(item, quantity)
+        added_items.append(f"{quantity} x {item.name}")
 
     if not added_items:
         return (
@@ -322,7 +399,7 @@ async def add_ingredients_for_dish(
         )
 
     added_str = ", ".join(added_items)
-    return f"For {dish_name}, I’ve added these to your cart: {added_str}."
+    return f"For {recipe.name}, I’ve added these to your cart: {added_str}."
 
 
 @function_tool
@@ -333,16 +410,25 @@ async def place_order(ctx: RunContext[Userdata]) -> str:
     if not ctx.userdata.cart:
         return "Your cart is empty, so there’s nothing to place as an order."
 
-    order = save_order_to_json(ctx.userdata)
+    order = await asyncio.to_thread(save_order_to_json, ctx.userdata)
+    ctx.userdata.last_order_id = order["order_id"]
 
-    total = order["total"]
+    total = speak_inr(order["total_paise"])
     item_count = len(order["items"])
     return (
         f"I’ve placed your order with {item_count} items. "
-        f"Your total is {total}. The order has been saved to the system."
+        f"Your total is {total}. Your order number is {order['order_id']}."
     )
 
 
+# fixed tool results the LLM reads back as is; pre-synthesized (see tts_cache)
+TTS_VOICE, TTS_STYLE = "en-US-matthew", "Conversation"
+SPOKEN_PHRASES = (
+    "Your cart is currently empty.",
+    "Your cart is empty, so there’s nothing to place as an order.",
+)
+
+
 # ---------------------------------------------------------
 # AGENT – ORDERING ASSISTANT
 # ---------------------------------------------------------
@@ -367,13 +453,14 @@ Behaviour:
 - Do NOT invent new items that are not in the catalog. If you are unsure, say you only know items from the catalog.
 - If the user says something like "what's in my cart", call `list_cart`.
 - For requests like "I need ingredients for a peanut butter sandwich", call `add_ingredients_for_dish`.
+  If they say how many people it is for, pass that as `servings`.
 - Encourage the user to say "I'm done" or "place my order" when they are ready to checkout.
 
 Tone:
 - Warm, concise, and helpful.
 - Mostly English. Light casual tone is okay, but stay clear and polite.
 """,
-            tools=[
+            tools=timed_tools("food", [
                 set_customer_name,
                 add_item_to_cart,
                 remove_item_from_cart,
@@ -381,59 +468,77 @@ Tone:
                 list_cart,
                 add_ingredients_for_dish,
                 place_order,
-            ],
+            ]),
         )
 
+    def tts_node(self, text, model_settings):
+        return tts_cache.tts_node(self, text, model_settings)
+
 
 # ---------------------------------------------------------
 # PREWARM + ENTRYPOINT
 # ---------------------------------------------------------
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
-    proc.userdata["catalog"] = load_catalog()
-    proc.userdata["recipes"] = load_recipes()
+    if "vad" not in proc.userdata:  # already loaded when run under agent.py
+        proc.userdata["vad"] = pipeline.load_vad()
+    proc.userdata["catalog"] = build_catalog_index()
+    proc.userdata["recipes"] = build_recipe_book(proc.userdata["catalog"])
+    proc.userdata["orders"] = OrderStore(ORDERS_DIR)
+    tts_cache.prewarm(TTS_VOICE, TTS_STYLE, SPOKEN_PHRASES)
+    greetings.prewarm("food", TTS_VOICE, TTS_STYLE, FoodOrderingAgent)
 
 
 async def entrypoint(ctx: JobContext):
-    catalog = ctx.proc.userdata.get("catalog") or load_catalog()
-    recipes = ctx.proc.userdata.get("recipes") or load_recipes()
+    catalog = ctx.proc.userdata.get("catalog") or build_catalog_index()
+    recipes = ctx.proc.userdata.get("recipes") or build_recipe_book(catalog)
+
+    orders = ctx.proc.userdata.get("orders") or OrderStore(ORDERS_DIR)
 
-    userdata = Userdata(catalog=catalog, recipes=recipes)
+    userdata = Userdata(catalog=catalog, recipes=recipes, orders=orders)
 
-    tts = murf.TTS(
-        voice="en-US-matthew",  # Murf Falcon voice name can go here if configured
-        style="Conversation",
+    tts = pipeline.tts(
+        voice=TTS_VOICE,  # Murf Falcon voice name can go here if configured
+        style=TTS_STYLE,
         text_pacing=True,
     )
 
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
+        stt=pipeline.stt(),
+        llm=pipeline.llm(),
         tts=tts,
-        turn_detection=MultilingualModel(),
+        turn_detection=pipeline.turn_detection(),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata,
     )
 
+    publisher = bind_session(session, ctx.room, lambda: session_state(userdata))
+    ctx.add_shutdown_callback(publisher.aclose)
+    ctx.add_shutdown_callback(persistence.drain)
+
     usage_collector = metrics.UsageCollector()
 
     @session.on("metrics_collected")
     def on_metrics(ev: MetricsCollectedEvent):
         usage_collector.collect(ev.metrics)
 
+    latency_metrics.instrument_session(session, ctx, "food")
+
     await session.start(
         agent=FoodOrderingAgent(),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC()
+            noise_cancellation=pipeline.noise_cancellation()
         ),
     )
 
     await ctx.connect()
+    await publisher.publish_full()
+    greetings.greet(session, "food", TTS_VOICE, TTS_STYLE)
 
 
 if __name__ == "__main__":
+    pipeline.register_plugins()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
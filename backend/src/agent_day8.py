@@ -11,13 +11,15 @@ from livekit.agents import (
     cli,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
-
+import greetings
+import latency_metrics
+import pipeline
 
 load_dotenv(".env.local")
 logger = logging.getLogger("game_master")
 
+TTS_VOICE, TTS_STYLE = "en-US-matthew", "Narration"
+
 
 class GameMasterAgent(Agent):
     def __init__(self):
@@ -73,37 +75,44 @@ Every message MUST end with:
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    if "vad" not in proc.userdata:  # already loaded when run under agent.py
+        proc.userdata["vad"] = pipeline.load_vad()
+    # the opening scene runs 2-4 paragraphs; worth having ready
+    greetings.prewarm("game_master", TTS_VOICE, TTS_STYLE, GameMasterAgent)
 
 
 async def entrypoint(ctx: JobContext):
 
-    tts = murf.TTS(
-        voice="en-US-matthew",
-        style="Narration",
+    tts = pipeline.tts(
+        voice=TTS_VOICE,
+        style=TTS_STYLE,
         text_pacing=True,
     )
 
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
+        stt=pipeline.stt(),
+        llm=pipeline.llm(),
         tts=tts,
         vad=ctx.proc.userdata["vad"],
-        turn_detection=MultilingualModel(),
+        turn_detection=pipeline.turn_detection(),
     )
 
+    latency_metrics.instrument_session(session, ctx, "game_master")
+
     await session.start(
         agent=GameMasterAgent(),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC()
+            noise_cancellation=pipeline.noise_cancellation()
         ),
     )
 
     await ctx.connect()
+    greetings.greet(session, "game_master", TTS_VOICE, TTS_STYLE)
 
 
 if __name__ == "__main__":
+    pipeline.register_plugins()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
@@ -0,0 +1,234 @@
+import heapq
+import re
+from collections import Counter, defaultdict
+from itertools import combinations
+from typing import Generic, Iterable, Protocol, TypeVar
+
+from faq_index import stem
+from trigram_index import DEFAULT_THRESHOLD, TrigramIndex
+
+# ======================================================
+#   Catalog search index
+# ======================================================
+#
+# Built once per worker (in prewarm) so a lookup only touches the posting
+# sets of the words actually spoken instead of every SKU. Items are ranked
+# by how many query tokens appear in their name, then by tag matches
+# ("peanut_butter" -> peanut, butter), then by how much of the name the
+# query covers, then by catalog order, so "pasta" picks "Pasta 1kg" over
+# "Pasta Sauce Jar" and "butter" picks "Butter 500g" over peanut butter.
+# Queries that match no name fall back to tags alone ("snack").
+#
+# match() adds trigram fuzzy passes for misheard names. Query words that
+# are not in the catalog vocabulary are first corrected against a trigram
+# index of vocabulary words ("penut" -> peanut), which stays small and fast
+# however many SKUs there are; if the corrected words still do not pick
+# one item, whole names and tags are compared by trigram similarity.
+
+TAG_WEIGHT = 0.5  # reported score = name hits + TAG_WEIGHT * tag hits
+MAX_QUERY_TERMS = 6  # bounds the subset intersections in search()
+
+# filler words from spoken orders that should never pick an item on their own
+STOP_WORDS = frozenset(
+    """
+    a an the and or of for with some any me my i we want need please add get
+    can could you give few couple pack packs packet packets
+    """.split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_name(text: str) -> str:
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
+def _stem(token: str) -> str:
+    # "cookie" / "cookies" both fold to "cooky" (stem() maps -ies to -y)
+    if len(token) > 4 and token.endswith("ie"):
+        return token[:-2] + "y"
+    return stem(token)
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def strip_filler(text: str) -> str:
+    return " ".join(t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS)
+
+
+class CatalogLike(Protocol):
+    id: int
+    name: str
+    category: str
+    tags: list[str]
+
+
+T = TypeVar("T", bound=CatalogLike)
+
+
+class CatalogIndex(Generic[T]):
+    def __init__(self, items: Iterable[T]):
+        self.items: list[T] = list(items)
+
+        self._by_id: dict[int, T] = {}
+        self._by_name: dict[str, int] = {}
+        self._name_postings: dict[str, set[int]] = defaultdict(set)
+        self._tag_postings: dict[str, set[int]] = defaultdict(set)
+        self._tag_terms: list[frozenset[str]] = []
+        self._by_tag: dict[str, list[int]] = defaultdict(list)
+        self._by_category: dict[str, list[int]] = defaultdict(list)
+        self._name_terms: list[frozenset[str]] = []
+
+        for pos, item in enumerate(self.items):
+            self._by_id.setdefault(item.id, item)
+            self._by_name.setdefault(normalize_name(item.name), pos)
+
+            name_terms = frozenset(tokenize(item.name))
+            self._name_terms.append(name_terms)
+            for term in name_terms:
+                self._name_postings[term].add(pos)
+
+            tag_terms = set()
+            for tag in item.tags:
+                self._by_tag[tag.lower()].append(pos)
+                tag_terms.update(tokenize(tag.replace("_", " ")))
+            for term in tag_terms:
+                self._tag_postings[term].add(pos)
+            self._tag_terms.append(frozenset(tag_terms))
+
+            self._by_category[normalize_name(item.category)].append(pos)
+
+        vocab = {
+            word: _stem(word)
+            for item in self.items
+            for word in _TOKEN_RE.findall(" ".join([item.name, *item.tags]).lower().replace("_", " "))
+            if word.isalpha() and word not in STOP_WORDS
+        }
+        self._vocab = TrigramIndex(vocab.items())
+        self._fuzzy = TrigramIndex(
+            (text, pos)
+            for pos, item in enumerate(self.items)
+            for text in (item.name, *(tag.replace("_", " ") for tag in item.tags))
+        )
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    # ---------- direct lookups ----------
+
+    def get(self, item_id: int) -> T | None:
+        return self._by_id.get(item_id)
+
+    def with_tag(self, tag: str) -> list[T]:
+        return [self.items[pos] for pos in self._by_tag.get(tag.strip().lower(), ())]
+
+    def in_category(self, category: str) -> list[T]:
+        return [self.items[pos] for pos in self._by_category.get(normalize_name(category), ())]
+
+    # ---------- ranked search ----------
+
+    def _tag_hits(self, pos: int, terms: frozenset[str]) -> int:
+        return len(terms & self._tag_terms[pos])
+
+    def search(self, query: str, k: int = 5) -> list[tuple[T, float]]:
+        """Top ``k`` matching items, best first."""
+        hits = self._rank(frozenset(tokenize(query)), k)
+        return [(self.items[pos], score) for pos, score in hits]
+
+    def _rank(self, terms: frozenset[str], k: int) -> list[tuple[int, float]]:
+        name_sets = sorted(
+            (self._name_postings[t] for t in terms if t in self._name_postings), key=len
+        )[:MAX_QUERY_TERMS]
+
+        hits: list[tuple[int, float]] = []
+        seen: set[int] = set()
+        # items matching m name tokens, for m = all, all - 1, ... 1: each
+        # level is a union of posting-set intersections, smallest set first
+        for m in range(len(name_sets), 0, -1):
+            level = set().union(
+                *(combo[0].intersection(*combo[1:]) for combo in combinations(name_sets, m))
+            )
+            level -= seen
+            if not level:
+                continue
+            ranked = heapq.nsmallest(
+                k - len(hits),
+                level,
+                key=lambda pos: (
+                    -self._tag_hits(pos, terms),
+                    -m / (len(self._name_terms[pos]) or 1),
+                    pos,
+                ),
+            )
+            hits += [(pos, m + TAG_WEIGHT * self._tag_hits(pos, terms)) for pos in ranked]
+            if len(hits) >= k:
+                return hits
+            seen |= level
+
+        # nothing (more) by name: fall back to tag-only matches
+        tag_counts = Counter(
+            pos for t in terms for pos in self._tag_postings.get(t, ()) if pos not in seen
+        )
+        ranked = heapq.nsmallest(
+            k - len(hits), tag_counts.items(), key=lambda kv: (-kv[1], kv[0])
+        )
+        hits += [(pos, TAG_WEIGHT * n) for pos, n in ranked]
+        return hits
+
+    def best(self, query: str) -> T | None:
+        # exact catalog names (recipe ingredients, repeated items) skip ranking
+        exact = self._by_name.get(normalize_name(query))
+        if exact is not None:
+            return self.items[exact]
+        hits = self.search(query, k=1)
+        return hits[0][0] if hits else None
+
+    # ---------- fuzzy matching ----------
+
+    def fuzzy(
+        self, query: str, k: int = 3, threshold: float = DEFAULT_THRESHOLD
+    ) -> list[tuple[T, float]]:
+        """Top ``k`` items by trigram similarity of names / tags to ``query``."""
+        hits = self._fuzzy.search(strip_filler(query), k=k, threshold=threshold)
+        return [(self.items[pos], score) for pos, score in hits]
+
+    def correct(self, query: str, threshold: float = DEFAULT_THRESHOLD) -> frozenset[str]:
+        """Query terms, with words unknown to the catalog snapped to the nearest known one."""
+        terms = set()
+        for word in strip_filler(query).split():
+            term = _stem(word)
+            if term in self._name_postings or term in self._tag_postings:
+                terms.add(term)
+            elif word.isalpha():
+                nearest = self._vocab.search(word, k=1, threshold=threshold)
+                if nearest:
+                    terms.add(nearest[0][0])
+        return frozenset(terms)
+
+    def match(
+        self, query: str, threshold: float = DEFAULT_THRESHOLD, partial: bool = True
+    ) -> T | None:
+        """
+        Resolve a spoken item name: exact name, else an item whose name
+        contains every (spelling-corrected) query word, else the best fuzzy
+        name / tag candidate, else (if ``partial``) the best partial token
+        match.
+        """
+        exact = self._by_name.get(normalize_name(query))
+        if exact is not None:
+            return self.items[exact]
+
+        terms = self.correct(query, threshold)
+        hits = self._rank(terms, k=1)
+        if hits and terms <= self._name_terms[hits[0][0]]:
+            return self.items[hits[0][0]]
+
+        fuzzy = self.fuzzy(query, k=1, threshold=threshold)
+        if fuzzy:
+            return fuzzy[0][0]
+        return self.items[hits[0][0]] if hits and partial else None
@@ -0,0 +1,122 @@
+import heapq
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Generic, Protocol, Sequence, TypeVar
+
+# ======================================================
+#   FAQ inverted index with BM25 ranking
+# ======================================================
+#
+# Built once per worker (in prewarm). Question and tag text count double
+# compared to the answer body. Stop words such as "a" / "is" are dropped,
+# so they can no longer produce a match on their own, and a query whose
+# best BM25 score is below ``min_score`` is reported as not found.
+
+DEFAULT_MIN_SCORE = float(os.getenv("FAQ_MIN_SCORE", "2.0"))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+QUESTION_WEIGHT = 2
+TAG_WEIGHT = 2
+
+# interrogatives (who / what / how ...) are kept on purpose: they are
+# often the only signal in short FAQ questions like "Who is this for?".
+# So are do / does / you / your: without them "what does your company do"
+# shares nothing but "what" with "What does BharatStack Cloud do?" and
+# scores no better than "what is the weather".
+STOP_WORDS = frozenset(
+    """
+    a an the and or but if then so of to in on at by for from with about into
+    is are was were be been being am did doing have has had having
+    i me my we our it its this that these those they them their
+    he she his her can could would should will shall may might must
+    there here not no yes just also too very please tell know want
+    hai hain ka ki ke ko se me mein aur kya bhi toh
+    """.split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def stem(token: str) -> str:
+    """Tiny suffix stripper: enough to fold plurals and -ing/-ed forms."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    for suffix in ("ing", "ed"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            token = token[: -len(suffix)]
+            break
+    else:
+        if token.endswith(("sses", "xes", "ches", "shes")):
+            token = token[:-2]
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+    if len(token) > 4 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class FAQLike(Protocol):
+    question: str
+    answer: str
+    tags: list[str]
+
+
+T = TypeVar("T", bound=FAQLike)
+
+
+class FAQIndex(Generic[T]):
+    def __init__(self, entries: Sequence[T], min_score: float = DEFAULT_MIN_SCORE):
+        self.entries = list(entries)
+        self.min_score = min_score
+
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._doc_len: list[int] = []
+        for doc_id, entry in enumerate(self.entries):
+            terms = (
+                tokenize(entry.question) * QUESTION_WEIGHT
+                + tokenize(" ".join(entry.tags)) * TAG_WEIGHT
+                + tokenize(entry.answer)
+            )
+            self._doc_len.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings[term].append((doc_id, tf))
+
+        n_docs = len(self.entries)
+        avg_len = (sum(self._doc_len) / n_docs if n_docs else 0.0) or 1.0
+        # per-document length normalisation, precomputed once
+        self._norm = [BM25_K1 * (1 - BM25_B + BM25_B * n / avg_len) for n in self._doc_len]
+        self._idf = {
+            term: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def scores(self, query: str) -> dict[int, float]:
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for doc_id, tf in postings:
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + self._norm[doc_id])
+        return scores
+
+    def search(self, query: str, k: int = 3) -> list[tuple[T, float]]:
+        """Top ``k`` entries scoring at least ``min_score``, best first."""
+        scores = self.scores(query)
+        ranked = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.entries[doc_id], score) for doc_id, score in ranked if score >= self.min_score]
+
+    def best(self, query: str) -> T | None:
+        hits = self.search(query, k=1)
+        return hits[0][0] if hits else None
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+from livekit import rtc
+from livekit.agents import Agent, AgentSession, llm
+from livekit.agents.voice import SpeechHandle
+
+import persistence
+import tts_cache
+from tts_cache import CachedPhrase
+
+logger = logging.getLogger("greetings")
+
+# ======================================================
+#   Pre-synthesized opening greetings
+# ======================================================
+#
+# Each agent keeps a small pool of opening lines, written by its own LLM
+# from its own instructions and synthesized ahead of time. greet() plays
+# one the moment the session starts, so the caller hears the agent before
+# the LLM and TTS connections have even warmed up. The text goes into the
+# chat history like any other agent turn. If the pool is empty, the LLM
+# writes the greeting live instead.
+#
+# Pool texts live in <tts cache dir>/greetings/<agent>.json; their audio
+# is ordinary tts_cache phrases. Picking the phrase whose file was played
+# least recently rotates the pool across every job process on the host.
+# prewarm() tops the pool up to GREETING_POOL_SIZE on a background
+# thread. Once an entry is older than GREETING_TTL_HOURS, it swaps in one
+# fresh greeting per prewarm, so the pool keeps changing. A refresh holds
+# the pool file's lock from read to save: when every job process prewarms
+# at once, one of them writes and synthesizes the pool and the rest then
+# find it full, instead of each paying for a pool and overwriting the
+# others' entries.
+
+GREETING_POOL_SIZE = int(os.getenv("GREETING_POOL_SIZE", "4"))
+GREETING_TTL_HOURS = float(os.getenv("GREETING_TTL_HOURS", "24"))
+
+GREETING_PROMPT = (
+    "A new caller has just joined. Open the conversation now, exactly as you "
+    "would at the start of a session. Reply with only what you would say."
+)
+
+
+# agent -> pool texts this process has audio for; set by prewarm and refresh
+_READY: dict[str, list[str]] = {}
+
+
+def pool_path(agent: str) -> str:
+    return os.path.join(tts_cache.PHRASES.directory, "greetings", f"{agent}.json")
+
+
+def load_pool(agent: str) -> list[dict]:
+    """[{"text", "created"}] for ``agent``; empty if none yet."""
+    pool = persistence.read_json(pool_path(agent), [])
+    return [entry for entry in pool if isinstance(entry, dict) and entry.get("text")]
+
+
+def save_pool(agent: str, pool: list[dict]) -> None:
+    """Write the pool now (not write-behind): refresh() saves it under the lock."""
+    os.makedirs(os.path.dirname(pool_path(agent)), exist_ok=True)
+    persistence.atomic_write_json(pool_path(agent), pool)
+
+
+# ---------------------------------------------------------
+# Building the pool
+# ---------------------------------------------------------
+
+async def write_greeting(instructions: str) -> str:
+    """One opening line from the agent's LLM, with no tools."""
+    import pipeline
+
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="system", content=instructions)
+    chat_ctx.add_message(role="user", content=GREETING_PROMPT)
+    text = ""
+    async with pipeline.llm().chat(chat_ctx=chat_ctx) as stream:
+        async for chunk in stream:
+            if chunk.delta and chunk.delta.content:
+                text += chunk.delta.content
+    return text.strip()
+
+
+async def refresh(
+    agent: str,
+    voice: str,
+    style: str,
+    make_agent: Callable[[], Agent],
+    write: Callable[[str], Awaitable[str]] = write_greeting,
+    now: float | None = None,
+) -> int:
+    """Fill ``agent``'s pool and retire one stale greeting; returns how many were added."""
+    os.makedirs(os.path.dirname(pool_path(agent)), exist_ok=True)
+    # blocks this refresh thread's loop only, never a session's
+    with persistence.file_lock(pool_path(agent)):
+        return await _refresh(agent, voice, style, make_agent, write, now)
+
+
+async def _refresh(
+    agent: str,
+    voice: str,
+    style: str,
+    make_agent: Callable[[], Agent],
+    write: Callable[[str], Awaitable[str]],
+    now: float | None,
+) -> int:
+    now = time.time() if now is None else now
+    pool = load_pool(agent)
+    missing = set(tts_cache.PHRASES.load(voice, style, [e["text"] for e in pool]))
+    pool = [e for e in pool if e["text"] not in missing]
+
+    stale = [e for e in pool if now - e.get("created", 0) > GREETING_TTL_HOURS * 3600]
+    if stale and len(pool) >= GREETING_POOL_SIZE:
+        pool.remove(min(stale, key=lambda e: e.get("created", 0)))
+
+    wanted = GREETING_POOL_SIZE - len(pool)
+    if wanted <= 0:
+        return 0
+    instructions = make_agent().instructions
+    texts = []
+    for _ in range(wanted):
+        try:
+            text = await write(instructions)
+        except Exception:
+            logger.exception("Could not write a greeting for %s", agent)
+            break
+        if text and text not in texts and all(e["text"] != text for e in pool):
+            texts.append(text)
+    stored = await tts_cache.synthesize_missing(voice, style, texts)
+    cached = tts_cache.PHRASES.phrases(voice, style)
+    added = [
+        {"text": text, "created": now} for text in texts if tts_cache.normalize(text) in cached
+    ]
+    pool += added
+    save_pool(agent, pool)
+    _READY[agent] = [e["text"] for e in pool]
+    logger.info(
+        "Greeting pool for %s: %d ready, %d new (%d synthesized)",
+        agent,
+        len(pool),
+        len(added),
+        stored,
+    )
+    return len(added)
+
+
+def prewarm(agent: str, voice: str, style: str, make_agent: Callable[[], Agent]) -> None:
+    """Load ``agent``'s greetings for serving; refresh the pool in the background."""
+    if not tts_cache.TTS_CACHE:
+        return
+    texts = [e["text"] for e in load_pool(agent)]
+    missing = tts_cache.PHRASES.load(voice, style, texts)
+    _READY[agent] = [t for t in texts if t not in missing]
+    if not (os.getenv("MURF_API_KEY") and os.getenv("GOOGLE_API_KEY")):
+        return
+
+    def _run() -> None:
+        asyncio.run(refresh(agent, voice, style, make_agent))
+
+    threading.Thread(target=_run, name=f"greetings-{agent}", daemon=True).start()
+
+
+# ---------------------------------------------------------
+# Playing
+# ---------------------------------------------------------
+
+def pick(agent: str, voice: str, style: str) -> CachedPhrase | None:
+    """The pool greeting played least recently, across processes."""
+    cached = tts_cache.PHRASES.phrases(voice, style)
+    texts = (tts_cache.normalize(t) for t in _READY.get(agent, ()))
+    ready = [cached[t] for t in texts if t in cached]
+
+    def last_played(phrase: CachedPhrase) -> float:
+        try:
+            return os.stat(phrase.path).st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    return min(ready, key=last_played, default=None)
+
+
+async def _frames(frames: Iterable[rtc.AudioFrame]) -> AsyncIterator[rtc.AudioFrame]:
+    for frame in frames:
+        yield frame
+
+
+def greet(session: AgentSession, agent: str, voice: str, style: str) -> SpeechHandle:
+    """Open the session with a pooled greeting, or a live one if none is ready."""
+    phrase = pick(agent, voice, style) if tts_cache.TTS_CACHE else None
+    if phrase is None:
+        return session.generate_reply(instructions=GREETING_PROMPT)
+    tts_cache.PHRASES.touch(phrase)
+    return session.say(phrase.text, audio=_frames(phrase.frames()), add_to_chat_ctx=True)
@@ -0,0 +1,575 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from livekit import rtc
+from livekit.agents import Agent, AgentSession, llm, tts
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+from livekit.agents.voice import io
+from livekit.agents.voice.run_result import FunctionCallEvent, FunctionCallOutputEvent
+
+import greetings
+import persistence
+import tts_cache
+from latency_metrics import PROCESS_STATS, TOOL_PREFIX
+
+logger = logging.getLogger("harness")
+
+# ======================================================
+#   Offline session harness
+# ======================================================
+#
+# Drives the real agents through a real AgentSession with no outside
+# services. The pieces that would call out are replaced by stand-ins:
+#
+#   ScriptedLLM      replies come from a script: text, tool calls, or both,
+#                    after a configurable think time
+#   FakeTTS          silence proportional to the text, after a configurable
+#                    time to first byte
+#   NullAudioOutput  takes the frames and reports playout done at once,
+#                    noting when the turn's first frame arrived
+#
+# User turns go in as text (session.run(user_input=...)), which is what the
+# session sees once STT has produced a final transcript, so there is no
+# STT stand-in. Tools, userdata, stores and indexes are the production
+# ones. Writable data files point into a scratch directory (see sandbox()).
+#
+# Each turn reports wall time, time to first audio, time spent in tools
+# (from the tool_metrics histograms), the tools called, and, with
+# allocation tracing on, peak and retained Python allocations.
+#
+# With --greet, each session first plays the agent's opening greeting
+# (see greetings.py) and reports time to first audio on join.
+#
+#   python src/harness.py [--agents food,sdr] [--repeat 5] [--think-ms 0] [--greet]
+
+
+# ---------------------------------------------------------
+# Scripted LLM
+# ---------------------------------------------------------
+
+@dataclass
+class ToolCall:
+    name: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Reply:
+    text: str = ""
+    tool_calls: list[ToolCall] = field(default_factory=list)
+
+
+def say(text: str) -> Reply:
+    return Reply(text=text)
+
+
+def call(tool: str, /, **arguments: Any) -> Reply:
+    return Reply(tool_calls=[ToolCall(tool, arguments)])
+
+
+class ScriptedLLM(llm.LLM):
+    """Plays queued replies in order; once the queue is empty, says ``default_reply``."""
+
+    def __init__(
+        self,
+        think_time: float = 0.0,
+        chunk_words: int = 4,
+        default_reply: str = "Okay.",
+    ):
+        super().__init__()
+        self.think_time = think_time
+        self.chunk_words = chunk_words
+        self.default_reply = default_reply
+        self.calls = 0
+        self.last_chat_ctx: llm.ChatContext | None = None
+        self._replies: deque[Reply] = deque()
+
+    def script(self, replies: list[Reply]) -> None:
+        self._replies.extend(replies)
+
+    def pending(self) -> int:
+        return len(self._replies)
+
+    def next_reply(self) -> Reply:
+        self.calls += 1
+        return self._replies.popleft() if self._replies else Reply(text=self.default_reply)
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs: Any,
+    ) -> "ScriptedLLMStream":
+        self.last_chat_ctx = chat_ctx
+        return ScriptedLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class ScriptedLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        scripted: ScriptedLLM = self._llm  # type: ignore[assignment]
+        reply = scripted.next_reply()
+        request_id = uuid.uuid4().hex
+        if scripted.think_time:
+            await asyncio.sleep(scripted.think_time)
+
+        if reply.tool_calls:
+            calls = [
+                llm.FunctionToolCall(
+                    name=c.name,
+                    arguments=json.dumps(c.arguments),
+                    call_id=f"call_{uuid.uuid4().hex[:8]}",
+                )
+                for c in reply.tool_calls
+            ]
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", tool_calls=calls))
+            )
+
+        words = reply.text.split(" ") if reply.text else []
+        for i in range(0, len(words), scripted.chunk_words):
+            chunk = " ".join(words[i : i + scripted.chunk_words])
+            if i + scripted.chunk_words < len(words):
+                chunk += " "
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", content=chunk))
+            )
+            await asyncio.sleep(0)
+
+
+# ---------------------------------------------------------
+# Fake TTS and audio sink
+# ---------------------------------------------------------
+
+class FakeTTS(tts.TTS):
+    """Silence, ``ms_per_char`` long per character, after ``ttfb`` seconds."""
+
+    def __init__(self, ttfb: float = 0.0, ms_per_char: float = 1.0, sample_rate: int = 24000):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self.ttfb = ttfb
+        self.ms_per_char = ms_per_char
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "FakeChunkedStream":
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake: FakeTTS = self._tts  # type: ignore[assignment]
+        output_emitter.initialize(
+            request_id=uuid.uuid4().hex,
+            sample_rate=fake.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        if fake.ttfb:
+            await asyncio.sleep(fake.ttfb)
+        samples = int(fake.sample_rate * len(self.input_text) * fake.ms_per_char / 1000)
+        output_emitter.push(bytes(2 * max(samples, 1)))
+        output_emitter.flush()
+
+
+class NullAudioOutput(io.AudioOutput):
+    def __init__(self, sample_rate: int | None = None):
+        super().__init__(
+            label="harness",
+            capabilities=io.AudioOutputCapabilities(pause=False),
+            sample_rate=sample_rate,
+        )
+        self.first_frame_at: float | None = None
+        self.frames = 0
+        self._pushed = 0.0
+        self._capturing = False
+
+    def mark(self) -> None:
+        self.first_frame_at = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter()
+        self.frames += 1
+        self._pushed += frame.duration
+        self._capturing = True
+
+    def flush(self) -> None:
+        super().flush()
+        self._finish(interrupted=False)
+
+    def clear_buffer(self) -> None:
+        self._finish(interrupted=True)
+
+    def _finish(self, interrupted: bool) -> None:
+        # one playback_finished per captured segment, as a real sink reports
+        if not self._capturing:
+            return
+        pushed, self._pushed, self._capturing = self._pushed, 0.0, False
+        self.on_playback_finished(playback_position=pushed, interrupted=interrupted)
+
+
+# ---------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------
+
+@dataclass
+class Turn:
+    user: str
+    replies: list[Reply] = field(default_factory=list)
+
+
+class _Proc:
+    """Stands in for JobProcess in prewarm; the VAD is never used here."""
+
+    def __init__(self):
+        self.userdata: dict[str, Any] = {"vad": None}
+
+
+@dataclass
+class Scenario:
+    agent: str
+    module: str
+    # (module, proc.userdata) -> (Agent, session userdata)
+    build: Callable[[Any, dict], tuple[Agent, Any]]
+    turns: list[Turn]
+
+
+def _build_wellness(m, data):
+    return m.WellnessAgent(), m.Userdata(wellness=m.WellnessState(), store=data["wellness_store"])
+
+
+def _build_tutor(m, data):
+    progress = m.ProgressCounters(m.PROGRESS_FILE)
+    return m.TutorAgent(), m.Userdata(
+        tutor=m.TutorState(), progress=progress, progress_base=m.load_progress()
+    )
+
+
+def _build_sdr(m, data):
+    return m.SDRAgent(), m.Userdata(faqs=data["faqs"])
+
+
+def _build_fraud(m, data):
+    return m.FraudAgent(), m.Userdata(fraud_cases=data["fraud_cases"])
+
+
+def _build_food(m, data):
+    return m.FoodOrderingAgent(), m.Userdata(
+        catalog=data["catalog"], recipes=data["recipes"], orders=data["orders"]
+    )
+
+
+def _build_game_master(m, data):
+    return m.GameMasterAgent(), None
+
+
+SCENARIOS: dict[str, Scenario] = {
+    s.agent: s
+    for s in (
+        Scenario("wellness", "agent_day3", _build_wellness, [
+            Turn("I'm feeling okay, a bit tired.", [call("set_mood", mood="okay"), call("set_energy", energy="low"), say("Thanks for sharing. Anything stressing you?")]),
+            Turn("Work deadlines.", [call("set_stress", stress="work deadlines"), say("What would you like to get done today?")]),
+            Turn("Finish the report and go for a walk.", [call("set_goals", goals=["finish the report", "go for a walk"]), call("complete_checkin"), say("Great plan. Take care!")]),
+            Turn("How was my mood this week?", [call("read_trends", period="week"), say("Your mood has been steady.")]),
+        ]),
+        Scenario("tutor", "agent_day4", _build_tutor, [
+            Turn("Teach me about embeddings.", [call("set_mode", mode="learn"), call("set_concept", concept_id="embeddings"), call("learn_concept"), say("Embeddings map items to vectors.")]),
+            Turn("Quiz me.", [call("set_mode", mode="quiz"), call("quiz_concept"), say("What is an embedding?")]),
+            Turn("Let me explain it back.", [call("set_mode", mode="teach_back"), call("teach_back_prompt"), say("Go ahead.")]),
+        ]),
+        Scenario("sdr", "agent_day5", _build_sdr, [
+            Turn("What does your product do?", [call("faq_lookup", question="what does the product do"), say("We host APIs and web apps.")]),
+            Turn("How much does it cost?", [call("faq_lookup", question="pricing plans"), say("There's a free tier.")]),
+            Turn("I'm Asha from Acme, asha at acme dot com.", [Reply(tool_calls=[ToolCall("set_name", {"name": "Asha"}), ToolCall("set_company", {"company": "Acme"}), ToolCall("set_email", {"email": "asha@acme.com"})]), say("Thanks Asha!")]),
+            Turn("That's all.", [call("finalize_lead"), say("I'll send a summary.")]),
+        ]),
+        Scenario("fraud", "agent_day6", _build_fraud, [
+            Turn("This is John.", [call("verify_username", username="John"), say("What is your favorite color?")]),
+            Turn("Blue.", [call("verify_security_answer", answer="blue"), call("get_transaction_summary"), say("Did you make this purchase?")]),
+            Turn("Yes, that was me.", [call("mark_transaction_safe"), say("Thanks, it's marked safe.")]),
+        ]),
+        Scenario("food", "agent_day7", _build_food, [
+            Turn("I'm Ravi.", [call("set_customer_name", name="Ravi"), say("Hi Ravi, what would you like?")]),
+            Turn("Two breads and some milk.", [Reply(tool_calls=[ToolCall("add_item_to_cart", {"item_name": "bread", "quantity": 2}), ToolCall("add_item_to_cart", {"item_name": "milk", "quantity": 1})]), say("Added.")]),
+            Turn("Everything for a peanut butter sandwich for two.", [call("add_ingredients_for_dish", dish_name="peanut butter sandwich", servings=2), say("Added the ingredients.")]),
+            Turn("What's in my cart?", [call("list_cart"), say("Here's your cart.")]),
+            Turn("Place the order.", [call("place_order"), say("Your order is placed.")]),
+        ]),
+        Scenario("game_master", "agent_day8", _build_game_master, [
+            Turn("Start the adventure.", [say("You wake in a misty forest. A path splits left and right. What do you do next?")]),
+            Turn("I take the left path.", [say("The path leads to a ruined tower. What do you do next?")]),
+        ]),
+    )
+}
+
+
+# ---------------------------------------------------------
+# Sandbox
+# ---------------------------------------------------------
+
+@contextlib.contextmanager
+def sandbox(data_dir: str) -> Iterator[None]:
+    """
+    Point every agent's writable files into ``data_dir`` for the duration,
+    copying the inputs that agents also write back (fraud cases). Phrase
+    audio is cached there too, and never synthesized for real.
+    """
+    import agent_day3
+    import agent_day4
+    import agent_day5
+    import agent_day6
+    import agent_day7
+
+    for sub in ("wellness", "tutor", "leads", "fraud", "orders", "tts_cache"):
+        os.makedirs(os.path.join(data_dir, sub), exist_ok=True)
+    case_file = os.path.join(data_dir, "fraud", os.path.basename(agent_day6.CASE_FILE))
+    if os.path.exists(agent_day6.CASE_FILE):
+        shutil.copyfile(agent_day6.CASE_FILE, case_file)
+    updates = agent_day6.case_updates_file()
+    if os.path.exists(updates):
+        shutil.copyfile(updates, os.path.join(data_dir, "fraud", os.path.basename(updates)))
+
+    patches = [
+        (agent_day3, "USERS_FOLDER", os.path.join(data_dir, "wellness", "users")),
+        (agent_day3, "LEGACY_LOG_FILE", os.path.join(data_dir, "wellness", "wellness_log.json")),
+        (agent_day4, "PROGRESS_FILE", os.path.join(data_dir, "tutor", "tutor_progress.json")),
+        (agent_day5, "LEADS_DIR", os.path.join(data_dir, "leads")),
+        (agent_day6, "CASE_FILE", case_file),
+        (agent_day7, "ORDERS_DIR", os.path.join(data_dir, "orders")),
+        (tts_cache, "PHRASES", tts_cache.PhraseCache(os.path.join(data_dir, "tts_cache"))),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, value in patches:
+        setattr(module, name, value)
+    murf_key = os.environ.pop("MURF_API_KEY", None)
+    try:
+        yield
+    finally:
+        persistence.get_queue().flush()
+        for module, name, value in saved:
+            setattr(module, name, value)
+        if murf_key is not None:
+            os.environ["MURF_API_KEY"] = murf_key
+
+
+def prepare(scenario: Scenario) -> tuple[Any, dict]:
+    """Import the agent module and run its prewarm (inside sandbox())."""
+    module = __import__(scenario.module)
+    proc = _Proc()
+    module.prewarm(proc)
+    return module, proc.userdata
+
+
+# ---------------------------------------------------------
+# Running
+# ---------------------------------------------------------
+
+@dataclass
+class TurnResult:
+    agent: str
+    user: str
+    wall_ms: float
+    first_audio_ms: float | None
+    tool_ms: float
+    tools: list[str]
+    tool_errors: int
+    alloc_peak_kb: float | None = None
+    alloc_retained_kb: float | None = None
+
+
+# TurnResult.user for the greeting played on join
+JOIN = "(join)"
+
+
+def _tool_time_us(agent: str) -> int:
+    return sum(
+        hist.total_us
+        for (name, stage), hist in PROCESS_STATS.items()
+        if name == agent and stage.startswith(TOOL_PREFIX)
+    )
+
+
+async def run_session(
+    scenario: Scenario,
+    module: Any,
+    data: dict,
+    scripted: ScriptedLLM | None = None,
+    fake_tts: FakeTTS | None = None,
+    trace_allocations: bool = False,
+    greet: bool = False,
+) -> list[TurnResult]:
+    """Run every turn of ``scenario`` in one fresh AgentSession, after the greeting if ``greet``."""
+    scripted = scripted or ScriptedLLM()
+    fake_tts = fake_tts or FakeTTS()
+    agent, userdata = scenario.build(module, data)
+    audio = NullAudioOutput()
+    results = []
+
+    session = AgentSession(
+        llm=scripted, tts=fake_tts, userdata=userdata, resume_false_interruption=False
+    )
+    session.output.audio = audio
+    await session.start(agent)
+    try:
+        if greet:
+            started = time.perf_counter()
+            await greetings.greet(session, scenario.agent, module.TTS_VOICE, module.TTS_STYLE)
+            results.append(
+                TurnResult(
+                    agent=scenario.agent,
+                    user=JOIN,
+                    wall_ms=(time.perf_counter() - started) * 1000,
+                    first_audio_ms=(
+                        (audio.first_frame_at - started) * 1000 if audio.first_frame_at else None
+                    ),
+                    tool_ms=0.0,
+                    tools=[],
+                    tool_errors=0,
+                )
+            )
+
+        for turn in scenario.turns:
+            scripted.script(turn.replies)
+            audio.mark()
+            tool_before = _tool_time_us(scenario.agent)
+            if trace_allocations:
+                tracemalloc.reset_peak()
+                mem_before = tracemalloc.get_traced_memory()[0]
+
+            started = time.perf_counter()
+            result = await session.run(user_input=turn.user)
+            wall = time.perf_counter() - started
+
+            tools, errors = [], 0
+            for ev in result.events:
+                if isinstance(ev, FunctionCallEvent):
+                    tools.append(ev.item.name)
+                elif isinstance(ev, FunctionCallOutputEvent) and ev.item.is_error:
+                    errors += 1
+            res = TurnResult(
+                agent=scenario.agent,
+                user=turn.user,
+                wall_ms=wall * 1000,
+                first_audio_ms=(
+                    (audio.first_frame_at - started) * 1000 if audio.first_frame_at else None
+                ),
+                tool_ms=(_tool_time_us(scenario.agent) - tool_before) / 1000,
+                tools=tools,
+                tool_errors=errors,
+            )
+            if trace_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                res.alloc_peak_kb = (peak - mem_before) / 1024
+                res.alloc_retained_kb = (current - mem_before) / 1024
+            results.append(res)
+            if scripted.pending():
+                logger.warning("%s: %d scripted replies unused after %r", scenario.agent, scripted.pending(), turn.user)
+                scripted._replies.clear()
+    finally:
+        await session.aclose()
+        if hasattr(userdata, "progress"):
+            await userdata.progress.aclose()
+    return results
+
+
+async def run_scenarios(
+    names: list[str],
+    data_dir: str,
+    repeat: int = 1,
+    think_time: float = 0.0,
+    tts_ttfb: float = 0.0,
+    trace_allocations: bool = True,
+    greet: bool = False,
+) -> list[TurnResult]:
+    results = []
+    if trace_allocations:
+        tracemalloc.start()
+    try:
+        with sandbox(data_dir):
+            for name in names:
+                scenario = SCENARIOS[name]
+                module, data = prepare(scenario)
+                for _ in range(repeat):
+                    results += await run_session(
+                        scenario,
+                        module,
+                        data,
+                        ScriptedLLM(think_time=think_time),
+                        FakeTTS(ttfb=tts_ttfb),
+                        trace_allocations=trace_allocations,
+                        greet=greet,
+                    )
+    finally:
+        if trace_allocations:
+            tracemalloc.stop()
+    return results
+
+
+def print_report(results: list[TurnResult]) -> None:
+    print(
+        f"{'agent':<12} {'turn':<44} {'wall ms':>8} {'audio ms':>9} {'tool ms':>8} "
+        f"{'peak KB':>8} {'kept KB':>8}  tools"
+    )
+    for r in results:
+        audio = f"{r.first_audio_ms:9.1f}" if r.first_audio_ms is not None else f"{'-':>9}"
+        peak = f"{r.alloc_peak_kb:8.0f}" if r.alloc_peak_kb is not None else f"{'-':>8}"
+        kept = f"{r.alloc_retained_kb:8.0f}" if r.alloc_retained_kb is not None else f"{'-':>8}"
+        errors = f"  ({r.tool_errors} failed)" if r.tool_errors else ""
+        print(
+            f"{r.agent:<12} {r.user[:44]:<44} {r.wall_ms:8.1f} {audio} {r.tool_ms:8.2f} "
+            f"{peak} {kept}  {','.join(r.tools)}{errors}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the agents offline against scripted turns.")
+    parser.add_argument("--agents", default="", help="comma separated; default all")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--think-ms", type=float, default=0.0, help="scripted LLM think time")
+    parser.add_argument("--tts-ms", type=float, default=0.0, help="fake TTS time to first byte")
+    parser.add_argument("--no-alloc", action="store_true", help="skip tracemalloc")
+    parser.add_argument("--greet", action="store_true", help="play the opening greeting first")
+    parser.add_argument("--data-dir", help="keep written files here (default: a temp dir)")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.agents.split(",") if n.strip()] or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown agent(s): {', '.join(unknown)}")
+
+    with contextlib.ExitStack() as stack:
+        data_dir = args.data_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        results = asyncio.run(
+            run_scenarios(
+                names,
+                data_dir,
+                repeat=args.repeat,
+                think_time=args.think_ms / 1000,
+                tts_ttfb=args.tts_ms / 1000,
+                trace_allocations=not args.no_alloc,
+                greet=args.greet,
+            )
+        )
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+import asyncio
+import glob
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable
+
+import persistence
+
+logger = logging.getLogger("latency_metrics")
+
+# ======================================================
+#   Per-stage latency histograms
+# ======================================================
+#
+# Every session feeds its metrics_collected events into per-agent, per-stage
+# histograms:
+#
+#   stt       end of speech -> final transcript (EOU transcription_delay;
+#             request duration for non-streaming STT)
+#   eou       end of speech -> end of turn decided (end_of_utterance_delay)
+#   llm_ttft  LLM time to first token
+#   tts_ttfb  TTS time to first byte
+#   turn      eou + llm_ttft + tts_ttfb for the same speech_id, i.e. how
+#             long the user waits after they stop talking
+#
+# With LOOP_WATCHDOG=1, loop_watchdog adds "loop_lag" and "loop_block".
+#
+# Histograms are HDR-style: log-linear buckets with ~1% relative error,
+# so p99 stays accurate with constant memory. Each job process snapshots
+# its histograms into METRICS_DIR (periodically and at shutdown). The
+# worker's main process serves all snapshots merged as Prometheus text on
+# 127.0.0.1:METRICS_PORT/metrics. Job processes are separate, so files
+# are how their numbers reach the one endpoint.
+
+METRICS_DIR = os.getenv(
+    "METRICS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "metrics")
+)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "10"))
+
+STAGES = ("stt", "eou", "llm_ttft", "tts_ttfb", "turn")
+QUANTILES = (0.5, 0.95, 0.99)
+
+MERGED_NAME = "merged.json"
+
+# function tool timings share the histograms under stage "tool:<name>"
+# (see tool_metrics.py) and are rendered as their own metric
+TOOL_PREFIX = "tool:"
+
+
+class Histogram:
+    """Log-linear histogram of durations, in microseconds."""
+
+    SUB_BITS = 7  # 64..127 sub-buckets per power of two -> <1.6% error
+
+    def __init__(self):
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def _key(self, us: int) -> int:
+        shift = max(0, us.bit_length() - self.SUB_BITS)
+        return (shift << self.SUB_BITS) + (us >> shift)
+
+    def _value(self, key: int) -> float:
+        shift, sub = key >> self.SUB_BITS, key & ((1 << self.SUB_BITS) - 1)
+        return (sub << shift) + ((1 << shift) - 1) / 2  # bucket midpoint
+
+    def record(self, seconds: float) -> None:
+        us = max(0, round(seconds * 1_000_000))
+        key = self._key(us)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total_us += us
+        self.max_us = max(self.max_us, us)
+
+    def merge(self, other: "Histogram") -> None:
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile ``q`` in seconds (0.0 when empty)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * q // 1))  # ceil
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return min(self._value(key), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": {str(k): n for k, n in self.buckets.items()},
+            "count": self.count,
+            "total_us": self.total_us,
+            "max_us": self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        hist = cls()
+        hist.buckets = {int(k): int(n) for k, n in data.get("buckets", {}).items()}
+        hist.count = int(data.get("count", 0))
+        hist.total_us = int(data.get("total_us", 0))
+        hist.max_us = int(data.get("max_us", 0))
+        return hist
+
+
+class LatencyStats:
+    """Histograms keyed by (agent, stage) plus (agent, counter, label) counters; thread-safe."""
+
+    def __init__(self):
+        self._hists: dict[tuple[str, str], Histogram] = {}
+        self._counters: dict[tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._hists.get((agent, stage))
+            if hist is None:
+                hist = self._hists[(agent, stage)] = Histogram()
+            hist.record(seconds)
+
+    def add(self, agent: str, counter: str, label: str, n: int = 1) -> None:
+        with self._lock:
+            key = (agent, counter, label)
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def merge(self, other: "LatencyStats") -> None:
+        for key, hist in other.items():
+            with self._lock:
+                self._hists.setdefault(key, Histogram()).merge(hist)
+        for (agent, counter, label), n in other.counters():
+            self.add(agent, counter, label, n)
+
+    def items(self) -> list[tuple[tuple[str, str], Histogram]]:
+        with self._lock:
+            return sorted(self._hists.items())
+
+    def counters(self) -> list[tuple[tuple[str, str, str], int]]:
+        with self._lock:
+            return sorted(self._counters.items())
+
+    def to_dict(self) -> dict:
+        return {
+            "histograms": {f"{agent}/{stage}": h.to_dict() for (agent, stage), h in self.items()},
+            "counters": {"/".join(key): n for key, n in self.counters()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyStats":
+        stats = cls()
+        for key, value in data.get("histograms", {}).items():
+            agent, _, stage = key.partition("/")
+            stats._hists[(agent, stage)] = Histogram.from_dict(value)
+        for key, n in data.get("counters", {}).items():
+            agent, counter, label = key.split("/", 2)
+            stats._counters[(agent, counter, label)] = int(n)
+        return stats
+
+    def summary_lines(self) -> list[str]:
+        lines = []
+        for (agent, stage), hist in self.items():
+            if stage.startswith(TOOL_PREFIX):
+                continue
+            p50, p95, p99 = (hist.quantile(q) * 1000 for q in QUANTILES)
+            lines.append(
+                f"{agent:<12} {stage:<14} n={hist.count:<5} "
+                f"p50={p50:7.0f}ms p95={p95:7.0f}ms p99={p99:7.0f}ms max={hist.max_us / 1000:7.0f}ms"
+            )
+        return lines
+
+
+# every session in this process records here too; this is what gets
+# snapshotted for the endpoint
+PROCESS_STATS = LatencyStats()
+
+
+# ---------------------------------------------------------
+# Prometheus text
+# ---------------------------------------------------------
+
+COUNTER_HELP = {
+    "tool_errors": "Tool calls that raised.",
+    "tool_slow": "Tool calls over the tool latency budget.",
+    "tool_io_read_bytes": "Bytes read by the process during tool calls.",
+    "tool_io_write_bytes": "Bytes written by the process during tool calls.",
+    "loop_blocks": "Event loop blocks over the watchdog threshold, by active tool.",
+    "loop_block_sites": "Event loop blocks over the watchdog threshold, by code site.",
+}
+# label name for each counter's label; "tool" unless listed
+COUNTER_LABEL = {"loop_block_sites": "site"}
+
+
+def _summary(lines: list[str], name: str, labels: str, hist: Histogram) -> None:
+    for q in QUANTILES:
+        lines.append(f'{name}{{{labels},quantile="{q}"}} {hist.quantile(q):.6f}')
+    lines.append(f"{name}_sum{{{labels}}} {hist.total_us / 1_000_000:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+
+def render_prometheus(stats: LatencyStats) -> str:
+    stages = "agent_stage_latency_seconds"
+    tools = "agent_tool_latency_seconds"
+    lines = [
+        f"# HELP {stages} Voice pipeline stage latency per agent (HDR histogram quantiles).",
+        f"# TYPE {stages} summary",
+    ]
+    tool_lines = [
+        f"# HELP {tools} Function tool wall time per agent and tool.",
+        f"# TYPE {tools} summary",
+    ]
+    for (agent, stage), hist in stats.items():
+        if stage.startswith(TOOL_PREFIX):
+            _summary(tool_lines, tools, f'agent="{agent}",tool="{stage[len(TOOL_PREFIX):]}"', hist)
+        else:
+            _summary(lines, stages, f'agent="{agent}",stage="{stage}"', hist)
+    lines += tool_lines
+
+    by_counter: dict[str, list[str]] = {}
+    for (agent, counter, label), n in stats.counters():
+        by_counter.setdefault(counter, []).append(
+            f'agent_{counter}_total{{agent="{agent}",{COUNTER_LABEL.get(counter, "tool")}="{label}"}} {n}'
+        )
+    for counter, samples in by_counter.items():
+        lines.append(f"# HELP agent_{counter}_total {COUNTER_HELP.get(counter, counter)}")
+        lines.append(f"# TYPE agent_{counter}_total counter")
+        lines += samples
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------
+# Session collector
+# ---------------------------------------------------------
+
+class TurnLatencyCollector:
+    """Turns a session's metrics_collected events into stage latencies."""
+
+    MAX_OPEN_TURNS = 64
+
+    def __init__(self, agent: str, process_stats: LatencyStats | None = PROCESS_STATS):
+        self.agent = agent
+        self.session = LatencyStats()
+        self._process = process_stats
+        self._turns: OrderedDict[str, dict[str, float]] = OrderedDict()
+
+    def _record(self, stage: str, seconds: float) -> None:
+        self.session.record(self.agent, stage, seconds)
+        if self._process is not None:
+            self._process.record(self.agent, stage, seconds)
+
+    def _turn_part(self, speech_id: str | None, stage: str, seconds: float) -> None:
+        if not speech_id:
+            return
+        parts = self._turns.setdefault(speech_id, {})
+        # only the first LLM / TTS request of a turn is what the user waits on
+        parts.setdefault(stage, seconds)
+        if len(parts) == 3:
+            del self._turns[speech_id]
+            self._record("turn", sum(parts.values()))
+        while len(self._turns) > self.MAX_OPEN_TURNS:
+            self._turns.popitem(last=False)
+
+    def collect(self, m) -> None:
+        kind = getattr(m, "type", None)
+        if kind == "eou_metrics":
+            self._record("stt", m.transcription_delay)
+            self._record("eou", m.end_of_utterance_delay)
+            self._turn_part(m.speech_id, "eou", m.end_of_utterance_delay)
+        elif kind == "stt_metrics":
+            if not m.streamed:
+                self._record("stt", m.duration)
+        elif kind == "llm_metrics":
+            if not m.cancelled:
+                self._record("llm_ttft", m.ttft)
+                self._turn_part(m.speech_id, "llm_ttft", m.ttft)
+        elif kind == "tts_metrics":
+            if not m.cancelled:
+                self._record("tts_ttfb", m.ttfb)
+                self._turn_part(m.speech_id, "tts_ttfb", m.ttfb)
+
+    def log_summary(self) -> None:
+        lines = self.session.summary_lines()
+        if lines:
+            logger.info("Session latency summary:\n%s", "\n".join(lines))
+
+
+# ---------------------------------------------------------
+# Snapshots (job processes) and merging (endpoint)
+# ---------------------------------------------------------
+
+_SNAPSHOT_PATH = None
+
+
+def snapshot_path() -> str:
+    global _SNAPSHOT_PATH
+    if _SNAPSHOT_PATH is None:
+        # pid plus start time: pids get reused, snapshot names must not
+        _SNAPSHOT_PATH = os.path.join(METRICS_DIR, f"proc_{os.getpid()}_{time.time_ns()}.json")
+    return _SNAPSHOT_PATH
+
+
+def write_snapshot(stats: LatencyStats = PROCESS_STATS) -> None:
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    persistence.atomic_write_bytes(snapshot_path(), persistence.dumps(stats.to_dict()))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect_snapshots(directory: str = METRICS_DIR, compact: bool = True) -> LatencyStats:
+    """
+    Merge every process snapshot in ``directory``. With ``compact``,
+    snapshots of processes that have exited are folded into merged.json
+    and removed, so the directory doesn't grow with every session.
+    """
+    merged_path = os.path.join(directory, MERGED_NAME)
+    merged = persistence.read_json(merged_path, {"stats": {}, "folded": []})
+    base = LatencyStats.from_dict(merged["stats"])
+    folded = set(merged["folded"])
+    live = LatencyStats()
+    finished = []
+    leftover = []
+
+    for path in sorted(glob.glob(os.path.join(directory, "proc_*.json"))):
+        name = os.path.basename(path)
+        if name in folded:
+            leftover.append(path)  # folded earlier, removal interrupted
+            continue
+        data = persistence.read_json(path, None)
+        if data is None:
+            continue
+        stats = LatencyStats.from_dict(data)
+        pid = int(name.split("_")[1])
+        if compact and not _pid_alive(pid):
+            base.merge(stats)
+            finished.append(path)
+        else:
+            live.merge(stats)
+
+    if finished:
+        # names stay listed until their file is gone, so a crash before the
+        # removals below can't count a snapshot twice on the next round
+        names = [os.path.basename(p) for p in leftover + finished]
+        persistence.atomic_write_bytes(
+            merged_path, persistence.dumps({"stats": base.to_dict(), "folded": sorted(names)})
+        )
+    if compact:
+        for path in leftover + finished:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    base.merge(live)
+    return base
+
+
+def serve_metrics(port: int = METRICS_PORT, host: str = "127.0.0.1") -> ThreadingHTTPServer | None:
+    """Serve /metrics from a daemon thread; returns None when disabled or the port is taken."""
+    if port <= 0:
+        return None
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            with lock:  # one compaction at a time
+                body = render_prometheus(collect_snapshots()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        logger.warning("Latency metrics endpoint not started on %s:%d: %s", host, port, e)
+        return None
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    threading.Thread(target=server.serve_forever, name="latency-metrics", daemon=True).start()
+    logger.info("Latency metrics on http://%s:%d/metrics", host, port)
+    return server
+
+
+# ---------------------------------------------------------
+# Wiring
+# ---------------------------------------------------------
+
+def instrument_session(session, ctx, agent: str) -> TurnLatencyCollector:
+    """
+    Record ``session``'s stage latencies under ``agent``, snapshot them
+    every SNAPSHOT_INTERVAL seconds, and log the session summary and write
+    a final snapshot at shutdown. Also starts the loop watchdog if enabled.
+    """
+    collector = TurnLatencyCollector(agent)
+
+    @session.on("metrics_collected")
+    def _on_metrics(ev) -> None:
+        collector.collect(ev.metrics)
+
+    async def snapshot_loop() -> None:
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            persistence.submit(f"file:{snapshot_path()}", write_snapshot)
+
+    task = asyncio.create_task(snapshot_loop())
+
+    async def _on_shutdown() -> None:
+        task.cancel()
+        collector.log_summary()
+        await asyncio.to_thread(write_snapshot)
+
+    ctx.add_shutdown_callback(_on_shutdown)
+
+    import loop_watchdog  # imports this module
+
+    loop_watchdog.watch(ctx)
+    return collector
+
+
+def _main(argv: Iterable[str] | None = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print or serve merged latency snapshots.")
+    parser.add_argument("--serve", action="store_true", help="serve /metrics until interrupted")
+    parser.add_argument("--port", type=int, default=METRICS_PORT)
+    args = parser.parse_args(argv)
+
+    if not args.serve:
+        print("\n".join(collect_snapshots(compact=False).summary_lines()) or "no samples yet")
+        return
+    logging.basicConfig(level=logging.INFO)
+    if serve_metrics(args.port) is None:
+        raise SystemExit(1)
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    _main()
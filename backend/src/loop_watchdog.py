@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from latency_metrics import PROCESS_STATS, LatencyStats
+from tool_metrics import active_tool
+
+logger = logging.getLogger("loop_watchdog")
+
+# ======================================================
+#   Event-loop lag watchdog (opt-in: LOOP_WATCHDOG=1)
+# ======================================================
+#
+# The loop that runs tools also pumps audio frames, so any callback that
+# holds it for long is heard as choppy or robotic audio. Two halves:
+#
+#   heartbeat  a task on the loop that wakes every LOOP_WATCHDOG_INTERVAL_MS
+#              and records how late it woke (stage "loop_lag"). A wake-up
+#              later than LOOP_BLOCK_THRESHOLD_MS is a block: its length is
+#              recorded (stage "loop_block") and counted per tool.
+#   watcher    a daemon thread that notices the heartbeat is overdue while
+#              the loop is still stuck, and grabs the loop thread's stack
+#              then, so the report shows what was running, not what ran
+#              after.
+#
+# There is one watchdog per event loop, shared by every session on it, so
+# the loop itself has no agent: lag and blocks outside any tool are
+# recorded with agent and tool "-". A block inside a timed tool is
+# attributed to that tool and its agent (see tool_metrics.active_tool).
+# Counters, exported through the metrics endpoint:
+#
+#   loop_blocks       blocks per agent and tool
+#   loop_block_sites  blocks per innermost frame in this codebase
+#
+# Each block is also logged once with its stack.
+
+LOOP_WATCHDOG = os.getenv("LOOP_WATCHDOG", "0").lower() in ("1", "true", "yes")
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+LOOP_WATCHDOG_INTERVAL_MS = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", "20"))
+
+STACK_LIMIT = 12
+UNATTRIBUTED = "-"
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _site(stack: traceback.StackSummary) -> str:
+    """Innermost frame from our own sources, e.g. ``agent_day7.py:212 place_order``."""
+    for frame in reversed(stack):
+        if os.path.dirname(os.path.abspath(frame.filename)) == _SRC_DIR and not frame.filename.endswith(
+            ("loop_watchdog.py", "tool_metrics.py")
+        ):
+            return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+    return UNATTRIBUTED
+
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS,
+        interval_ms: float = LOOP_WATCHDOG_INTERVAL_MS,
+        stats: LatencyStats = PROCESS_STATS,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stats = stats
+        self.blocks = 0
+        self._beat = time.perf_counter()
+        # set by the watcher thread, consumed by the heartbeat
+        self._capture: tuple[str, str, str, traceback.StackSummary] | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._loop_thread_id = 0
+        # sessions using this watchdog; see watch()
+        self.sessions = 0
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("Loop watchdog on: block threshold %.0f ms", self.threshold * 1000)
+
+    async def aclose(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._thread:
+            await asyncio.to_thread(self._thread.join, 1.0)
+
+    # ---------- loop side ----------
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            late = max(0.0, now - self._beat - self.interval)
+            self._beat = now
+            self.stats.record(UNATTRIBUTED, "loop_lag", late)
+            if late >= self.threshold:
+                self._report(late)
+            else:
+                with self._lock:
+                    self._capture = None
+
+    def _report(self, late: float) -> None:
+        with self._lock:
+            capture, self._capture = self._capture, None
+        agent, tool, site, stack = capture or (UNATTRIBUTED, UNATTRIBUTED, UNATTRIBUTED, None)
+        self.blocks += 1
+        self.stats.record(agent, "loop_block", late)
+        self.stats.add(agent, "loop_blocks", tool)
+        self.stats.add(agent, "loop_block_sites", site)
+        logger.warning(
+            "Event loop blocked %.0f ms (agent %s, tool %s) at %s%s",
+            late * 1000,
+            agent,
+            tool,
+            site,
+            "\n" + "".join(stack.format()) if stack else "",
+        )
+
+    # ---------- watcher thread ----------
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.threshold / 2)
+        while not self._stop.wait(poll):
+            overdue = time.perf_counter() - self._beat - self.interval
+            if overdue < self.threshold or self._capture is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame, limit=STACK_LIMIT)
+            agent, tool = active_tool(frame) or (UNATTRIBUTED, UNATTRIBUTED)
+            with self._lock:
+                self._capture = (agent, tool, _site(stack), stack)
+            del frame
+
+
+_WATCHDOGS: dict[asyncio.AbstractEventLoop, LoopWatchdog] = {}
+
+
+def watch(ctx=None, **kwargs) -> LoopWatchdog | None:
+    """
+    Start the watchdog for the running loop if LOOP_WATCHDOG is set; one
+    per loop, shared by every session on it. It stops when the last
+    session's ``ctx`` shuts down (never, if any caller passed no ctx).
+    """
+    if not LOOP_WATCHDOG:
+        return None
+    loop = asyncio.get_running_loop()
+    dog = _WATCHDOGS.get(loop)
+    if dog is None:
+        dog = _WATCHDOGS[loop] = LoopWatchdog(**kwargs)
+        dog.start()
+    dog.sessions += 1
+
+    async def _release() -> None:
+        dog.sessions -= 1
+        if dog.sessions == 0 and _WATCHDOGS.get(loop) is dog:
+            _WATCHDOGS.pop(loop)
+            await dog.aclose()
+
+    if ctx is not None:
+        ctx.add_shutdown_callback(_release)
+    return dog
@@ -0,0 +1,98 @@
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Union
+
+# ======================================================
+#   Integer paise money
+# ======================================================
+#
+# Amounts are plain ints counting paise (1 rupee = 100 paise), so cart and
+# order totals are exact and summing them is integer addition. Rupee
+# amounts from JSON are converted once, at load time; load the file with
+# json.load(..., parse_float=Decimal) so no binary float sits in between.
+
+Paise = int
+RupeeAmount = Union[int, float, str, Decimal]
+
+_CENT = Decimal("0.01")
+
+
+def to_paise(rupees: RupeeAmount) -> Paise:
+    if isinstance(rupees, int) and not isinstance(rupees, bool):
+        return rupees * 100
+    amount = rupees if isinstance(rupees, Decimal) else Decimal(str(rupees))
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def rupees_to_paise(values: Iterable[RupeeAmount]) -> list[Paise]:
+    """Batch conversion for a whole catalog; whole-rupee prices skip Decimal."""
+    return [v * 100 if type(v) is int else to_paise(v) for v in values]
+
+
+def format_inr(paise: Paise) -> str:
+    """Display form with Indian digit grouping: 180000 -> "₹1,800", 1050 -> "₹10.50"."""
+    sign = "-" if paise < 0 else ""
+    rupees, rest = divmod(abs(paise), 100)
+    digits = str(rupees)
+    if len(digits) > 3:
+        head, tail = digits[:-3], digits[-3:]
+        groups = []
+        while len(head) > 2:
+            head, group = head[:-2], head[-2:]
+            groups.insert(0, group)
+        digits = ",".join([head, *groups, tail])
+    return f"{sign}₹{digits}" + (f".{rest:02d}" if rest else "")
+
+
+# ---------------------------------------------------------
+# Spoken form
+# ---------------------------------------------------------
+
+_ONES = (
+    "zero one two three four five six seven eight nine ten eleven twelve "
+    "thirteen fourteen fifteen sixteen seventeen eighteen nineteen"
+).split()
+_TENS = "_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()
+
+
+def _below_thousand(n: int) -> str:
+    hundreds, rest = divmod(n, 100)
+    words = [f"{_ONES[hundreds]} hundred"] if hundreds else []
+    if rest >= 20:
+        tens, ones = divmod(rest, 10)
+        words.append(_TENS[tens] + (f" {_ONES[ones]}" if ones else ""))
+    elif rest or not hundreds:
+        words.append(_ONES[rest])
+    return " ".join(words)
+
+
+# every n < 1000 spelled out once at import; speech then needs only a few
+# table lookups per amount
+_WORDS = tuple(_below_thousand(n) for n in range(1000))
+
+_SCALES = ((10_000_000, "crore"), (100_000, "lakh"), (1_000, "thousand"))
+
+
+def number_words(n: int) -> str:
+    """Indian-system words: 250000 -> "two lakh fifty thousand"."""
+    if n < 1000:
+        return _WORDS[n]
+    words = []
+    for size, name in _SCALES:
+        count, n = divmod(n, size)
+        if count:
+            words.append(f"{number_words(count)} {name}")
+    if n:
+        words.append(_WORDS[n])
+    return " ".join(words)
+
+
+def speak_inr(paise: Paise) -> str:
+    """TTS-friendly amount: 18000 -> "one hundred eighty rupees"."""
+    prefix = "minus " if paise < 0 else ""
+    rupees, rest = divmod(abs(paise), 100)
+    parts = []
+    if rupees or not rest:
+        parts.append(f"{number_words(rupees)} {'rupee' if rupees == 1 else 'rupees'}")
+    if rest:
+        parts.append(f"{number_words(rest)} paise")
+    return prefix + " and ".join(parts)
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import threading
+
+import persistence
+
+logger = logging.getLogger("order_store")
+
+# ======================================================
+#   Durable order store
+# ======================================================
+#
+# Layout of the orders directory:
+#
+#   order_000042.json       one file per order, written once, never replaced
+#   index.jsonl             one line per order: id, timestamp, customer,
+#                           total_paise, file (append-only)
+#   .order_seq              last order id handed out
+#   day7_latest_order.json  copy of the newest order, swapped in atomically,
+#                           so the UI reads exactly one small file per poll
+#
+# save() runs under an exclusive lock on index.jsonl, so workers serving
+# different rooms never hand out the same id or clobber each other's
+# orders. Ids are monotonic; a crash between taking an id and writing the
+# order leaves a gap, never a duplicate.
+
+INDEX_NAME = "index.jsonl"
+SEQ_NAME = ".order_seq"
+LATEST_NAME = "day7_latest_order.json"
+
+
+def customer_key(name: str | None) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def order_file_name(order_id: int) -> str:
+    return f"order_{order_id:06d}.json"
+
+
+class OrderStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self.seq_path = os.path.join(root, SEQ_NAME)
+        self.latest_path = os.path.join(root, LATEST_NAME)
+
+        self._lock = threading.Lock()
+        self._entries: dict[int, dict] = {}
+        self._by_customer: dict[str, list[int]] = {}
+        self._index_offset = 0
+        self._refresh()
+
+    # ---------- index ----------
+
+    def _refresh(self) -> None:
+        """Read index lines appended since the last call (by any process)."""
+        try:
+            with open(self.index_path, "rb") as f:
+                f.seek(self._index_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # only consume complete lines; a concurrent append may be mid-write
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                self._add_entry(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping bad line in %s", self.index_path)
+        self._index_offset += end
+
+    def _add_entry(self, entry: dict) -> None:
+        order_id = int(entry["id"])
+        if order_id in self._entries:
+            return
+        self._entries[order_id] = entry
+        self._by_customer.setdefault(customer_key(entry.get("customer")), []).append(order_id)
+
+    def _next_id(self) -> int:
+        try:
+            with open(self.seq_path, "r", encoding="utf-8") as f:
+                last = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            last = 0
+        # never go below what the index has seen (e.g. seq file lost)
+        last = max([last, *self._entries])
+        order_id = last + 1
+        persistence.atomic_write_bytes(self.seq_path, str(order_id).encode())
+        return order_id
+
+    # ---------- writes ----------
+
+    def save(self, order: dict) -> dict:
+        """
+        Assign the next order id, write the order file, append it to the
+        index and swap the latest pointer. Blocking; call it off the event
+        loop. Returns the stored payload (with ``order_id``).
+        """
+        with self._lock, persistence.file_lock(self.index_path):
+            self._refresh()
+            order_id = self._next_id()
+            order = {"order_id": order_id, **order}
+            payload = persistence.dumps(order)
+            file_name = order_file_name(order_id)
+            path = os.path.join(self.root, file_name)
+            if os.path.exists(path):
+                raise FileExistsError(path)  # would mean the seq went backwards
+            persistence.atomic_write_bytes(path, payload)
+
+            entry = {
+                "id": order_id,
+                "timestamp": order.get("timestamp"),
+                "customer": order.get("customer_name"),
+                "total_paise": order.get("total_paise"),
+                "file": file_name,
+            }
+            line = json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+            fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            persistence.atomic_write_bytes(self.latest_path, payload)
+            self._refresh()
+
+        logger.info("Stored order %d for %s", order_id, entry["customer"])
+        return order
+
+    # ---------- queries ----------
+
+    def get(self, order_id: int) -> dict | None:
+        with self._lock:
+            self._refresh()
+            entry = self._entries.get(order_id)
+        if entry is None:
+            return None
+        return persistence.read_json(os.path.join(self.root, entry["file"]), None)
+
+    def for_customer(self, customer: str, limit: int | None = None) -> list[dict]:
+        """Index entries for ``customer``, newest first."""
+        with self._lock:
+            self._refresh()
+            ids = self._by_customer.get(customer_key(customer), [])
+            picked = ids[::-1] if limit is None else ids[: -limit - 1 : -1]
+            return [self._entries[i] for i in picked]
+
+    def latest(self) -> dict | None:
+        return persistence.read_json(self.latest_path, None)
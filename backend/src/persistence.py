@@ -0,0 +1,345 @@
+import asyncio
+import atexit
+import contextlib
+import itertools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, TypeVar
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, writes stay atomic per file
+    fcntl = None
+
+logger = logging.getLogger("persistence")
+
+T = TypeVar("T")
+
+# ======================================================
+#   Atomic JSON files
+# ======================================================
+#
+# State files are never truncated in place: the new content goes to a temp
+# file in the same directory, is fsynced, swapped in with os.replace and
+# the directory entry is fsynced. A crash leaves either the old or the new
+# file, never a half-written one.
+
+COMPACT_JSON = os.getenv("PERSISTENCE_COMPACT_JSON", "0") == "1"
+FAST_JSON = os.getenv("PERSISTENCE_FAST_JSON", "0") == "1"
+
+
+def dumps(data: Any, compact: bool = COMPACT_JSON, fast: bool = FAST_JSON) -> bytes:
+    """Encode ``data`` as UTF-8 JSON; ``fast`` uses orjson when installed."""
+    if fast and orjson is not None:
+        # orjson only knows 2-space indentation
+        return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=4)
+    return text.encode("utf-8")
+
+
+def _fsync_dir(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows cannot open directories
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: str, payload: bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(directory)
+
+
+def atomic_write_json(
+    path: str, data: Any, compact: bool = COMPACT_JSON, fast: bool = FAST_JSON
+) -> None:
+    atomic_write_bytes(path, dumps(data, compact=compact, fast=fast))
+
+
+def quarantine(path: str) -> str:
+    """Move a corrupt file aside to ``<path>.corrupt-<timestamp>``; returns the new path."""
+    moved = f"{path}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.replace(path, moved)
+    logger.error("Corrupt data in %s, moved to %s", path, moved)
+    return moved
+
+
+def read_json(path: str, default: Any) -> Any:
+    """
+    Load a JSON state file. A missing file yields ``default``; a corrupt one
+    is moved aside to ``<path>.corrupt-<timestamp>`` (so the next save
+    cannot silently overwrite the evidence) before returning ``default``.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return default
+    try:
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except ValueError:
+        quarantine(path)
+        return default
+
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    """Exclusive cross-process lock on ``<path>.lock`` (no-op without fcntl)."""
+    with open(path + ".lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# ======================================================
+#   Write-behind persistence queue
+# ======================================================
+#
+# Tools run on the same asyncio loop that streams STT/LLM/TTS audio, so
+# they must never block on disk. They hand a write job to this queue and
+# return immediately; one daemon thread per process drains it.
+#
+# - Jobs are keyed. Submitting a key that is still pending replaces the
+#   queued job (keeping its place in line), so rapid rewrites of the same
+#   file collapse into one write of the newest content.
+# - submit() never blocks: it is called on the event loop. max_pending is
+#   a soft bound. Jobs past it are still queued (an append dropped is a
+#   check-in lost), but each one is counted as an overflow in stats() and
+#   the first of a run is logged, so a writer that can't keep up shows.
+# - Entrypoints register drain() as a JobContext shutdown callback, and an
+#   atexit hook flushes whatever is left when the process exits.
+
+DEFAULT_MAX_PENDING = int(os.getenv("PERSISTENCE_MAX_PENDING", "256"))
+
+
+class WriteBehindQueue:
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING):
+        self.max_pending = max_pending
+        self._pending: OrderedDict[str, Callable[[], None]] = OrderedDict()
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self._seq = itertools.count()
+
+        self._submitted = 0
+        self._coalesced = 0
+        self._completed = 0
+        self._failed = 0
+        self._overflows = 0
+        self._high_watermark = 0
+        self._last_job_seconds = 0.0
+        self._max_job_seconds = 0.0
+
+    # ---------- producer side ----------
+
+    def submit(self, key: str | None, job: Callable[[], None]) -> None:
+        """
+        Queue ``job`` to run on the writer thread. Jobs sharing a ``key``
+        coalesce; ``key=None`` means the job must always run (e.g. appends).
+        """
+        if key is None:
+            key = f"#{next(self._seq)}"
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("persistence queue is closed")
+            self._submitted += 1
+
+            if key in self._pending:
+                self._pending[key] = job
+                self._coalesced += 1
+                return
+
+            if len(self._pending) >= self.max_pending:
+                if len(self._pending) == self.max_pending:
+                    logger.warning(
+                        "Persistence queue over its bound (%d pending); writer is behind",
+                        len(self._pending),
+                    )
+                self._overflows += 1
+
+            self._pending[key] = job
+            self._high_watermark = max(self._high_watermark, len(self._pending))
+            self._cond.notify_all()
+
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="persistence-writer", daemon=True
+                )
+                self._thread.start()
+
+    # ---------- writer thread ----------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                _, job = self._pending.popitem(last=False)
+                self._inflight += 1
+                self._cond.notify_all()
+
+            started = time.perf_counter()
+            failed = False
+            try:
+                job()
+            except Exception:
+                failed = True
+                logger.exception("Persistence job failed")
+            elapsed = time.perf_counter() - started
+
+            with self._cond:
+                self._inflight -= 1
+                self._completed += 1
+                self._failed += failed
+                self._last_job_seconds = elapsed
+                self._max_job_seconds = max(self._max_job_seconds, elapsed)
+                self._cond.notify_all()
+
+    # ---------- flushing ----------
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every queued job has run. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._inflight, timeout=timeout
+            )
+
+    async def drain(self, timeout: float | None = None) -> bool:
+        return await asyncio.to_thread(self.flush, timeout)
+
+    def close(self, timeout: float | None = None) -> None:
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "inflight": self._inflight,
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+                "completed": self._completed,
+                "failed": self._failed,
+                "overflows": self._overflows,
+                "high_watermark": self._high_watermark,
+                "last_job_seconds": round(self._last_job_seconds, 6),
+                "max_job_seconds": round(self._max_job_seconds, 6),
+            }
+
+
+# ======================================================
+#   Process-wide queue + helpers
+# ======================================================
+
+_queue: WriteBehindQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> WriteBehindQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = WriteBehindQueue()
+                atexit.register(_queue.flush, 10.0)
+    return _queue
+
+
+def submit(key: str | None, job: Callable[[], None]) -> None:
+    get_queue().submit(key, job)
+
+
+def write_json(
+    path: str, data: Any, compact: bool = COMPACT_JSON, fast: bool = FAST_JSON
+) -> None:
+    """
+    Coalesced, atomic background write of ``data`` to ``path``. The payload
+    is serialized right away so later mutations of ``data`` cannot leak
+    into the queued snapshot.
+    """
+    payload = dumps(data, compact=compact, fast=fast)
+    submit(f"file:{os.path.abspath(path)}", lambda: atomic_write_bytes(path, payload))
+
+
+def run(job: Callable[[], T]) -> "asyncio.Future[T]":
+    """
+    Queue ``job`` now, to run on the writer thread after everything already
+    queued; await the returned future for its result. For reads that must
+    see this process's pending writes.
+    """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future = loop.create_future()
+
+    def _resolve(result: Any, error: BaseException | None) -> None:
+        if future.done():
+            return  # the caller gave up waiting
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _job() -> None:
+        try:
+            result, error = job(), None
+        except Exception as e:
+            result, error = None, e
+        loop.call_soon_threadsafe(_resolve, result, error)
+
+    submit(None, _job)
+    return future
+
+
+async def drain() -> None:
+    """Wait for pending writes; registered as a JobContext shutdown callback."""
+    queue = get_queue()
+    await queue.drain()
+    logger.info("Persistence queue drained: %s", queue.stats())
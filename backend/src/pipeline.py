@@ -0,0 +1,79 @@
+import importlib
+import logging
+import time
+
+logger = logging.getLogger("pipeline")
+
+# ======================================================
+#   Voice pipeline plugins, imported on first use
+# ======================================================
+#
+# Importing the plugin packages costs about as much as livekit.agents
+# itself, so the agent modules don't import them at module level. Tools, tests
+# and the load generator can import an agent module without paying for
+# them. Each factory below imports its plugin the first time it's called.
+#
+# The worker's main process still needs every plugin registered before
+# cli.run_app: download-files finds plugins through that registry, the
+# turn detector's inference runner must be registered in the main process,
+# and on Linux the registered packages are preloaded into the forkserver,
+# so job processes start with them already imported. Every __main__ calls
+# register_plugins() for that.
+
+PLUGIN_MODULES = (
+    "livekit.plugins.silero",
+    "livekit.plugins.deepgram",
+    "livekit.plugins.google",
+    "livekit.plugins.murf",
+    "livekit.plugins.noise_cancellation",
+    "livekit.plugins.turn_detector.multilingual",
+)
+
+STT_MODEL = "nova-3"
+LLM_MODEL = "gemini-2.5-flash"
+
+
+def register_plugins() -> float:
+    """Import (and so register) every plugin on the main thread; returns seconds taken."""
+    started = time.perf_counter()
+    for name in PLUGIN_MODULES:
+        importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+    logger.debug("Registered plugins in %.0f ms", elapsed * 1000)
+    return elapsed
+
+
+def load_vad():
+    from livekit.plugins import silero
+
+    return silero.VAD.load()
+
+
+def stt():
+    from livekit.plugins import deepgram
+
+    return deepgram.STT(model=STT_MODEL)
+
+
+def llm():
+    from livekit.plugins import google
+
+    return google.LLM(model=LLM_MODEL)
+
+
+def tts(**kwargs):
+    from livekit.plugins import murf
+
+    return murf.TTS(**kwargs)
+
+
+def turn_detection():
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+    return MultilingualModel()
+
+
+def noise_cancellation():
+    from livekit.plugins import noise_cancellation
+
+    return noise_cancellation.BVC()
@@ -0,0 +1,116 @@
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+
+import persistence
+
+logger = logging.getLogger("progress_counters")
+
+# ======================================================
+#   Batched progress counters
+# ======================================================
+#
+# Tools only bump in-memory counters. Accumulated deltas are merged into
+# the shared progress file on a timer and at session end: the merge takes
+# an exclusive lock on "<file>.lock", re-reads the file, adds the deltas
+# and writes it back atomically, so concurrent workers never lose each
+# other's increments.
+
+DEFAULT_FLUSH_INTERVAL = float(os.getenv("TUTOR_PROGRESS_FLUSH_SECONDS", "5"))
+
+
+class ProgressCounters:
+    def __init__(
+        self,
+        path: str,
+        modes: tuple[str, ...] = ("learn", "quiz", "teach_back"),
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.path = path
+        self.modes = modes
+        self.flush_interval = flush_interval
+        self._deltas: dict[str, Counter[str]] = {}
+        self._last_updated: dict[str, str] = {}
+        # every bump of this session, never reset by flushes (for the UI)
+        self._session: dict[str, Counter[str]] = {}
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    # ---------- hot path ----------
+
+    def bump(self, concept_id: str, mode: str) -> None:
+        if mode not in self.modes:
+            return
+        with self._lock:
+            self._deltas.setdefault(concept_id, Counter())[mode] += 1
+            self._session.setdefault(concept_id, Counter())[mode] += 1
+            self._last_updated[concept_id] = datetime.now().isoformat()
+
+    def pending(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {cid: dict(c) for cid, c in self._deltas.items()}
+
+    def session_counts(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {cid: dict(c) for cid, c in self._session.items()}
+
+    # ---------- merging ----------
+
+    def flush_now(self) -> None:
+        """Merge accumulated deltas into the progress file (blocking)."""
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+            stamps, self._last_updated = self._last_updated, {}
+        if not deltas:
+            return
+
+        try:
+            with persistence.file_lock(self.path):
+                data = persistence.read_json(self.path, {})
+                for concept_id, counts in deltas.items():
+                    entry = data.setdefault(
+                        concept_id,
+                        {**{m: 0 for m in self.modes}, "last_updated": None},
+                    )
+                    for mode, n in counts.items():
+                        entry[mode] = entry.get(mode, 0) + n
+                    entry["last_updated"] = stamps.get(concept_id, entry.get("last_updated"))
+                persistence.atomic_write_json(self.path, data)
+        except Exception:
+            # put the deltas back so the next flush retries them
+            with self._lock:
+                for concept_id, counts in deltas.items():
+                    self._deltas.setdefault(concept_id, Counter()).update(counts)
+                for concept_id, stamp in stamps.items():
+                    self._last_updated.setdefault(concept_id, stamp)
+            raise
+
+    def schedule_flush(self) -> None:
+        # flush_now reads the deltas when it runs, so coalescing this
+        # instance's flushes is safe; another session's must stay separate
+        # (the queued job keeps self alive, so its id can't be reused)
+        persistence.submit(f"progress:{os.path.abspath(self.path)}:{id(self)}", self.flush_now)
+
+    # ---------- session lifecycle ----------
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._deltas:
+                self.schedule_flush()
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self.schedule_flush()
+        await persistence.get_queue().drain()
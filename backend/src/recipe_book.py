@@ -0,0 +1,118 @@
+import logging
+import math
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Generic, Iterable, TypeVar
+
+from catalog_index import CatalogIndex, CatalogLike, normalize_name, strip_filler
+from trigram_index import DEFAULT_THRESHOLD, TrigramIndex
+
+logger = logging.getLogger("recipe_book")
+
+# ======================================================
+#   Recipes precompiled to catalog items
+# ======================================================
+#
+# Built once per worker (in prewarm) after the catalog index. Every
+# ingredient is resolved to a catalog item up front; anything that does not
+# resolve is logged at load time and left out, instead of being searched
+# again on every request. Dish lookup accepts spoken variants: each dish is
+# also registered under forms with runs of words shortened to initials
+# ("pb sandwich", "gc sandwich"), and a trigram index over all forms
+# catches misheard names.
+#
+# Recipe file entries are either a plain list of catalog names (one each,
+# serves 1) or
+#
+#   {"serves": 2, "aliases": ["pbj"],
+#    "ingredients": [{"item": "Whole Wheat Bread", "quantity": 1}, ...]}
+
+T = TypeVar("T", bound=CatalogLike)
+
+
+@dataclass
+class Recipe(Generic[T]):
+    name: str
+    serves: int = 1
+    lines: list[tuple[T, int]] = field(default_factory=list)
+    unresolved: list[str] = field(default_factory=list)
+
+    def scaled(self, servings: int | None = None) -> list[tuple[T, int]]:
+        """Ingredient lines for ``servings`` people, rounded up to whole units."""
+        if not servings or servings == self.serves:
+            return self.lines
+        return [(item, math.ceil(qty * servings / self.serves)) for item, qty in self.lines]
+
+
+def _initial_forms(words: list[str]) -> set[str]:
+    """"peanut butter sandwich" -> {"pb sandwich", "peanut bs", "pbs"}."""
+    forms = set()
+    for start, end in combinations(range(len(words) + 1), 2):
+        if end - start < 2:
+            continue
+        initials = "".join(w[0] for w in words[start:end])
+        forms.add(" ".join([*words[:start], initials, *words[end:]]))
+    return forms
+
+
+def _ingredients(spec) -> tuple[int, list[str], list[tuple[str, int]]]:
+    if isinstance(spec, list):
+        return 1, [], [(name, 1) for name in spec]
+    ingredients = []
+    for entry in spec.get("ingredients", []):
+        if isinstance(entry, str):
+            ingredients.append((entry, 1))
+        else:
+            ingredients.append((entry["item"], int(entry.get("quantity", 1))))
+    return max(1, int(spec.get("serves", 1))), list(spec.get("aliases", [])), ingredients
+
+
+class RecipeBook(Generic[T]):
+    def __init__(self, raw: dict, catalog: CatalogIndex[T]):
+        self.recipes: dict[str, Recipe[T]] = {}
+        self._forms: dict[str, str] = {}
+        keys: list[tuple[str, str]] = []
+
+        for dish, spec in raw.items():
+            serves, aliases, ingredients = _ingredients(spec)
+            recipe = Recipe[T](name=dish, serves=serves)
+            for ingredient, quantity in ingredients:
+                item = catalog.match(ingredient, partial=False)
+                if item is None:
+                    recipe.unresolved.append(ingredient)
+                else:
+                    recipe.lines.append((item, quantity))
+            if recipe.unresolved:
+                logger.warning(
+                    "Recipe %r: no catalog item for %s", dish, ", ".join(recipe.unresolved)
+                )
+
+            key = normalize_name(dish)
+            self.recipes[key] = recipe
+            for name in (dish, *aliases):
+                form = normalize_name(name)
+                keys.append((form, key))
+                for short in (form, *_initial_forms(form.split())):
+                    self._forms.setdefault(short, key)
+
+        self._fuzzy = TrigramIndex(keys)
+        logger.info(
+            "Compiled %d recipes (%d with unresolved ingredients)",
+            len(self.recipes),
+            sum(1 for r in self.recipes.values() if r.unresolved),
+        )
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    def __iter__(self) -> Iterable[Recipe[T]]:
+        return iter(self.recipes.values())
+
+    def find(self, dish: str, threshold: float = DEFAULT_THRESHOLD) -> Recipe[T] | None:
+        """Exact name, alias or initials form first, then trigram similarity."""
+        for form in (normalize_name(dish), strip_filler(dish)):
+            key = self._forms.get(form)
+            if key is not None:
+                return self.recipes[key]
+        hits = self._fuzzy.search(strip_filler(dish), k=1, threshold=threshold)
+        return self.recipes[hits[0][0]] if hits else None
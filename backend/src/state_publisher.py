@@ -0,0 +1,182 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger("state_publisher")
+
+# ======================================================
+#   Session state over the LiveKit data channel
+# ======================================================
+#
+# The UI used to poll API routes that re-read the agents' JSON files. Now
+# each entrypoint snapshots the session state it wants shown (cart, lead,
+# progress, check-in) after every batch of tool calls, and this publisher
+# sends only what changed, as a JSON merge patch (RFC 7386), on the
+# "agent-state" topic:
+#
+#   {"type": "patch", "seq": 7, "patch": {"cart": {"lines": {"4": null}, ...}}}
+#   {"type": "full",  "seq": 7, "state": {"cart": {...}}}
+#
+# Patches are coalesced and sent at most max_rate times per second; a full
+# snapshot goes to every participant that joins (and once after connect),
+# so a late or reconnecting UI never needs to read the files.
+
+TOPIC = "agent-state"
+DEFAULT_MAX_RATE = float(os.getenv("STATE_PUBLISH_MAX_HZ", "4"))
+
+_DELETE = None
+
+
+def diff(old: Any, new: Any) -> Any:
+    """Merge patch turning ``old`` into ``new``; ``...`` when they are equal."""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return ... if old == new else new
+    patch = {}
+    for key in old.keys() - new.keys():
+        patch[key] = _DELETE
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+            continue
+        sub = diff(old[key], value)
+        if sub is not ...:
+            patch[key] = sub
+    return patch or ...
+
+
+def combine(first: dict, second: dict) -> dict:
+    """One merge patch with the effect of applying ``first`` then ``second``."""
+    out = dict(first)
+    for key, value in second.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = combine(out[key], value)
+        else:
+            out[key] = value
+    return out
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class StatePublisher:
+    def __init__(
+        self,
+        send: Callable[[bytes, list[str]], Awaitable[None]],
+        max_rate: float = DEFAULT_MAX_RATE,
+    ):
+        self._send = send
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self._state: dict[str, Any] = {}
+        self._pending: dict[str, Any] = {}
+        self._seq = 0
+        self._last_sent = float("-inf")
+        self._task: asyncio.Task | None = None
+        self._background: set[asyncio.Task] = set()
+
+        self.published = 0
+        self.coalesced = 0
+        self.bytes_sent = 0
+
+    @classmethod
+    def for_room(cls, room, topic: str = TOPIC, **kwargs) -> "StatePublisher":
+        async def send(payload: bytes, destinations: list[str]) -> None:
+            if not room.isconnected():
+                return  # the full snapshot after connect / on join catches up
+            await room.local_participant.publish_data(
+                payload, reliable=True, destination_identities=destinations, topic=topic
+            )
+
+        publisher = cls(send, **kwargs)
+
+        @room.on("participant_connected")
+        def _on_participant(participant) -> None:
+            task = asyncio.create_task(publisher.publish_full([participant.identity]))
+            publisher._background.add(task)
+            task.add_done_callback(publisher._background.discard)
+
+        return publisher
+
+    # ---------- updates ----------
+
+    def seed(self, state: dict[str, Any]) -> None:
+        """Set the baseline without publishing (sent later as a full snapshot)."""
+        self._state = copy.deepcopy(state)
+
+    def update(self, state: dict[str, Any]) -> None:
+        """Record the latest value of each section; queue what changed."""
+        patch = {}
+        for section, value in state.items():
+            sub = diff(self._state.get(section), value)
+            if sub is not ...:
+                patch[section] = sub
+                self._state[section] = copy.deepcopy(value)
+        if not patch:
+            return
+        if self._pending:
+            self.coalesced += 1
+        self._pending = combine(self._pending, patch)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        wait = self._last_sent + self.min_interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        patch, self._pending = self._pending, {}
+        self._seq += 1
+        await self._publish({"type": "patch", "seq": self._seq, "patch": patch})
+
+    async def publish_full(self, destinations: list[str] | None = None) -> None:
+        await self._publish(
+            {"type": "full", "seq": self._seq, "state": self._state}, destinations or []
+        )
+
+    async def _publish(self, message: dict, destinations: list[str] | None = None) -> None:
+        payload = _encode(message)
+        self._last_sent = time.monotonic()
+        try:
+            await self._send(payload, destinations or [])
+        except Exception:
+            logger.exception("Failed to publish session state")
+            return
+        self.published += 1
+        self.bytes_sent += len(payload)
+
+    async def aclose(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        await self.flush()
+        logger.info(
+            "State publisher: %d messages, %d bytes, %d coalesced updates",
+            self.published,
+            self.bytes_sent,
+            self.coalesced,
+        )
+
+
+def bind_session(
+    session, room, snapshot: Callable[[], dict[str, Any]], **kwargs
+) -> StatePublisher:
+    """
+    Publish ``snapshot()`` after every batch of tool calls in ``session``.
+    Call ``await publisher.publish_full()`` once the room is connected and
+    register ``publisher.aclose`` as a shutdown callback.
+    """
+    publisher = StatePublisher.for_room(room, **kwargs)
+    publisher.seed(snapshot())
+
+    @session.on("function_tools_executed")
+    def _on_tools_executed(_ev) -> None:
+        publisher.update(snapshot())
+
+    return publisher
@@ -0,0 +1,135 @@
+import functools
+import inspect
+import logging
+import os
+import time
+import types
+from typing import Any, Callable
+
+from livekit.agents.llm import StopResponse
+
+from latency_metrics import PROCESS_STATS, TOOL_PREFIX, LatencyStats
+
+logger = logging.getLogger("tool_metrics")
+
+# ======================================================
+#   Function tool timing
+# ======================================================
+#
+# timed_tools() wraps every tool an Agent registers. Each call records its
+# wall time under stage "tool:<name>", plus counters, in the same stats that
+# latency_metrics snapshots and serves:
+#
+#   tool_errors          calls that raised (StopResponse is not an error)
+#   tool_slow            calls over TOOL_LATENCY_BUDGET_MS (also logged)
+#   tool_io_read_bytes   process read/write bytes while the call ran, from
+#   tool_io_write_bytes  /proc/self/io (Linux only). Other coroutines and the
+#                        write-behind thread can add to these, so they are
+#                        an upper bound for one call.
+#
+# The wrapper keeps the tool's name, description and signature (via
+# functools.wraps), so the LLM sees the same schema as before.
+
+TOOL_LATENCY_BUDGET_MS = float(os.getenv("TOOL_LATENCY_BUDGET_MS", "200"))
+
+_PROC_IO = "/proc/self/io"
+
+
+def _io_bytes() -> tuple[int, int] | None:
+    """(rchar, wchar) for this process, or None where unavailable."""
+    try:
+        with open(_PROC_IO, "rb") as f:
+            fields = dict(line.split(b":", 1) for line in f.read().splitlines())
+        return int(fields[b"rchar"]), int(fields[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _tool_name(tool: Callable) -> str:
+    info = getattr(tool, "__livekit_tool_info", None) or getattr(
+        tool, "__livekit_raw_tool_info", None
+    )
+    return getattr(info, "name", None) or tool.__name__
+
+
+def timed_tool(
+    agent: str,
+    tool: Callable,
+    budget_ms: float = TOOL_LATENCY_BUDGET_MS,
+    stats: LatencyStats = PROCESS_STATS,
+) -> Callable:
+    name = _tool_name(tool)
+    stage = TOOL_PREFIX + name
+
+    def _done(started: float, io_before: tuple[int, int] | None, failed: bool) -> None:
+        elapsed = time.perf_counter() - started
+        stats.record(agent, stage, elapsed)
+        if failed:
+            stats.add(agent, "tool_errors", name)
+        if io_before is not None:
+            io_after = _io_bytes()
+            if io_after is not None:
+                stats.add(agent, "tool_io_read_bytes", name, io_after[0] - io_before[0])
+                stats.add(agent, "tool_io_write_bytes", name, io_after[1] - io_before[1])
+        if elapsed * 1000 > budget_ms:
+            stats.add(agent, "tool_slow", name)
+            logger.warning(
+                "Tool %s (%s) took %.0f ms, budget %.0f ms", name, agent, elapsed * 1000, budget_ms
+            )
+
+    if inspect.iscoroutinefunction(tool):
+
+        @functools.wraps(tool)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            io_before, started, failed = _io_bytes(), time.perf_counter(), False
+            try:
+                return await tool(*args, **kwargs)
+            except StopResponse:
+                raise
+            except Exception:
+                failed = True
+                raise
+            finally:
+                _done(started, io_before, failed)
+
+    else:
+
+        @functools.wraps(tool)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            io_before, started, failed = _io_bytes(), time.perf_counter(), False
+            try:
+                return tool(*args, **kwargs)
+            except StopResponse:
+                raise
+            except Exception:
+                failed = True
+                raise
+            finally:
+                _done(started, io_before, failed)
+
+    return wrapper
+
+
+def timed_tools(agent: str, tools: list[Callable], **kwargs: Any) -> list[Callable]:
+    """Wrap each of an Agent's tools; use as ``tools=timed_tools("food", [...])``."""
+    return [timed_tool(agent, tool, **kwargs) for tool in tools]
+
+
+# code objects of the two wrappers above, shared by every wrapped tool
+_WRAPPER_CODES = {
+    c
+    for c in timed_tool.__code__.co_consts
+    if isinstance(c, types.CodeType) and c.co_name == "wrapper"
+}
+
+
+def active_tool(frame: types.FrameType | None) -> tuple[str, str] | None:
+    """(agent, tool) of the innermost timed tool on ``frame``'s stack, if any."""
+    while frame is not None:
+        if frame.f_code in _WRAPPER_CODES:
+            done = frame.f_locals.get("_done")
+            if done is not None:
+                nonlocals = inspect.getclosurevars(done).nonlocals
+                return nonlocals["agent"], nonlocals["name"]
+        frame = frame.f_back
+    return None
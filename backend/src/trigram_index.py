@@ -0,0 +1,90 @@
+import heapq
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Hashable, Iterable
+
+# ======================================================
+#   Character-trigram fuzzy matching
+# ======================================================
+#
+# STT regularly mangles product names ("penut butter", "margarita pizza").
+# Every key is cut into pg_trgm style trigrams (each word padded as
+# "  word ", words with digits skipped), and a query is scored against the
+# keys sharing at least one trigram with Dice similarity
+# 2|A∩B| / (|A|+|B|). Several keys may point at the same ref (an item
+# name plus its tags); a ref scores its best key.
+#
+# Trigrams shared by a large share of keys ("  s", " pa") are skipped while
+# collecting candidates (if every trigram is common, only the three rarest
+# are used); the best CANDIDATES keys by shared trigrams are then scored
+# exactly.
+
+DEFAULT_THRESHOLD = float(os.getenv("CATALOG_FUZZY_THRESHOLD", "0.5"))
+
+CANDIDATES = 64
+MIN_COMMON_DF = 256  # a trigram is "common" above max(this, 1% of keys)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def trigrams(text: str) -> frozenset[str]:
+    grams = set()
+    for word in _WORD_RE.findall(text.lower()):
+        if not word.isalpha():
+            continue  # pack sizes like "500g" / "1l" are never spoken that way
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return 2 * len(ta & tb) / (len(ta) + len(tb))
+
+
+class TrigramIndex:
+    def __init__(self, keys: Iterable[tuple[str, Hashable]]):
+        self._refs: list[Hashable] = []
+        self._texts: list[str] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for text, ref in keys:
+            grams = trigrams(text)
+            if not grams:
+                continue
+            key_id = len(self._refs)
+            self._refs.append(ref)
+            self._texts.append(text)
+            for gram in grams:
+                self._postings[gram].append(key_id)
+        self._max_df = max(MIN_COMMON_DF, len(self._refs) // 100)
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def search(
+        self, query: str, k: int = 3, threshold: float = DEFAULT_THRESHOLD
+    ) -> list[tuple[Hashable, float]]:
+        """Up to ``k`` refs with similarity >= ``threshold``, best first."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        rare = [p for p in postings if len(p) <= self._max_df]
+        if not rare:
+            rare = sorted(postings, key=len)[:3]
+        shared: Counter[int] = Counter()
+        for p in rare:
+            shared.update(p)
+
+        best: dict[Hashable, float] = {}
+        for key_id, _ in shared.most_common(CANDIDATES):
+            key_grams = trigrams(self._texts[key_id])
+            score = 2 * len(grams & key_grams) / (len(grams) + len(key_grams))
+            ref = self._refs[key_id]
+            if score >= threshold and score > best.get(ref, 0.0):
+                best[ref] = score
+        return heapq.nlargest(k, best.items(), key=lambda kv: kv[1])
@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Iterable
+
+from livekit import rtc
+from livekit.agents import Agent, ModelSettings
+
+import persistence
+
+logger = logging.getLogger("tts_cache")
+
+# ======================================================
+#   Pre-synthesized phrase cache
+# ======================================================
+#
+# Many tool results are fixed strings the LLM reads back word for word
+# ("Your cart is currently empty."). Each agent lists them; prewarm loads
+# their audio from disk and synthesizes any that are missing in the
+# background. When a reply starts with one of them, tts_node() plays the
+# stored audio at once and hands only the rest of the reply (if any) to the
+# TTS.
+#
+# Entries are keyed by (voice, style, text) and stored one per file under
+# TTS_CACHE_DIR: a JSON header line, then raw 16-bit PCM. File mtime is
+# the LRU clock: playback touches it, and writes evict the least
+# recently used files once the directory is over TTS_CACHE_MAX_MB. Files
+# are shared by every job process on the host; none of them holds an
+# index, so there is nothing to keep in sync.
+#
+# While the start of a reply could still become a cached phrase, its text
+# is held back from the TTS. Phrases are one short sentence, so on a miss
+# that delays synthesis by a few tokens at most.
+
+TTS_CACHE = os.getenv("TTS_CACHE", "1").lower() not in ("0", "false", "no")
+CACHE_DIR = os.getenv(
+    "TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tts_cache")
+)
+MAX_BYTES = int(float(os.getenv("TTS_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+SUFFIX = ".phrase"
+FRAME_MS = 20
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.replace("’", "'").split())
+
+
+def phrase_key(voice: str, style: str, text: str) -> str:
+    return hashlib.sha1(f"{voice}\0{style}\0{normalize(text)}".encode()).hexdigest()
+
+
+def voice_of(tts) -> tuple[str, str] | None:
+    """(voice, style) of a Murf-style TTS, or None if it has no such options."""
+    opts = getattr(tts, "_opts", None)
+    voice = getattr(opts, "voice", None)
+    if not voice:
+        return None
+    return voice, getattr(opts, "style", None) or ""
+
+
+@dataclass
+class CachedPhrase:
+    text: str
+    path: str
+    pcm: bytes
+    sample_rate: int
+    num_channels: int
+
+    def frames(self) -> Iterable[rtc.AudioFrame]:
+        samples = self.sample_rate * FRAME_MS // 1000
+        step = samples * self.num_channels * 2
+        for start in range(0, len(self.pcm), step):
+            chunk = self.pcm[start : start + step]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (2 * self.num_channels),
+            )
+
+
+class PhraseCache:
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # (voice, style) -> normalized text -> phrase; only what this process loaded
+        self._loaded: dict[tuple[str, str], dict[str, CachedPhrase]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, voice: str, style: str, text: str) -> str:
+        return os.path.join(self.directory, phrase_key(voice, style, text) + SUFFIX)
+
+    # ---------- disk ----------
+
+    def _read(self, path: str) -> CachedPhrase | None:
+        try:
+            with open(path, "rb") as f:
+                header, _, pcm = f.read().partition(b"\n")
+            meta = json.loads(header)
+        except (OSError, ValueError):
+            return None
+        return CachedPhrase(meta["text"], path, pcm, meta["sample_rate"], meta["num_channels"])
+
+    def put(
+        self, voice: str, style: str, text: str, pcm: bytes, sample_rate: int, num_channels: int
+    ) -> CachedPhrase:
+        """Store synthesized audio on disk and serve it from this process."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(voice, style, text)
+        header = json.dumps(
+            {
+                "voice": voice,
+                "style": style,
+                "text": normalize(text),
+                "sample_rate": sample_rate,
+                "num_channels": num_channels,
+            }
+        ).encode()
+        persistence.atomic_write_bytes(path, header + b"\n" + pcm)
+        phrase = CachedPhrase(normalize(text), path, pcm, sample_rate, num_channels)
+        with self._lock:
+            self._loaded.setdefault((voice, style), {})[phrase.text] = phrase
+        self.evict()
+        return phrase
+
+    def evict(self) -> int:
+        """Delete least recently used files until the directory fits; returns how many."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    # ---------- lookups ----------
+
+    def load(self, voice: str, style: str, texts: Iterable[str]) -> list[str]:
+        """Load ``texts`` from disk for serving; returns the ones not cached yet."""
+        missing = []
+        for text in texts:
+            phrase = self._read(self._path(voice, style, text))
+            if phrase is None:
+                missing.append(text)
+                continue
+            with self._lock:
+                self._loaded.setdefault((voice, style), {})[phrase.text] = phrase
+        return missing
+
+    def phrases(self, voice: str, style: str) -> dict[str, CachedPhrase]:
+        with self._lock:
+            return dict(self._loaded.get((voice, style), {}))
+
+    def touch(self, phrase: CachedPhrase) -> None:
+        def _touch() -> None:
+            try:
+                os.utime(phrase.path)
+            except FileNotFoundError:
+                pass
+
+        persistence.submit(f"touch:{phrase.path}", _touch)
+
+
+# every agent in this process serves from here
+PHRASES = PhraseCache()
+
+
+# ---------------------------------------------------------
+# Prewarm
+# ---------------------------------------------------------
+
+async def synthesize_missing(
+    voice: str, style: str, texts: list[str], cache: PhraseCache | None = None
+) -> int:
+    """Synthesize ``texts`` with the Murf TTS and store them; returns how many were stored."""
+    import aiohttp
+
+    import pipeline
+
+    cache = cache or PHRASES
+    stored = 0
+    async with aiohttp.ClientSession() as http:
+        tts = pipeline.tts(voice=voice, style=style, http_session=http)
+        for text in texts:
+            try:
+                frame = await tts.synthesize(text).collect()
+            except Exception:
+                logger.exception("Could not pre-synthesize %r", text)
+                continue
+            cache.put(voice, style, text, bytes(frame.data), frame.sample_rate, frame.num_channels)
+            stored += 1
+    return stored
+
+
+def prewarm(voice: str, style: str, texts: Iterable[str], cache: PhraseCache | None = None) -> None:
+    """
+    Load an agent's fixed phrases for serving and synthesize the missing
+    ones on a background thread, so prewarm doesn't wait on the network.
+    """
+    if not TTS_CACHE:
+        return
+    cache = cache or PHRASES
+    missing = cache.load(voice, style, texts)
+    if not missing:
+        return
+    if not os.getenv("MURF_API_KEY"):
+        logger.info("%d phrases not cached and MURF_API_KEY unset; skipping", len(missing))
+        return
+
+    def _run() -> None:
+        stored = asyncio.run(synthesize_missing(voice, style, missing, cache))
+        logger.info("Pre-synthesized %d/%d phrases for %s/%s", stored, len(missing), voice, style)
+
+    threading.Thread(target=_run, name="tts-cache-prewarm", daemon=True).start()
+
+
+# ---------------------------------------------------------
+# Serving
+# ---------------------------------------------------------
+
+def _match(text: str, phrases: dict[str, CachedPhrase]) -> tuple[bool, CachedPhrase | None]:
+    """
+    (still_possible, hit) for the reply text so far: whether more text could
+    still complete a phrase, and the phrase the text already starts with.
+    """
+    so_far = normalize(text)
+    possible, hit = False, None
+    for key, phrase in phrases.items():
+        if key.startswith(so_far):
+            possible = True
+        if so_far.startswith(key) and (len(so_far) == len(key) or so_far[len(key)] == " "):
+            hit = phrase
+    return possible, hit
+
+
+def _rest(text: str, phrase: CachedPhrase) -> str:
+    """``text`` after the leading ``phrase``, whitespace as it came."""
+    words = (re.escape(word).replace("'", "['’]") for word in phrase.text.split())
+    pattern = r"\s*" + r"\s+".join(words)
+    m = re.match(pattern, text)
+    return text[m.end() :] if m else ""
+
+
+async def _replay(first: str, rest: AsyncIterator[str]) -> AsyncIterator[str]:
+    if first:
+        yield first
+    async for chunk in rest:
+        yield chunk
+
+
+async def tts_node(
+    agent: Agent,
+    text: AsyncIterable[str],
+    model_settings: ModelSettings,
+    cache: PhraseCache | None = None,
+) -> AsyncIterator[rtc.AudioFrame]:
+    """
+    Agent.tts_node that plays a cached opening phrase immediately; use as
+
+        def tts_node(self, text, model_settings):
+            return tts_cache.tts_node(self, text, model_settings)
+    """
+    key = voice_of(agent.session.tts) if TTS_CACHE else None
+    phrases = (cache or PHRASES).phrases(*key) if key else {}
+    if not phrases:
+        async for frame in Agent.default.tts_node(agent, text, model_settings):
+            yield frame
+        return
+
+    it = text.__aiter__()
+    held, hit, ended = "", None, True
+    async for chunk in it:
+        held += chunk
+        possible, hit = _match(held, phrases)
+        if not possible:
+            ended = False
+            break
+    else:
+        _, hit = _match(held, phrases)
+
+    if hit is not None:
+        (cache or PHRASES).touch(hit)
+        for frame in hit.frames():
+            yield frame
+        held = _rest(held, hit)
+        if ended and not held.strip():
+            return
+
+    async for frame in Agent.default.tts_node(agent, _replay(held, it), model_settings):
+        yield frame
@@ -0,0 +1,275 @@
+import argparse
+import json
+import logging
+import os
+from typing import Iterator
+
+import persistence
+
+logger = logging.getLogger("wellness_journal")
+
+# ======================================================
+#   Append-only JSONL journal
+# ======================================================
+#
+# One check-in per line. Appends are a single write() on an O_APPEND
+# descriptor followed by fsync, so the cost of saving a check-in does not
+# grow with the size of the history.
+#
+# Reads of recent history seek from the end of the file, and a small
+# "<journal>.last" sidecar remembers where the newest record lives so the
+# common "what did I say last time" lookup is a single pread.
+
+TAIL_BLOCK_SIZE = 8192
+
+
+def _encode(entry: dict) -> bytes:
+    return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class WellnessJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.pointer_path = path + ".last"
+
+    def append(self, entry: dict) -> int:
+        """Append one entry as a single line and fsync it. Returns the new file size."""
+        line = _encode(entry)
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            # a crash mid-append can leave a torn last line without its
+            # newline; start on a fresh line so only that record is lost
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                line = b"\n" + line
+            os.write(fd, line)
+            os.fsync(fd)
+            end = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+        record_len = len(line.lstrip(b"\n"))
+        self._write_pointer(end - record_len, record_len, end)
+        return end
+
+    # ---------- last-entry pointer ----------
+
+    def _write_pointer(self, offset: int, length: int, size: int) -> None:
+        # only a hint: it is validated against the journal size on read,
+        # so it is swapped in atomically but not fsynced
+        tmp_path = f"{self.pointer_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"offset": offset, "length": length, "size": size}, f)
+        os.replace(tmp_path, self.pointer_path)
+
+    def _clear_pointer(self) -> None:
+        try:
+            os.unlink(self.pointer_path)
+        except FileNotFoundError:
+            pass
+
+    def _read_pointed_entry(self) -> dict | None:
+        try:
+            with open(self.pointer_path, "r", encoding="utf-8") as f:
+                pointer = json.load(f)
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size != pointer["size"]:
+                    return None  # journal moved on (another writer / compaction)
+                f.seek(pointer["offset"])
+                raw = f.read(pointer["length"])
+            if not raw.endswith(b"\n"):
+                return None
+            return json.loads(raw)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    # ---------- reads ----------
+
+    def last_entry(self) -> dict | None:
+        entry = self._read_pointed_entry()
+        if entry is not None:
+            return entry
+        last = self.last_entries(1)
+        return last[0] if last else None
+
+    def last_entries(self, n: int, block_size: int = TAIL_BLOCK_SIZE) -> list[dict]:
+        """
+        Return the newest ``n`` entries (oldest-first) by reading the journal
+        backwards in blocks; cost depends on ``n``, not on the history size.
+        """
+        if n <= 0 or not os.path.exists(self.path):
+            return []
+        if n == 1:
+            entry = self._read_pointed_entry()
+            if entry is not None:
+                return [entry]
+
+        found: list[dict] = []
+        with open(self.path, "rb") as f:
+            pos = os.fstat(f.fileno()).st_size
+            tail = b""  # bytes of a line that straddles the block boundary
+            while pos > 0 and len(found) < n:
+                step = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step) + tail
+                lines = chunk.split(b"\n")
+                # the first piece may be a partial line unless we hit the start
+                tail = lines.pop(0) if pos > 0 else b""
+                for raw in reversed(lines):
+                    if len(found) >= n:
+                        break
+                    entry = self._parse_line(raw)
+                    if entry is not None:
+                        found.append(entry)
+
+        found.reverse()
+        return found
+
+    def _parse_line(self, raw: bytes) -> dict | None:
+        raw = raw.strip()
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning("Skipping malformed line in %s", self.path)
+            return None
+
+    def iter_entries(self) -> Iterator[dict]:
+        """Lazily yield entries oldest-first, skipping malformed lines."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for lineno, raw in enumerate(f, start=1):
+                raw = raw.strip()
+                if not raw:
+                    continue
+                try:
+                    yield json.loads(raw)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed line %d in %s", lineno, self.path)
+
+    def migrate_legacy(self, legacy_path: str) -> int:
+        """
+        One-shot import of the old pretty-printed JSON array file.
+
+        The journal is only created if it does not exist yet, and the legacy
+        file is renamed to ``<name>.migrated`` afterwards, so running this
+        on every startup is safe. A legacy file that can't be read is
+        quarantined (see persistence.quarantine) and nothing is migrated.
+        Returns the number of migrated entries.
+        """
+        if not os.path.exists(legacy_path) or os.path.exists(self.path):
+            return 0
+
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            try:
+                persistence.quarantine(legacy_path)
+            except OSError:
+                logger.exception("Could not read or quarantine %s", legacy_path)
+            return 0
+        if isinstance(data, dict):
+            data = [data]
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for entry in data:
+                f.write(_encode(entry))
+            f.flush()
+            os.fsync(f.fileno())
+
+        try:
+            # link() refuses to overwrite, so a concurrent migrator (or an
+            # append that already created the journal) always wins
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            return 0
+        finally:
+            os.unlink(tmp_path)
+        self._clear_pointer()
+
+        try:
+            os.replace(legacy_path, legacy_path + ".migrated")
+        except FileNotFoundError:
+            pass
+
+        logger.info("Migrated %d entries from %s to %s", len(data), legacy_path, self.path)
+        return len(data)
+
+    def compact(self, keep_last: int | None = None) -> tuple[int, int]:
+        """
+        Rewrite the journal without malformed lines, optionally keeping only
+        the newest ``keep_last`` entries. Returns (kept, dropped).
+        """
+        if not os.path.exists(self.path):
+            return 0, 0
+
+        total = 0
+        entries = []
+        with open(self.path, "rb") as f:
+            for raw in f:
+                raw = raw.strip()
+                if not raw:
+                    continue
+                total += 1
+                try:
+                    json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                entries.append(raw + b"\n")
+
+        if keep_last is not None:
+            entries = entries[-keep_last:] if keep_last > 0 else []
+
+        persistence.atomic_write_bytes(self.path, b"".join(entries))
+        self._clear_pointer()
+
+        return len(entries), total - len(entries)
+
+
+# ======================================================
+#   CLI: migrate / compact
+# ======================================================
+
+WELLNESS_FOLDER = os.path.join(os.path.dirname(__file__), "..", "wellness")
+USERS_FOLDER = os.path.join(WELLNESS_FOLDER, "users")
+DEFAULT_LEGACY = os.path.join(WELLNESS_FOLDER, "wellness_log.json")
+
+
+def main(argv: list[str] | None = None) -> None:
+    from wellness_store import DEFAULT_USER_ID, partition_name  # imports this module
+
+    parser = argparse.ArgumentParser(description="Wellness journal maintenance")
+    parser.add_argument(
+        "--user", default=DEFAULT_USER_ID, help="participant identity whose journal to use"
+    )
+    parser.add_argument("--journal", help="journal file path (overrides --user)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="import the legacy JSON array log")
+    migrate.add_argument("--legacy", default=DEFAULT_LEGACY)
+
+    compact = sub.add_parser("compact", help="drop malformed lines / old entries")
+    compact.add_argument("--keep-last", type=int, default=None)
+
+    args = parser.parse_args(argv)
+    path = args.journal or os.path.join(USERS_FOLDER, partition_name(args.user))
+    journal = WellnessJournal(path)
+
+    if args.command == "migrate":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        count = journal.migrate_legacy(args.legacy)
+        print(f"migrated {count} entries")
+    else:
+        if not os.path.exists(path):
+            parser.error(f"no journal at {path}")
+        kept, dropped = journal.compact(keep_last=args.keep_last)
+        print(f"kept {kept} entries, dropped {dropped}")
+
+
+if __name__ == "__main__":
+    main()
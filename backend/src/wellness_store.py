@@ -0,0 +1,229 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+
+import persistence
+from wellness_journal import WellnessJournal
+from wellness_trends import WellnessTrends
+
+logger = logging.getLogger("wellness_store")
+
+# ======================================================
+#   Per-user partitioned wellness store
+# ======================================================
+#
+# Every participant identity gets its own journal file under
+# wellness/users/, so sessions never contend on one shared log and
+# read_past only ever sees the caller's own history.
+#
+# The worker keeps the most recent entries of recently active users in an
+# LRU, bounded both by number of users and by (approximate) bytes. Appends
+# update that cache immediately and hand the journal/trends write to the
+# write-behind persistence queue. A cold user's history is read on the
+# writer thread, behind their queued appends, so an evicted user never
+# loses an entry that has not reached the disk yet.
+#
+# Each user's WellnessTrends is kept in memory too, once first asked for.
+# That load (sidecar read, or a rebuild from the journal) runs on the
+# writer thread, behind the user's queued appends; from then on append()
+# updates the aggregates in place and the writer only saves a snapshot.
+
+DEFAULT_USER_ID = "default"
+
+DEFAULT_MAX_USERS = int(os.getenv("WELLNESS_CACHE_MAX_USERS", "1024"))
+DEFAULT_MAX_BYTES = int(os.getenv("WELLNESS_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+DEFAULT_RECENT_PER_USER = 7
+
+
+def partition_name(user_id: str) -> str:
+    """Filesystem-safe, collision-free file name for a participant identity."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", user_id)[:40] or "user"
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:12]
+    return f"{slug}-{digest}.jsonl"
+
+
+def _entry_size(entry: dict) -> int:
+    return len(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+
+
+class _History:
+    __slots__ = ("entries", "size")
+
+    def __init__(self, entries: list[dict], maxlen: int):
+        self.entries: deque[dict] = deque(entries, maxlen=maxlen)
+        self.size = sum(_entry_size(e) for e in self.entries)
+
+
+class WellnessStore:
+    def __init__(
+        self,
+        root: str,
+        max_users: int = DEFAULT_MAX_USERS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        recent_per_user: int = DEFAULT_RECENT_PER_USER,
+    ):
+        self.root = root
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.recent_per_user = recent_per_user
+        os.makedirs(root, exist_ok=True)
+
+        self._cache: OrderedDict[str, _History] = OrderedDict()
+        self._bytes = 0
+        self._trends: OrderedDict[str, WellnessTrends] = OrderedDict()
+        # user -> entries appended while their history / trends were loading
+        self._loading_history: dict[str, list[dict]] = {}
+        self._loading: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+
+    # ---------- partitions ----------
+
+    def partition_path(self, user_id: str) -> str:
+        return os.path.join(self.root, partition_name(user_id))
+
+    def journal(self, user_id: str) -> WellnessJournal:
+        return WellnessJournal(self.partition_path(user_id))
+
+    def trends_path(self, user_id: str) -> str:
+        return self.partition_path(user_id)[: -len(".jsonl")] + ".trends.json"
+
+    # ---------- writes ----------
+
+    def append(self, user_id: str, entry: dict) -> None:
+        with self._lock:
+            history = self._cache.get(user_id)
+            if history is not None:
+                self._add_to_history(user_id, history, entry)
+            elif user_id in self._loading_history:
+                self._loading_history[user_id].append(entry)
+
+            trends = self._trends.get(user_id)
+            snapshot = None
+            if trends is not None:
+                trends.add(entry)
+                snapshot = copy.deepcopy(trends.to_dict())
+            elif user_id in self._loading:
+                self._loading[user_id].append(entry)
+            # queued under the lock so a history or trends load can't slip in between
+            persistence.submit(None, lambda: self._persist(user_id, entry, snapshot))
+
+    def _persist(self, user_id: str, entry: dict, snapshot: dict | None) -> None:
+        journal = self.journal(user_id)
+        if snapshot is None:
+            # trends not resident: carry the sidecar forward from disk
+            trends = self._load_trends(user_id, journal)
+            trends.add(entry)
+            snapshot = trends.to_dict()
+        snapshot["journal_size"] = journal.append(entry)
+        persistence.atomic_write_json(self.trends_path(user_id), snapshot, compact=True)
+
+    def _add_to_history(self, user_id: str, history: _History, entry: dict) -> None:
+        if len(history.entries) == history.entries.maxlen:
+            dropped = _entry_size(history.entries[0])
+            history.size -= dropped
+            self._bytes -= dropped
+        history.entries.append(entry)
+        size = _entry_size(entry)
+        history.size += size
+        self._bytes += size
+        self._cache.move_to_end(user_id)
+        self._evict()
+
+    # ---------- reads ----------
+
+    async def last_entries(self, user_id: str, n: int = 1) -> list[dict]:
+        """The user's newest ``n`` entries, including appends still queued for disk."""
+        journal = self.journal(user_id)
+        if n > self.recent_per_user:
+            # deeper than the cache keeps: read behind the queued appends
+            return await persistence.run(lambda: journal.last_entries(n))
+
+        with self._lock:
+            history = self._cache.get(user_id)
+            if history is not None:
+                self._cache.move_to_end(user_id)
+                return list(history.entries)[-n:]
+            self._loading_history.setdefault(user_id, [])
+            loading = persistence.run(lambda: journal.last_entries(self.recent_per_user))
+
+        try:
+            entries = await loading
+        except Exception:
+            with self._lock:
+                self._loading_history.pop(user_id, None)
+            raise
+        with self._lock:
+            history = self._cache.get(user_id)
+            if history is None:  # not installed by a concurrent load
+                entries += self._loading_history.pop(user_id, [])
+                history = _History(entries, self.recent_per_user)
+                self._cache[user_id] = history
+                self._bytes += history.size
+            self._cache.move_to_end(user_id)
+            self._evict()
+            return list(history.entries)[-n:]
+
+    async def trends(self, user_id: str) -> WellnessTrends:
+        """The user's aggregates, including appends still queued for disk."""
+        with self._lock:
+            trends = self._trends.get(user_id)
+            if trends is not None:
+                self._trends.move_to_end(user_id)
+                return trends
+            self._loading.setdefault(user_id, [])
+            loading = persistence.run(lambda: self._load_trends(user_id, self.journal(user_id)))
+
+        try:
+            loaded = await loading
+        except Exception:
+            with self._lock:
+                self._loading.pop(user_id, None)
+            raise
+        with self._lock:
+            trends = self._trends.get(user_id)
+            if trends is None:  # not installed by a concurrent load
+                trends = loaded
+                for entry in self._loading.pop(user_id, []):
+                    trends.add(entry)
+                self._trends[user_id] = trends
+                while len(self._trends) > self.max_users:
+                    self._trends.popitem(last=False)
+            self._trends.move_to_end(user_id)
+            return trends
+
+    def _load_trends(self, user_id: str, journal: WellnessJournal) -> WellnessTrends:
+        try:
+            size = os.path.getsize(journal.path)
+        except FileNotFoundError:
+            size = 0
+
+        path = self.trends_path(user_id)
+        trends = WellnessTrends.load(path)
+        if trends is None or trends.journal_size != size:
+            # missing sidecar, or the log moved on without it: rebuild
+            trends = WellnessTrends.rebuild(journal.iter_entries())
+            trends.journal_size = size
+            if size:
+                trends.save(path)
+                logger.info("Rebuilt wellness trends for %s", user_id)
+        return trends
+
+    # ---------- cache ----------
+
+    def _evict(self) -> None:
+        # the most recently used user always stays resident
+        while len(self._cache) > 1 and (
+            len(self._cache) > self.max_users or self._bytes > self.max_bytes
+        ):
+            user_id, history = self._cache.popitem(last=False)
+            self._bytes -= history.size
+            logger.debug("Evicted wellness history for %s", user_id)
+
+    def cache_stats(self) -> dict:
+        with self._lock:
+            return {"users": len(self._cache), "bytes": self._bytes}
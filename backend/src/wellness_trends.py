@@ -0,0 +1,193 @@
+import json
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+import persistence
+
+# ======================================================
+#   Rolling mood / energy aggregates
+# ======================================================
+#
+# Updated in O(1) per check-in and persisted next to the user's journal as
+# a compact "<partition>.trends.json" sidecar. Only the last
+# WINDOW_DAYS daily buckets are kept, so answering "how was my week /
+# month" never touches the log. The sidecar remembers the journal size it
+# was computed from; if they disagree it is rebuilt from the log.
+
+WINDOW_DAYS = 30
+
+# free-text energy answers mapped onto a 1-3 scale for averaging
+_ENERGY_KEYWORDS = (
+    ("low", 1),
+    ("tired", 1),
+    ("drained", 1),
+    ("exhausted", 1),
+    ("high", 3),
+    ("energetic", 3),
+    ("great", 3),
+    ("medium", 2),
+    ("moderate", 2),
+    ("okay", 2),
+    ("ok", 2),
+    ("normal", 2),
+    ("fine", 2),
+)
+
+
+def energy_score(label: str) -> int | None:
+    label = label.lower()
+    for keyword, score in _ENERGY_KEYWORDS:
+        if keyword in label:
+            return score
+    return None
+
+
+def _normalize(label: str | None) -> str:
+    return (label or "").strip().lower()
+
+
+def _entry_date(entry: dict) -> date | None:
+    try:
+        return datetime.fromisoformat(entry["timestamp"]).date()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class WellnessTrends:
+    def __init__(self):
+        self.total = 0
+        self.mood_counts: Counter[str] = Counter()
+        self.energy_counts: Counter[str] = Counter()
+        self.last_date: date | None = None
+        self.streak = 0
+        self.longest_streak = 0
+        # iso date -> {"checkins", "mood", "energy", "energy_sum", "energy_n"}
+        self.days: dict[str, dict] = {}
+        self.journal_size: int | None = None
+
+    # ---------- incremental update ----------
+
+    def add(self, entry: dict) -> None:
+        day = _entry_date(entry)
+        if day is None:
+            return
+
+        mood = _normalize(entry.get("mood"))
+        energy = _normalize(entry.get("energy"))
+        self.total += 1
+        if mood:
+            self.mood_counts[mood] += 1
+        if energy:
+            self.energy_counts[energy] += 1
+
+        if self.last_date is None or day > self.last_date:
+            if self.last_date is not None and day - self.last_date == timedelta(days=1):
+                self.streak += 1
+            else:
+                self.streak = 1
+            self.last_date = day
+            self.longest_streak = max(self.longest_streak, self.streak)
+
+        bucket = self.days.setdefault(
+            day.isoformat(),
+            {"checkins": 0, "mood": {}, "energy": {}, "energy_sum": 0, "energy_n": 0},
+        )
+        bucket["checkins"] += 1
+        if mood:
+            bucket["mood"][mood] = bucket["mood"].get(mood, 0) + 1
+        if energy:
+            bucket["energy"][energy] = bucket["energy"].get(energy, 0) + 1
+            score = energy_score(energy)
+            if score is not None:
+                bucket["energy_sum"] += score
+                bucket["energy_n"] += 1
+
+        self._prune()
+
+    def _prune(self) -> None:
+        if self.last_date is None:
+            return
+        cutoff = (self.last_date - timedelta(days=WINDOW_DAYS - 1)).isoformat()
+        for key in [k for k in self.days if k < cutoff]:
+            del self.days[key]
+
+    @classmethod
+    def rebuild(cls, entries: Iterable[dict]) -> "WellnessTrends":
+        trends = cls()
+        for entry in entries:
+            trends.add(entry)
+        return trends
+
+    # ---------- queries ----------
+
+    def current_streak(self, today: date) -> int:
+        if self.last_date is None or (today - self.last_date).days > 1:
+            return 0
+        return self.streak
+
+    def window(self, days: int, today: date | None = None) -> dict:
+        """Summary of the last ``days`` days (at most WINDOW_DAYS)."""
+        today = today or date.today()
+        days = max(1, min(days, WINDOW_DAYS))
+        moods: Counter[str] = Counter()
+        energies: Counter[str] = Counter()
+        checkins = energy_sum = energy_n = 0
+
+        for offset in range(days):
+            bucket = self.days.get((today - timedelta(days=offset)).isoformat())
+            if not bucket:
+                continue
+            checkins += bucket["checkins"]
+            moods.update(bucket["mood"])
+            energies.update(bucket["energy"])
+            energy_sum += bucket["energy_sum"]
+            energy_n += bucket["energy_n"]
+
+        return {
+            "days": days,
+            "checkins": checkins,
+            "top_mood": moods.most_common(1)[0][0] if moods else None,
+            "top_energy": energies.most_common(1)[0][0] if energies else None,
+            "avg_energy": round(energy_sum / energy_n, 2) if energy_n else None,
+            "streak": self.current_streak(today),
+        }
+
+    # ---------- persistence ----------
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "mood_counts": dict(self.mood_counts),
+            "energy_counts": dict(self.energy_counts),
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "streak": self.streak,
+            "longest_streak": self.longest_streak,
+            "days": self.days,
+            "journal_size": self.journal_size,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WellnessTrends":
+        trends = cls()
+        trends.total = data.get("total", 0)
+        trends.mood_counts = Counter(data.get("mood_counts", {}))
+        trends.energy_counts = Counter(data.get("energy_counts", {}))
+        last_date = data.get("last_date")
+        trends.last_date = date.fromisoformat(last_date) if last_date else None
+        trends.streak = data.get("streak", 0)
+        trends.longest_streak = data.get("longest_streak", 0)
+        trends.days = data.get("days", {})
+        trends.journal_size = data.get("journal_size")
+        return trends
+
+    def save(self, path: str) -> None:
+        persistence.atomic_write_json(path, self.to_dict(), compact=True)
+
+    @classmethod
+    def load(cls, path: str) -> "WellnessTrends | None":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
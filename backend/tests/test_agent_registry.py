@@ -0,0 +1,31 @@
+import pytest
+
+import agent
+from agent import REGISTRY, pick_agent, resolve_name
+
+ALL = list(REGISTRY)
+
+
+def test_names_and_aliases_resolve() -> None:
+    assert resolve_name("Food") == "food"
+    assert resolve_name("day7") == "food"
+    assert resolve_name("agent_day4") == "tutor"
+    assert resolve_name("game-master") == "game_master"
+    assert resolve_name("unknown") is None
+
+
+def test_dispatch_order() -> None:
+    assert pick_agent('{"agent": "sdr"}', '{"agent": "fraud"}', "food-1", ALL) == "sdr"
+    assert pick_agent("", "fraud", "food-1", ALL) == "fraud"
+    assert pick_agent(None, '{"theme": "dark"}', "day7_abcd", ALL) == "food"
+    assert pick_agent(None, None, "voice_assistant_room_1", ALL) == agent.DEFAULT_AGENT
+
+
+def test_disabled_agent_falls_back(monkeypatch) -> None:
+    assert pick_agent("fraud", None, None, ["food", "sdr"]) == "food"
+
+    monkeypatch.setenv("AGENTS", "day7, sdr, food")
+    assert agent.enabled_agents() == ["food", "sdr"]
+    monkeypatch.setenv("AGENTS", "food,nope")
+    with pytest.raises(ValueError):
+        agent.enabled_agents()
@@ -0,0 +1,33 @@
+from agent_day7 import Cart, CatalogItem
+
+BREAD = CatalogItem(id=1, name="Whole Wheat Bread", category="Groceries", price=4000)
+BUTTER = CatalogItem(id=14, name="Butter 500g", category="Groceries", price=25000)
+
+
+def test_add_merges_lines_and_keeps_order():
+    cart = Cart()
+    cart.add(BUTTER)
+    cart.add(BREAD, 2)
+    cart.add(BUTTER, 3)
+
+    assert [ci.item.id for ci in cart] == [14, 1]
+    assert cart.get(14).quantity == 4
+    assert cart.total == 4 * 25000 + 2 * 4000
+
+
+def test_set_quantity_and_remove_update_total():
+    cart = Cart()
+    cart.add(BREAD, 2)
+    cart.add(BUTTER)
+
+    cart.set_quantity(1, 5)
+    assert cart.total == 5 * 4000 + 25000
+
+    assert cart.set_quantity(14, 0).item is BUTTER
+    assert 14 not in cart
+    assert cart.total == 5 * 4000
+
+    assert cart.remove(1).quantity == 5
+    assert cart.remove(1) is None
+    assert cart.set_quantity(99, 3) is None
+    assert len(cart) == 0 and cart.total == 0
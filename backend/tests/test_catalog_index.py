@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+
+from catalog_index import CatalogIndex
+
+
+@dataclass
+class Item:
+    id: int
+    name: str
+    category: str
+    tags: list[str] = field(default_factory=list)
+
+
+CATALOG = [
+    Item(1, "Peanut Butter 500g", "Groceries", ["spread", "peanut_butter"]),
+    Item(2, "Pasta 1kg", "Groceries", ["pasta"]),
+    Item(3, "Pasta Sauce Jar", "Groceries", ["sauce"]),
+    Item(4, "Butter 500g", "Groceries", ["butter", "dairy"]),
+    Item(5, "Chips (Large Pack)", "Snacks", ["chips", "snack"]),
+    Item(6, "Chocolate Cookies Pack", "Snacks", ["cookies", "snack"]),
+]
+
+
+def test_ranks_by_name_overlap_then_tags_then_coverage():
+    index = CatalogIndex(CATALOG)
+
+    assert index.best("pasta").id == 2
+    assert index.best("pasta sauce").id == 3
+    assert index.best("butter").id == 4
+    assert index.best("I want some peanut butter please").id == 1
+    assert index.best("cookie").id == 6
+
+
+def test_tag_fallback_and_misses():
+    index = CatalogIndex(CATALOG)
+
+    assert [item.id for item, _ in index.search("snack", k=5)] == [5, 6]
+    assert index.best("a bag of") is None
+    assert index.best("") is None
+
+
+def test_direct_lookups():
+    index = CatalogIndex(CATALOG)
+
+    assert index.get(3).name == "Pasta Sauce Jar"
+    assert [i.id for i in index.with_tag("SNACK")] == [5, 6]
+    assert [i.id for i in index.in_category("snacks")] == [5, 6]
+    assert index.best("chips (large pack)").id == 5
+
+
+def test_match_resolves_misheard_names():
+    index = CatalogIndex(CATALOG)
+
+    assert index.match("penut butter").id == 1
+    assert index.match("pasta sauce").id == 3
+    assert index.match("choclate cookis").id == 6
+    assert [i.id for i, _ in index.fuzzy("chps", k=2, threshold=0.3)][:1] == [5]
+    assert index.match("xylophone") is None
@@ -0,0 +1,51 @@
+from dataclasses import dataclass, field
+
+from agent_day5 import build_faq_index
+from faq_index import FAQIndex, stem, tokenize
+
+
+@dataclass
+class Entry:
+    id: str
+    question: str
+    answer: str
+    tags: list[str] = field(default_factory=list)
+
+
+FAQS = [
+    Entry("pricing", "How does pricing work?", "Pay as you go, billed monthly.", ["pricing", "cost", "plans"]),
+    Entry("free_tier", "Do you have a free tier?", "Yes, hobby projects are free.", ["free", "trial"]),
+    Entry("support", "What kind of support do you offer?", "Email and chat support.", ["support", "help"]),
+]
+
+
+def test_tokenize_drops_stop_words_and_stems() -> None:
+    assert tokenize("Is there a free trial for developers?") == ["free", "trial", "developer"]
+    assert stem("pricing") == stem("price")
+    assert stem("plans") == "plan"
+
+
+def test_bm25_ranks_the_relevant_entry_first() -> None:
+    index = FAQIndex(FAQS, min_score=0.0)
+    assert index.best("how much does it cost").id == "pricing"
+    assert index.best("any free plans for trial users").id == "free_tier"
+    assert index.best("can someone help me").id == "support"
+
+
+def test_weak_matches_are_not_found() -> None:
+    index = FAQIndex(FAQS, min_score=2.0)
+    assert index.best("is it a good day") is None
+    assert index.best("what is the weather") is None
+    assert FAQIndex([]).best("pricing") is None
+
+
+def test_shipped_faq_answers_common_questions() -> None:
+    index = build_faq_index()  # shared-data/day5_sdr_faq.json, default min_score
+    assert index.best("what does your company do").id == "what_is_product"
+    assert index.best("what do you do").id == "what_is_product"
+    assert index.best("who is this for").id == "who_is_it_for"
+    assert index.best("how much does it cost").id == "pricing"
+    assert index.best("do you have a free tier").id == "free_tier"
+    assert index.best("do you offer onboarding").id == "support"
+    assert index.best("what is the weather") is None
+    assert index.best("how are you") is None
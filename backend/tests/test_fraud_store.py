@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+
+import agent_day6
+import persistence
+from agent_day6 import FraudCase, FraudCaseStore
+
+
+def make_case(name: str, security_id: str) -> FraudCase:
+    return FraudCase(
+        userName=name,
+        securityIdentifier=security_id,
+        securityQuestion="Favourite colour?",
+        securityAnswer="blue",
+        cardEnding="1234",
+        transactionAmount="₹5,000",
+        transactionName="Test Store",
+        transactionTime="2025-11-26 10:00",
+        transactionLocation="Mumbai",
+        transactionCategory="e-commerce",
+        transactionSource="test.example",
+    )
+
+
+def test_lookup_is_normalized():
+    store = FraudCaseStore([make_case("John", "A1"), make_case("Sarah", "B2")])
+
+    assert store.get_by_username("  JOHN ").securityIdentifier == "A1"
+    assert store.get_by_security_id("B2").userName == "Sarah"
+    assert store.get_by_username("nobody") is None
+
+
+def test_first_case_wins_for_duplicate_names():
+    store = FraudCaseStore([make_case("John", "A1"), make_case("john", "A2")])
+
+    assert store.get_by_username("john").securityIdentifier == "A1"
+
+
+def test_update_keeps_indices_consistent():
+    first, second = make_case("John", "A1"), make_case("john", "A2")
+    store = FraudCaseStore([first, second])
+
+    store.update(first, userName="Johnny", status="confirmed_safe")
+    assert store.get_by_username("johnny") is first
+    assert store.get_by_username("john") is second
+    assert store.get_by_security_id("A1").status == "confirmed_safe"
+
+    store.update(first, userName="John")
+    assert store.get_by_username("john") is first
+    assert store.to_dicts()[0]["userName"] == "John"
+
+
+def test_updates_are_logged_and_compacted(tmp_path, monkeypatch):
+    case_file = tmp_path / "fraud_case.json"
+    cases = [make_case("John", "A1"), make_case("Sarah", "B2")]
+    case_file.write_text(json.dumps([c.to_dict() for c in cases]))
+    monkeypatch.setattr(agent_day6, "CASE_FILE", str(case_file))
+
+    store = FraudCaseStore(agent_day6.load_all_fraud_cases())
+    sarah = store.get_by_username("sarah")
+    store.update(sarah, status="confirmed_fraud")
+    agent_day6.save_case_update(store, sarah, {"status": "confirmed_fraud"})
+    persistence.get_queue().flush()
+
+    # the case file is untouched; the change is one line in the log
+    assert json.loads(case_file.read_text())[1]["status"] == "pending_review"
+    assert len(open(agent_day6.case_updates_file()).readlines()) == 1
+    assert agent_day6.load_all_fraud_cases()[1].status == "confirmed_fraud"
+
+    compacted = agent_day6.compact_fraud_cases()
+    assert compacted.get_by_security_id("B2").status == "confirmed_fraud"
+    assert json.loads(case_file.read_text())[1]["status"] == "confirmed_fraud"
+    assert not (tmp_path / "fraud_case.updates.jsonl").exists()
+
+
+async def test_marking_without_a_case_records_nothing():
+    ctx = SimpleNamespace(userdata=agent_day6.Userdata())
+    for tool in (
+        agent_day6.mark_transaction_safe,
+        agent_day6.mark_transaction_fraud,
+        agent_day6.mark_verification_failed,
+    ):
+        assert (await tool(ctx)).startswith(agent_day6.NO_CASE)
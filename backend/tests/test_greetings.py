@@ -0,0 +1,99 @@
+import asyncio
+import itertools
+import threading
+
+import pytest
+
+import agent_day8
+import greetings
+import harness
+import persistence
+import tts_cache
+
+PCM = bytes(2 * 2400)
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    """Phrase cache in tmp_path; greetings are numbered and synthesized as silence."""
+    monkeypatch.setattr(tts_cache, "PHRASES", tts_cache.PhraseCache(str(tmp_path)))
+    counter = itertools.count(1)
+
+    async def write(instructions):
+        return f"Welcome, traveller number {next(counter)}."
+
+    async def synthesize(voice, style, texts, cache=None):
+        for text in texts:
+            tts_cache.PHRASES.put(voice, style, text, PCM, 24000, 1)
+        return len(texts)
+
+    monkeypatch.setattr(tts_cache, "synthesize_missing", synthesize)
+
+    async def refresh(now=None):
+        added = await greetings.refresh(
+            "game_master", "v", "s", agent_day8.GameMasterAgent, write=write, now=now
+        )
+        persistence.get_queue().flush()
+        return added
+
+    refresh.written = counter  # next() gives the number of greetings written + 1
+    return refresh
+
+
+async def test_refresh_fills_the_pool_once(pool):
+    assert await pool() == greetings.GREETING_POOL_SIZE
+    assert await pool() == 0
+    assert len(greetings.load_pool("game_master")) == greetings.GREETING_POOL_SIZE
+
+
+def test_concurrent_refreshes_build_one_pool(pool):
+    # job processes prewarming at once; threads contend on the same flock
+    threads = [threading.Thread(target=asyncio.run, args=(pool(),)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(greetings.load_pool("game_master")) == greetings.GREETING_POOL_SIZE
+    assert next(pool.written) == greetings.GREETING_POOL_SIZE + 1  # no process paid twice
+
+
+async def test_stale_greeting_is_replaced_one_at_a_time(pool):
+    await pool(now=0)
+    assert await pool(now=greetings.GREETING_TTL_HOURS * 3600 + 1) == 1
+
+    texts = [e["text"] for e in greetings.load_pool("game_master")]
+    assert len(texts) == greetings.GREETING_POOL_SIZE
+    assert "Welcome, traveller number 1." not in texts
+
+
+async def test_pick_rotates_through_the_pool(pool):
+    await pool()
+    played = []
+    for _ in range(greetings.GREETING_POOL_SIZE):
+        phrase = greetings.pick("game_master", "v", "s")
+        tts_cache.PHRASES.touch(phrase)
+        persistence.get_queue().flush()
+        played.append(phrase.text)
+
+    assert len(set(played)) == greetings.GREETING_POOL_SIZE
+
+
+async def test_join_plays_pooled_greeting_into_chat_history(tmp_path):
+    scenario = harness.SCENARIOS["game_master"]
+    with harness.sandbox(str(tmp_path)):
+        tts_cache.PHRASES.put(agent_day8.TTS_VOICE, agent_day8.TTS_STYLE, "You wake in Eldoria.", PCM, 24000, 1)
+        greetings.save_pool("game_master", [{"text": "You wake in Eldoria.", "created": 0}])
+        persistence.get_queue().flush()
+        module, data = harness.prepare(scenario)
+
+        scripted = harness.ScriptedLLM(think_time=0.3)
+        results = await harness.run_session(
+            scenario, module, data, scripted, harness.FakeTTS(ttfb=0.3), greet=True
+        )
+
+    join = results[0]
+    assert join.user == harness.JOIN and join.first_audio_ms < 100
+    assert scripted.calls == len(scenario.turns)  # the LLM never wrote the greeting
+    history = [m.text_content for m in scripted.last_chat_ctx.items if m.type == "message"]
+    assert "You wake in Eldoria." in history
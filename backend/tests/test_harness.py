@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+import agent_day7
+import harness
+
+
+@pytest.mark.parametrize("name", list(harness.SCENARIOS))
+async def test_scenario_runs_offline(name, tmp_path):
+    scenario = harness.SCENARIOS[name]
+    results = await harness.run_scenarios([name], str(tmp_path), trace_allocations=False)
+
+    assert [r.user for r in results] == [t.user for t in scenario.turns]
+    expected = [[c.name for reply in t.replies for c in reply.tool_calls] for t in scenario.turns]
+    assert [r.tools for r in results] == expected
+    assert all(r.tool_errors == 0 for r in results)
+    assert all(r.first_audio_ms is not None for r in results)
+
+
+async def test_food_order_lands_in_sandbox(tmp_path):
+    real_orders = agent_day7.ORDERS_DIR
+    results = await harness.run_scenarios(["food"], str(tmp_path))
+
+    assert agent_day7.ORDERS_DIR == real_orders
+    assert results[-1].tools == ["place_order"]
+    assert results[-1].alloc_peak_kb is not None
+
+    with open(os.path.join(tmp_path, "orders", "order_000001.json"), encoding="utf-8") as f:
+        order = json.load(f)
+    assert order["customer_name"] == "Ravi"
+    names = " ".join(line["name"].lower() for line in order["items"])
+    assert "bread" in names and "milk" in names
+
+
+async def test_scripted_llm_falls_back_to_default_reply():
+    scripted = harness.ScriptedLLM(default_reply="Sure.")
+    scripted.script([harness.say("First.")])
+
+    assert scripted.next_reply().text == "First."
+    assert scripted.next_reply().text == "Sure."
+    assert scripted.calls == 2
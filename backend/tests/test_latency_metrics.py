@@ -0,0 +1,73 @@
+import json
+import os
+import random
+from types import SimpleNamespace
+
+from latency_metrics import (
+    Histogram,
+    LatencyStats,
+    TurnLatencyCollector,
+    collect_snapshots,
+    render_prometheus,
+)
+
+
+def test_histogram_quantiles_within_two_percent() -> None:
+    rng = random.Random(3)
+    samples = sorted(rng.lognormvariate(-1, 0.8) for _ in range(5000))
+    hist = Histogram()
+    for s in samples:
+        hist.record(s)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = samples[int(len(samples) * q) - 1]
+        assert abs(hist.quantile(q) - exact) / exact < 0.02
+    assert Histogram.from_dict(json.loads(json.dumps(hist.to_dict()))).quantile(0.99) == hist.quantile(0.99)
+
+
+def test_turn_latency_is_assembled_per_speech_id() -> None:
+    collector = TurnLatencyCollector("food", process_stats=None)
+    collector.collect(SimpleNamespace(type="eou_metrics", transcription_delay=0.2, end_of_utterance_delay=0.5, speech_id="s1"))
+    collector.collect(SimpleNamespace(type="llm_metrics", ttft=0.7, cancelled=False, speech_id="s1"))
+    collector.collect(SimpleNamespace(type="llm_metrics", ttft=0.9, cancelled=False, speech_id="s1"))
+    collector.collect(SimpleNamespace(type="tts_metrics", ttfb=0.3, cancelled=False, speech_id="s1"))
+
+    hists = dict(collector.session.items())
+    assert hists[("food", "llm_ttft")].count == 2
+    turn = hists[("food", "turn")]
+    assert turn.count == 1
+    assert abs(turn.quantile(0.5) - 1.5) < 0.02
+
+
+def test_snapshots_merge_and_dead_processes_are_compacted(tmp_path) -> None:
+    dead, alive = LatencyStats(), LatencyStats()
+    dead.record("sdr", "tts_ttfb", 0.2)
+    alive.record("sdr", "tts_ttfb", 0.4)
+    (tmp_path / "proc_999999999_1.json").write_text(json.dumps(dead.to_dict()))
+    (tmp_path / f"proc_{os.getpid()}_2.json").write_text(json.dumps(alive.to_dict()))
+
+    merged = collect_snapshots(str(tmp_path))
+    assert dict(merged.items())[("sdr", "tts_ttfb")].count == 2
+    assert not (tmp_path / "proc_999999999_1.json").exists()
+    assert dict(collect_snapshots(str(tmp_path)).items())[("sdr", "tts_ttfb")].count == 2
+
+    text = render_prometheus(merged)
+    assert 'agent_stage_latency_seconds_count{agent="sdr",stage="tts_ttfb"} 2' in text
+    assert 'quantile="0.99"' in text
+
+
+def test_snapshot_left_behind_by_a_crash_is_not_counted_twice(tmp_path) -> None:
+    dead = LatencyStats()
+    dead.record("sdr", "tts_ttfb", 0.2)
+    payload = json.dumps(dead.to_dict())
+    first, second = tmp_path / "proc_999999998_1.json", tmp_path / "proc_999999999_1.json"
+
+    first.write_text(payload)
+    collect_snapshots(str(tmp_path))
+    first.write_text(payload)  # as if the removal never happened
+    second.write_text(payload)
+
+    # folding the second process must not forget the first was folded
+    for _ in range(2):
+        assert dict(collect_snapshots(str(tmp_path)).items())[("sdr", "tts_ttfb")].count == 2
+    assert not first.exists() and not second.exists()
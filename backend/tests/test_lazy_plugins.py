@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def test_agent_modules_do_not_import_plugins() -> None:
+    code = (
+        "import sys\n"
+        "import agent, agent_day3, agent_day4, agent_day5, agent_day6, agent_day7, agent_day8\n"
+        "print(sorted(m for m in sys.modules if m.startswith('livekit.plugins')))\n"
+        "print(agent_day4.tutor_content.cache_info().currsize)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True
+    )
+    plugins, content_loaded = out.stdout.split()
+    assert plugins == "[]"
+    assert content_loaded == "0"
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from latency_metrics import LatencyStats, render_prometheus
+import loop_watchdog
+from loop_watchdog import LoopWatchdog
+from tool_metrics import timed_tool
+
+
+async def _run_blocking(dog: LoopWatchdog, blocker) -> None:
+    dog.start()
+    await asyncio.sleep(0.05)
+    await blocker()
+    await asyncio.sleep(0.05)
+    await dog.aclose()
+
+
+async def test_block_inside_tool_is_attributed_to_it():
+    stats = LatencyStats()
+
+    async def write_order():
+        time.sleep(0.15)  # synchronous I/O stand-in
+
+    dog = LoopWatchdog(threshold_ms=60, interval_ms=10, stats=stats)
+    await _run_blocking(dog, timed_tool("food", write_order, stats=stats))
+
+    assert dog.blocks == 1
+    assert dict(stats.counters())[("food", "loop_blocks", "write_order")] == 1
+    block = dict(stats.items())[("food", "loop_block")]
+    assert block.count == 1 and block.quantile(0.5) >= 0.12
+
+
+async def test_block_outside_tools_is_unattributed():
+    stats = LatencyStats()
+
+    async def scan():
+        time.sleep(0.15)
+
+    dog = LoopWatchdog(threshold_ms=60, interval_ms=10, stats=stats)
+    await _run_blocking(dog, scan)
+
+    assert dict(stats.counters())[("-", "loop_blocks", "-")] == 1
+    assert 'agent_loop_block_sites_total{agent="-",site=' in render_prometheus(stats)
+
+
+async def test_short_waits_are_lag_not_blocks():
+    stats = LatencyStats()
+
+    async def brief():
+        time.sleep(0.02)
+
+    dog = LoopWatchdog(threshold_ms=100, interval_ms=10, stats=stats)
+    await _run_blocking(dog, brief)
+
+    assert dog.blocks == 0
+    assert dict(stats.items())[("-", "loop_lag")].count > 0
+
+
+class _Ctx:
+    def __init__(self):
+        self.callbacks = []
+
+    def add_shutdown_callback(self, callback):
+        self.callbacks.append(callback)
+
+
+async def test_watchdog_outlives_all_but_the_last_session(monkeypatch):
+    monkeypatch.setattr(loop_watchdog, "LOOP_WATCHDOG", True)
+    first, second = _Ctx(), _Ctx()
+    dog = loop_watchdog.watch(first, stats=LatencyStats())
+    assert loop_watchdog.watch(second) is dog
+
+    await first.callbacks[0]()
+    assert dog._task is not None and not dog._task.done()
+
+    await second.callbacks[0]()
+    assert dog._task.done()
+    assert asyncio.get_running_loop() not in loop_watchdog._WATCHDOGS
@@ -0,0 +1,23 @@
+from decimal import Decimal
+
+from money import format_inr, number_words, rupees_to_paise, speak_inr, to_paise
+
+
+def test_conversion_is_exact():
+    assert to_paise(180) == 18000
+    assert to_paise(0.1) == 10
+    assert to_paise("19.995") == 2000
+    assert rupees_to_paise([40, 2.5, Decimal("3.33")]) == [4000, 250, 333]
+    assert sum(rupees_to_paise([0.1] * 1000)) == 10000
+
+
+def test_display_and_speech():
+    assert format_inr(18000) == "₹180"
+    assert format_inr(18050) == "₹180.50"
+    assert format_inr(25_000_000) == "₹2,50,000"
+
+    assert speak_inr(18000) == "one hundred eighty rupees"
+    assert speak_inr(100) == "one rupee"
+    assert speak_inr(18050) == "one hundred eighty rupees and fifty paise"
+    assert speak_inr(50) == "fifty paise"
+    assert number_words(12_34_567) == "twelve lakh thirty four thousand five hundred sixty seven"
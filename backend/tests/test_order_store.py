@@ -0,0 +1,49 @@
+import json
+import os
+
+from order_store import OrderStore
+
+
+def make_order(customer: str, total: int) -> dict:
+    return {
+        "timestamp": "2025-11-28T19:19:04",
+        "customer_name": customer,
+        "items": [],
+        "total_paise": total,
+    }
+
+
+def test_ids_are_unique_across_workers(tmp_path):
+    first, second = OrderStore(str(tmp_path)), OrderStore(str(tmp_path))
+
+    ids = [
+        first.save(make_order("Arpit", 100))["order_id"],
+        second.save(make_order("Riya", 200))["order_id"],
+        first.save(make_order("arpit ", 300))["order_id"],
+    ]
+
+    assert ids == [1, 2, 3]
+    assert sorted(f for f in os.listdir(tmp_path) if f.startswith("order_")) == [
+        "order_000001.json",
+        "order_000002.json",
+        "order_000003.json",
+    ]
+    with open(tmp_path / "day7_latest_order.json", encoding="utf-8") as f:
+        assert json.load(f)["order_id"] == 3
+
+
+def test_query_by_customer_and_id(tmp_path):
+    store = OrderStore(str(tmp_path))
+    store.save(make_order("Arpit", 100))
+    store.save(make_order("Riya", 200))
+    store.save(make_order("ARPIT", 300))
+
+    assert [e["id"] for e in store.for_customer("arpit")] == [3, 1]
+    assert [e["total_paise"] for e in store.for_customer("Arpit", limit=1)] == [300]
+    assert store.get(2)["customer_name"] == "Riya"
+    assert store.get(99) is None
+
+    # a fresh store (e.g. after a restart) rebuilds the same view from the index
+    reopened = OrderStore(str(tmp_path))
+    assert [e["id"] for e in reopened.for_customer("arpit")] == [3, 1]
+    assert reopened.save(make_order("Riya", 50))["order_id"] == 4
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+
+from persistence import (
+    WriteBehindQueue,
+    atomic_write_json,
+    dumps,
+    get_queue,
+    read_json,
+    write_json,
+)
+
+
+def test_jobs_run_in_order_and_coalesce() -> None:
+    queue = WriteBehindQueue()
+    gate = threading.Event()
+    ran: list[str] = []
+
+    queue.submit("gate", gate.wait)
+    queue.submit("a", lambda: ran.append("a1"))
+    queue.submit(None, lambda: ran.append("append"))
+    queue.submit("a", lambda: ran.append("a2"))
+    gate.set()
+
+    assert queue.flush(timeout=5)
+    assert ran == ["a2", "append"]
+    stats = queue.stats()
+    assert stats["coalesced"] == 1
+    assert stats["completed"] == 3
+    queue.close()
+
+
+def test_full_queue_never_blocks_the_caller() -> None:
+    queue = WriteBehindQueue(max_pending=1)
+    gate = threading.Event()
+    ran: list[str] = []
+    queue.submit("busy", gate.wait)
+    assert queue.flush(timeout=0.05) is False  # writer is blocked on the gate
+
+    started = time.perf_counter()
+    queue.submit("one", lambda: ran.append("one"))
+    queue.submit("two", lambda: ran.append("two"))  # over the bound: queued, counted
+    queue.submit("two", lambda: ran.append("two'"))  # still coalesces
+    assert time.perf_counter() - started < 0.05
+
+    gate.set()
+    assert queue.flush(timeout=5)
+    assert ran == ["one", "two'"]
+    assert queue.stats()["overflows"] == 1
+    queue.close()
+
+
+def test_failed_job_does_not_stop_writer() -> None:
+    queue = WriteBehindQueue()
+    ran: list[int] = []
+    queue.submit(None, lambda: 1 / 0)
+    queue.submit(None, lambda: ran.append(1))
+
+    assert queue.flush(timeout=5)
+    assert ran == [1]
+    assert queue.stats()["failed"] == 1
+    queue.close()
+
+
+def test_write_json_snapshots_payload(tmp_path) -> None:
+    path = tmp_path / "state.json"
+    data = {"count": 1}
+    write_json(str(path), data)
+    data["count"] = 2  # mutation after submit must not leak into the write
+
+    get_queue().flush()
+    assert json.loads(path.read_text()) == {"count": 1}
+
+
+def test_atomic_write_leaves_no_temp_files(tmp_path) -> None:
+    path = tmp_path / "progress.json"
+    atomic_write_json(str(path), {"loops": {"quiz": 1}})
+    atomic_write_json(str(path), {"loops": {"quiz": 2}}, compact=True)
+
+    assert path.read_text() == '{"loops":{"quiz":2}}'
+    assert [p.name for p in tmp_path.iterdir()] == ["progress.json"]
+
+
+def test_fast_and_stdlib_encoders_agree() -> None:
+    data = {"name": "Dosa ₹", "items": [1, 2.5, None]}
+    assert json.loads(dumps(data, compact=True, fast=True)) == data
+    assert json.loads(dumps(data, compact=False, fast=False)) == data
+
+
+def test_read_json_quarantines_corrupt_file(tmp_path) -> None:
+    path = tmp_path / "progress.json"
+    assert read_json(str(path), {}) == {}
+
+    path.write_text('{"loops": {"quiz"')
+    assert read_json(str(path), {}) == {}
+    assert not path.exists()
+    assert len(list(tmp_path.glob("progress.json.corrupt-*"))) == 1
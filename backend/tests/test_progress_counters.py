@@ -0,0 +1,69 @@
+import json
+import threading
+
+import persistence
+from progress_counters import ProgressCounters
+
+
+def test_bumps_stay_in_memory_until_flush(tmp_path) -> None:
+    path = tmp_path / "progress.json"
+    counters = ProgressCounters(str(path))
+    counters.bump("loops", "quiz")
+    counters.bump("loops", "quiz")
+    counters.bump("loops", "unknown_mode")
+
+    assert not path.exists()
+    assert counters.pending() == {"loops": {"quiz": 2}}
+
+    counters.flush_now()
+    data = json.loads(path.read_text())
+    assert data["loops"]["quiz"] == 2
+    assert data["loops"]["learn"] == 0
+    assert counters.pending() == {}
+
+
+def test_concurrent_workers_do_not_lose_increments(tmp_path) -> None:
+    path = str(tmp_path / "progress.json")
+    workers = [ProgressCounters(path) for _ in range(4)]
+
+    def run(counters: ProgressCounters) -> None:
+        for _ in range(25):
+            counters.bump("variables", "learn")
+            counters.flush_now()
+
+    threads = [threading.Thread(target=run, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert persistence.read_json(path, {})["variables"]["learn"] == 100
+
+
+def test_sessions_sharing_a_file_flush_separately(tmp_path) -> None:
+    path = str(tmp_path / "progress.json")
+    first, second = ProgressCounters(path), ProgressCounters(path)
+    gate = threading.Event()
+    queue = persistence.get_queue()
+    queue.submit(None, gate.wait)  # hold the writer so both flushes queue up
+
+    first.bump("loops", "learn")
+    first.schedule_flush()
+    second.bump("loops", "quiz")
+    second.schedule_flush()
+    gate.set()
+
+    assert queue.flush(timeout=5)
+    assert first.pending() == {} and second.pending() == {}
+    data = persistence.read_json(path, {})
+    assert (data["loops"]["learn"], data["loops"]["quiz"]) == (1, 1)
+
+
+async def test_aclose_flushes_pending_deltas(tmp_path) -> None:
+    path = tmp_path / "progress.json"
+    counters = ProgressCounters(str(path), flush_interval=3600)
+    counters.start()
+    counters.bump("loops", "teach_back")
+
+    await counters.aclose()
+    assert json.loads(path.read_text())["loops"]["teach_back"] == 1
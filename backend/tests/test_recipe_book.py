@@ -0,0 +1,51 @@
+from dataclasses import dataclass, field
+
+from catalog_index import CatalogIndex
+from recipe_book import RecipeBook
+
+
+@dataclass
+class Item:
+    id: int
+    name: str
+    category: str = "Groceries"
+    tags: list[str] = field(default_factory=list)
+
+
+CATALOG = CatalogIndex(
+    [Item(1, "Whole Wheat Bread"), Item(4, "Peanut Butter 500g"), Item(5, "Pasta 1kg")]
+)
+
+RAW = {
+    "peanut butter sandwich": {
+        "serves": 4,
+        "ingredients": [
+            {"item": "Whole Wheat Bread", "quantity": 1},
+            {"item": "Peanut Butter 500g", "quantity": 1},
+        ],
+    },
+    "pasta": ["Pasta 1kg", "Saffron Threads"],
+}
+
+
+def test_ingredients_resolved_at_load():
+    book = RecipeBook(RAW, CATALOG)
+
+    pasta = book.find("pasta")
+    assert [(item.id, qty) for item, qty in pasta.lines] == [(5, 1)]
+    assert pasta.unresolved == ["Saffron Threads"]
+
+
+def test_dish_lookup_accepts_initials_and_typos():
+    book = RecipeBook(RAW, CATALOG)
+
+    assert book.find("PB sandwich").name == "peanut butter sandwich"
+    assert book.find("peanut butter sandwhich").name == "peanut butter sandwich"
+    assert book.find("biryani") is None
+
+
+def test_servings_scale_and_round_up():
+    recipe = RecipeBook(RAW, CATALOG).find("peanut butter sandwich")
+
+    assert [qty for _, qty in recipe.scaled()] == [1, 1]
+    assert [qty for _, qty in recipe.scaled(6)] == [2, 2]
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from state_publisher import StatePublisher, combine, diff
+
+
+def test_diff_is_a_merge_patch() -> None:
+    old = {"lines": {"1": {"quantity": 1}, "2": {"quantity": 3}}, "total_paise": 500}
+    new = {"lines": {"1": {"quantity": 2}}, "total_paise": 400}
+
+    assert diff(old, old) is ...
+    assert diff(old, new) == {
+        "lines": {"1": {"quantity": 2}, "2": None},
+        "total_paise": 400,
+    }
+    assert combine({"lines": {"2": None}}, {"lines": {"3": {"quantity": 1}}}) == {
+        "lines": {"2": None, "3": {"quantity": 1}}
+    }
+
+
+def test_updates_are_coalesced_and_rate_limited() -> None:
+    sent: list[dict] = []
+
+    async def send(payload: bytes, destinations: list[str]) -> None:
+        sent.append(json.loads(payload))
+
+    async def scenario() -> StatePublisher:
+        publisher = StatePublisher(send, max_rate=20)
+        publisher.seed({"cart": {"total_paise": 0}})
+        await publisher.publish_full()
+
+        publisher.update({"cart": {"total_paise": 100}})
+        publisher.update({"cart": {"total_paise": 100}})  # unchanged
+        publisher.update({"cart": {"total_paise": 250, "last_order_id": 3}})
+        await asyncio.sleep(0.01)
+        assert len(sent) == 1  # still inside the 50 ms window after the snapshot
+        await asyncio.sleep(0.1)
+        await publisher.aclose()
+        return publisher
+
+    publisher = asyncio.run(scenario())
+
+    assert [m["type"] for m in sent] == ["full", "patch"]
+    assert sent[0]["state"] == {"cart": {"total_paise": 0}}
+    assert sent[1] == {
+        "type": "patch",
+        "seq": 1,
+        "patch": {"cart": {"total_paise": 250, "last_order_id": 3}},
+    }
+    assert publisher.coalesced == 1
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+from livekit.agents import function_tool
+from livekit.agents.llm.tool_context import get_function_info, is_function_tool
+
+from latency_metrics import LatencyStats, render_prometheus
+from tool_metrics import timed_tools
+
+
+@function_tool
+async def lookup(question: str) -> str:
+    """Answer a question."""
+    await asyncio.sleep(0.01)
+    if question == "boom":
+        raise RuntimeError("disk full")
+    return "ok"
+
+
+def test_timed_tool_keeps_schema_and_records_calls() -> None:
+    stats = LatencyStats()
+    (tool,) = timed_tools("sdr", [lookup], budget_ms=5, stats=stats)
+    assert is_function_tool(tool)
+    assert get_function_info(tool).name == "lookup"
+
+    assert asyncio.run(tool(question="pricing")) == "ok"
+    with pytest.raises(RuntimeError):
+        asyncio.run(tool(question="boom"))
+
+    hists = dict(stats.items())
+    assert hists[("sdr", "tool:lookup")].count == 2
+    counters = {key[1:]: n for key, n in stats.counters()}
+    assert counters[("tool_errors", "lookup")] == 1
+    assert counters[("tool_slow", "lookup")] == 2  # 10 ms sleep vs 5 ms budget
+
+    text = render_prometheus(stats)
+    assert 'agent_tool_latency_seconds_count{agent="sdr",tool="lookup"} 2' in text
+    assert 'agent_tool_errors_total{agent="sdr",tool="lookup"} 1' in text
@@ -0,0 +1,19 @@
+from trigram_index import TrigramIndex, similarity, trigrams
+
+
+def test_trigrams_skip_pack_sizes():
+    assert trigrams("Milk 1L") == trigrams("milk")
+    assert similarity("penut butter", "Peanut Butter 500g") > similarity("penut butter", "Butter 500g")
+
+
+def test_search_threshold_and_best_key_per_ref():
+    index = TrigramIndex(
+        [("Margherita Pizza", 1), ("pizza", 1), ("veg", 1), ("Veg Burger", 2), ("Milk", 3)]
+    )
+
+    hits = index.search("margarita pizza", k=3, threshold=0.5)
+    assert [ref for ref, _ in hits] == [1]
+    assert hits[0][1] == similarity("margarita pizza", "Margherita Pizza")
+
+    assert index.search("silk", threshold=0.5) == []
+    assert index.search("", threshold=0.0) == []
@@ -0,0 +1,86 @@
+import os
+from types import SimpleNamespace
+
+import agent_day7
+import harness
+import persistence
+import tts_cache
+from tts_cache import PhraseCache
+
+PCM = bytes(2 * 2400)  # 100 ms of silence at 24 kHz
+
+
+def test_put_then_load_from_another_process(tmp_path):
+    PhraseCache(str(tmp_path)).put("v", "s", "Your cart is  currently empty.", PCM, 24000, 1)
+
+    fresh = PhraseCache(str(tmp_path))
+    missing = fresh.load("v", "s", ["Your cart is currently empty.", "Not cached."])
+
+    assert missing == ["Not cached."]
+    phrase = fresh.phrases("v", "s")["Your cart is currently empty."]
+    assert phrase.pcm == PCM and phrase.sample_rate == 24000
+    assert sum(f.samples_per_channel for f in phrase.frames()) == 2400
+    assert fresh.phrases("v", "other") == {}
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = PhraseCache(str(tmp_path), max_bytes=2 * len(PCM) + 400)
+    old = cache.put("v", "s", "old", PCM, 24000, 1)
+    used = cache.put("v", "s", "used", PCM, 24000, 1)
+    os.utime(used.path, (1, 1))
+    os.utime(old.path, (2, 2))
+    cache.load("v", "s", ["used"])  # loading (e.g. at prewarm) is not a use
+    assert os.stat(used.path).st_mtime == 1
+    cache.touch(used)  # playing it is
+    persistence.get_queue().flush()
+
+    cache.put("v", "s", "new", PCM, 24000, 1)
+
+    assert not os.path.exists(old.path)
+    assert os.path.exists(used.path)
+    assert PhraseCache(str(tmp_path)).load("v", "s", ["old", "used", "new"]) == ["old"]
+
+
+def test_match_waits_for_prefix_and_finds_leading_phrase(tmp_path):
+    cache = PhraseCache(str(tmp_path))
+    cache.put("v", "s", "Your cart is empty, so there’s nothing to place as an order.", PCM, 24000, 1)
+    phrases = cache.phrases("v", "s")
+
+    assert tts_cache._match("Your cart", phrases) == (True, None)
+    assert tts_cache._match("Your card", phrases) == (False, None)
+    possible, hit = tts_cache._match(
+        "Your cart is empty, so there's nothing to place as an order. Add something?", phrases
+    )
+    assert not possible and hit is not None
+    assert tts_cache._rest("Your cart is empty, so there's nothing to place as an order. Add?", hit) == " Add?"
+
+
+async def _first_audio(tmp_path, reply: str, cached: str) -> harness.TurnResult:
+    scenario = harness.Scenario(
+        "food", "agent_day7", harness.SCENARIOS["food"].build, [harness.Turn("Hi.", [harness.say(reply)])]
+    )
+    fake_tts = harness.FakeTTS(ttfb=0.3)
+    fake_tts._opts = SimpleNamespace(voice=agent_day7.TTS_VOICE, style=agent_day7.TTS_STYLE)
+    with harness.sandbox(str(tmp_path)):
+        module, data = harness.prepare(scenario)
+        tts_cache.PHRASES.put(agent_day7.TTS_VOICE, agent_day7.TTS_STYLE, cached, PCM, 24000, 1)
+        [result] = await harness.run_session(scenario, module, data, fake_tts=fake_tts)
+    return result
+
+
+async def test_cached_phrase_skips_tts(tmp_path):
+    result = await _first_audio(tmp_path, "Your cart is currently empty.", "Your cart is currently empty.")
+    assert result.first_audio_ms < 150
+
+
+async def test_cached_opening_then_rest_from_tts(tmp_path):
+    result = await _first_audio(
+        tmp_path, "Your cart is currently empty. Shall I add milk?", "Your cart is currently empty."
+    )
+    assert result.first_audio_ms < 150
+    assert result.wall_ms >= 300  # the rest still went through the TTS
+
+
+async def test_uncached_reply_waits_for_tts(tmp_path):
+    result = await _first_audio(tmp_path, "Your basket is empty.", "Your cart is currently empty.")
+    assert result.first_audio_ms >= 300
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from wellness_journal import WellnessJournal, main
+
+
+def _entry(i: int) -> dict:
+    return {"timestamp": f"2025-11-{i + 1:02d}T09:00:00", "mood": f"mood {i}", "energy": "ok"}
+
+
+def test_append_and_stream(tmp_path) -> None:
+    journal = WellnessJournal(str(tmp_path / "log.jsonl"))
+    for i in range(3):
+        journal.append(_entry(i))
+
+    assert [e["mood"] for e in journal.iter_entries()] == ["mood 0", "mood 1", "mood 2"]
+    assert len((tmp_path / "log.jsonl").read_text().splitlines()) == 3
+
+
+def test_torn_line_is_isolated(tmp_path) -> None:
+    path = tmp_path / "log.jsonl"
+    journal = WellnessJournal(str(path))
+    journal.append(_entry(0))
+    with open(path, "ab") as f:
+        f.write(b'{"mood": "tor')  # crash mid-write
+    journal.append(_entry(1))
+
+    assert [e["mood"] for e in journal.iter_entries()] == ["mood 0", "mood 1"]
+    assert journal.compact() == (2, 1)
+    assert [e["mood"] for e in journal.iter_entries()] == ["mood 0", "mood 1"]
+
+
+def test_migrate_legacy_once(tmp_path) -> None:
+    legacy = tmp_path / "log.json"
+    legacy.write_text(json.dumps([_entry(0), _entry(1)], indent=4))
+    journal = WellnessJournal(str(tmp_path / "log.jsonl"))
+
+    assert journal.migrate_legacy(str(legacy)) == 2
+    assert not legacy.exists()
+    assert (tmp_path / "log.json.migrated").exists()
+    assert journal.migrate_legacy(str(legacy)) == 0
+    assert len(list(journal.iter_entries())) == 2
+
+
+def test_corrupt_legacy_file_is_quarantined(tmp_path) -> None:
+    legacy = tmp_path / "log.json"
+    legacy.write_text('[{"mood": "ha')
+    journal = WellnessJournal(str(tmp_path / "log.jsonl"))
+
+    assert journal.migrate_legacy(str(legacy)) == 0
+    assert not legacy.exists()
+    assert len(list(tmp_path.glob("log.json.corrupt-*"))) == 1
+    assert list(journal.iter_entries()) == []
+
+
+def test_cli_refuses_a_missing_journal(tmp_path) -> None:
+    with pytest.raises(SystemExit):
+        main(["--journal", str(tmp_path / "nope.jsonl"), "compact"])
+
+
+def test_cli_migrate_creates_the_users_folder(tmp_path) -> None:
+    legacy = tmp_path / "wellness_log.json"
+    legacy.write_text(json.dumps([_entry(0)]), encoding="utf-8")
+    journal = tmp_path / "users" / "default.jsonl"
+
+    main(["--journal", str(journal), "migrate", "--legacy", str(legacy)])
+
+    assert [e["mood"] for e in WellnessJournal(str(journal)).iter_entries()] == ["mood 0"]
+
+
+def test_compact_keep_last(tmp_path) -> None:
+    journal = WellnessJournal(str(tmp_path / "log.jsonl"))
+    for i in range(5):
+        journal.append(_entry(i))
+
+    assert journal.compact(keep_last=2) == (2, 3)
+    assert [e["mood"] for e in journal.iter_entries()] == ["mood 3", "mood 4"]
+
+
+def test_last_entries_reads_backwards_across_blocks(tmp_path) -> None:
+    journal = WellnessJournal(str(tmp_path / "log.jsonl"))
+    for i in range(50):
+        journal.append(_entry(i))
+
+    last = journal.last_entries(3, block_size=16)
+    assert [e["mood"] for e in last] == ["mood 47", "mood 48", "mood 49"]
+    assert len(journal.last_entries(100, block_size=16)) == 50
+
+
+def test_last_entry_pointer_is_validated(tmp_path) -> None:
+    path = tmp_path / "log.jsonl"
+    journal = WellnessJournal(str(path))
+    journal.append(_entry(0))
+    journal.append(_entry(1))
+    assert journal.last_entry()["mood"] == "mood 1"
+
+    # another writer appended without updating our pointer
+    with open(path, "ab") as f:
+        f.write(json.dumps(_entry(2)).encode() + b"\n")
+    assert journal.last_entry()["mood"] == "mood 2"
+
+    journal.compact(keep_last=1)
+    assert not (tmp_path / "log.jsonl.last").exists()
+    assert journal.last_entries(1)[0]["mood"] == "mood 2"
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+import persistence
+from wellness_store import WellnessStore, partition_name
+
+
+def _entry(mood: str) -> dict:
+    return {"timestamp": "2025-11-26T09:00:00", "mood": mood, "energy": "ok"}
+
+
+async def test_partitions_are_isolated(tmp_path) -> None:
+    store = WellnessStore(str(tmp_path))
+    store.append("alice", _entry("happy"))
+    store.append("bob", _entry("tired"))
+
+    assert (await store.last_entries("alice"))[0]["mood"] == "happy"
+    assert (await store.last_entries("bob"))[0]["mood"] == "tired"
+    assert await store.last_entries("carol") == []
+    assert partition_name("a/b") != partition_name("a_b")
+
+
+async def test_hot_history_tracks_appends(tmp_path) -> None:
+    store = WellnessStore(str(tmp_path), recent_per_user=2)
+    store.append("alice", _entry("one"))
+    assert [e["mood"] for e in await store.last_entries("alice", 2)] == ["one"]
+
+    store.append("alice", _entry("two"))
+    store.append("alice", _entry("three"))
+    assert [e["mood"] for e in await store.last_entries("alice", 2)] == ["two", "three"]
+    # deeper history bypasses the cache
+    assert len(await store.last_entries("alice", 3)) == 3
+
+
+async def test_cold_history_waits_for_queued_appends(tmp_path) -> None:
+    gate = threading.Event()
+    persistence.submit(None, gate.wait)  # hold the writer
+    WellnessStore(str(tmp_path)).append("alice", _entry("queued"))
+
+    # a store that never saw (or has evicted) the user still gets the entry
+    loading = asyncio.ensure_future(WellnessStore(str(tmp_path)).last_entries("alice"))
+    await asyncio.sleep(0.05)
+    assert not loading.done()
+    gate.set()
+    assert [e["mood"] for e in await loading] == ["queued"]
+
+
+async def test_eviction_by_count_and_bytes(tmp_path) -> None:
+    store = WellnessStore(str(tmp_path), max_users=2)
+    for user in ("a", "b", "c"):
+        store.append(user, _entry(user))
+        await store.last_entries(user)
+    assert store.cache_stats()["users"] == 2
+
+    store = WellnessStore(str(tmp_path), max_bytes=1)
+    await store.last_entries("a")
+    await store.last_entries("b")
+    assert store.cache_stats()["users"] == 1
+    assert (await store.last_entries("a"))[0]["mood"] == "a"
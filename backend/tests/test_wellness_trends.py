@@ -0,0 +1,74 @@
+import os
+from datetime import date
+
+import persistence
+from wellness_store import WellnessStore
+from wellness_trends import WellnessTrends
+
+
+def _entry(day: str, mood: str, energy: str) -> dict:
+    return {"timestamp": f"{day}T09:00:00", "mood": mood, "energy": energy}
+
+
+ENTRIES = [
+    _entry("2025-11-01", "calm", "high"),
+    _entry("2025-11-20", "sad", "low"),
+    _entry("2025-11-21", "Happy", "high"),
+    _entry("2025-11-22", "happy", "medium"),
+]
+
+
+def test_windows_and_streak() -> None:
+    trends = WellnessTrends.rebuild(ENTRIES)
+    today = date(2025, 11, 22)
+
+    week = trends.window(7, today=today)
+    assert week["checkins"] == 3
+    assert week["top_mood"] == "happy"
+    assert week["avg_energy"] == 2.0
+    assert week["streak"] == 3
+
+    assert trends.window(30, today=today)["checkins"] == 4
+    assert trends.window(7, today=date(2025, 12, 10))["streak"] == 0
+    assert trends.longest_streak == 3
+
+
+def test_round_trip_and_pruning() -> None:
+    trends = WellnessTrends.rebuild(ENTRIES + [_entry("2025-12-25", "ok", "ok")])
+    restored = WellnessTrends.from_dict(trends.to_dict())
+    assert "2025-11-01" not in restored.days
+    assert restored.total == 5
+    assert restored.window(30, today=date(2025, 12, 25)) == trends.window(30, today=date(2025, 12, 25))
+
+
+async def test_store_maintains_and_rebuilds_sidecar(tmp_path) -> None:
+    store = WellnessStore(str(tmp_path))
+    for entry in ENTRIES:
+        store.append("alice", entry)
+    persistence.get_queue().flush()
+
+    sidecar = store.trends_path("alice")
+    assert os.path.exists(sidecar)
+    assert (await WellnessStore(str(tmp_path)).trends("alice")).total == 4
+
+    os.unlink(sidecar)
+    assert (await WellnessStore(str(tmp_path)).trends("alice")).total == 4
+
+    # a write that bypassed the sidecar is picked up by the size check
+    store.journal("alice").append(_entry("2025-11-23", "happy", "high"))
+    trends = await WellnessStore(str(tmp_path)).trends("alice")
+    assert trends.window(7, today=date(2025, 11, 23))["streak"] == 4
+
+
+async def test_resident_trends_see_queued_appends(tmp_path) -> None:
+    store = WellnessStore(str(tmp_path))
+    store.append("alice", ENTRIES[0])
+    assert (await store.trends("alice")).total == 1
+
+    # answered from memory, before the writer gets to the append
+    store.append("alice", ENTRIES[1])
+    assert (await store.trends("alice")).total == 2
+
+    persistence.get_queue().flush()
+    assert WellnessTrends.load(store.trends_path("alice")).total == 2
+    assert (await WellnessStore(str(tmp_path)).trends("alice")).total == 2
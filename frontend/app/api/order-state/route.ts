@@ -7,7 +7,14 @@ export async function GET() {
     // backend/orders folder 
     const ordersDir = path.join(process.cwd(), "..", "backend", "orders");
 
-    // JSON files 
+    // The agent atomically swaps in a copy of the newest order, so a poll
+    // is a single small read
+    const latestPath = path.join(ordersDir, "day7_latest_order.json");
+    if (fs.existsSync(latestPath)) {
+      return NextResponse.json(JSON.parse(fs.readFileSync(latestPath, "utf8")));
+    }
+
+    // JSON files (orders written before the order store existed)
     const files = fs.readdirSync(ordersDir)
       .filter(f => f.endsWith(".json"))
       .sort()
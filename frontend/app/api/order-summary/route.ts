@@ -7,30 +7,39 @@ export async function GET() {
     // backend/orders folder
     const ordersDir = path.join(process.cwd(), "..", "backend", "orders");
 
-    // list JSON files
-    const files = fs.readdirSync(ordersDir)
-      .filter(f => f.endsWith(".json"))
-      .sort()      // earliest → latest
-      .reverse();  // latest becomes first
-
-    if (files.length === 0) {
-      return NextResponse.json({
-        hasOrder: false,
-        message: "No orders found yet.",
-      });
+    // The agent keeps a copy of the newest order here (swapped atomically)
+    let latest = path.join(ordersDir, "day7_latest_order.json");
+
+    if (!fs.existsSync(latest)) {
+      // list JSON files
+      const files = fs.readdirSync(ordersDir)
+        .filter(f => f.endsWith(".json"))
+        .sort()      // earliest → latest
+        .reverse();  // latest becomes first
+
+      if (files.length === 0) {
+        return NextResponse.json({
+          hasOrder: false,
+          message: "No orders found yet.",
+        });
+      }
+      latest = path.join(ordersDir, files[0]);
     }
 
     // Read latest order file
-    const latest = path.join(ordersDir, files[0]);
     const orderData = JSON.parse(fs.readFileSync(latest, "utf8"));
 
     // Build summary response
     const summary = {
       hasOrder: true,
-      orderId: orderData.orderId,
+      orderId: orderData.order_id ?? orderData.orderId,
       timestamp: orderData.timestamp,
       status: orderData.status || "received",
-      total: orderData.total || 0,
+      // day 7 orders store integer paise; older files have rupees in "total"
+      total:
+        orderData.total_paise != null
+          ? orderData.total_paise / 100
+          : orderData.total || 0,
       items: orderData.items || [],
     };
 
@@ -1,18 +1,69 @@
-import { NextResponse } from "next/server";
-import fs from "fs";
-import path from "path";
-
-export async function GET() {
-  try {
-    // Correct absolute path → points to backend/wellness/wellness_log.json
-    const logPath = path.join(process.cwd(), "..", "backend", "wellness", "wellness_log.json");
-
-    const file = fs.readFileSync(logPath, "utf8");
-    const data = JSON.parse(file);
-
-    // Return **last entry only**
-    return NextResponse.json(data[data.length - 1] || {});
-  } catch (e) {
-    return NextResponse.json({ error: "No log found" }, { status: 404 });
-  }
-}
+import { NextResponse } from "next/server";
+import crypto from "crypto";
+import fs from "fs";
+import path from "path";
+
+const TAIL_BYTES = 64 * 1024;
+
+// Mirrors partition_name() in backend/src/wellness_store.py
+function partitionName(identity: string) {
+  const slug = identity.replace(/[^A-Za-z0-9_-]+/g, "_").slice(0, 40) || "user";
+  const digest = crypto.createHash("sha1").update(identity, "utf8").digest("hex");
+  return `${slug}-${digest.slice(0, 12)}.jsonl`;
+}
+
+// Newest entry of the JSONL journal without reading the whole file:
+// try the ".last" pointer sidecar first, then scan the file tail.
+function readLastEntry(journalPath: string) {
+  const fd = fs.openSync(journalPath, "r");
+  try {
+    const size = fs.fstatSync(fd).size;
+
+    try {
+      const pointer = JSON.parse(fs.readFileSync(`${journalPath}.last`, "utf8"));
+      if (pointer.size === size) {
+        const buf = Buffer.alloc(pointer.length);
+        fs.readSync(fd, buf, 0, pointer.length, pointer.offset);
+        return JSON.parse(buf.toString("utf8"));
+      }
+    } catch {
+      // missing / stale pointer, fall back to the tail scan
+    }
+
+    const length = Math.min(size, TAIL_BYTES);
+    const buf = Buffer.alloc(length);
+    fs.readSync(fd, buf, 0, length, size - length);
+    const lines = buf.toString("utf8").trim().split("\n");
+    for (let i = lines.length - 1; i >= 0; i--) {
+      try {
+        return JSON.parse(lines[i]);
+      } catch {
+        // torn / partial line, try the previous one
+      }
+    }
+    return {};
+  } finally {
+    fs.closeSync(fd);
+  }
+}
+
+export async function GET(req: Request) {
+  try {
+    const wellnessDir = path.join(process.cwd(), "..", "backend", "wellness");
+    const identity = new URL(req.url).searchParams.get("identity") || "default";
+    const journalPath = path.join(wellnessDir, "users", partitionName(identity));
+
+    // Legacy shared array file, until the agent has migrated it
+    if (!fs.existsSync(journalPath) && identity === "default") {
+      const data = JSON.parse(
+        fs.readFileSync(path.join(wellnessDir, "wellness_log.json"), "utf8")
+      );
+      return NextResponse.json(data[data.length - 1] || {});
+    }
+
+    // Return **last entry only**
+    return NextResponse.json(readLastEntry(journalPath));
+  } catch (e) {
+    return NextResponse.json({ error: "No log found" }, { status: 404 });
+  }
+}
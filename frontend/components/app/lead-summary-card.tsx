@@ -1,6 +1,7 @@
 "use client";
 
 import React, { useEffect, useState } from "react";
+import { useAgentState } from "@/hooks/useAgentState";
 
 type LeadPayload = {
   timestamp: string;
@@ -17,8 +18,10 @@ type LeadPayload = {
 };
 
 export const LeadSummaryCard: React.FC = () => {
-  const [data, setData] = useState<LeadPayload | null>(null);
+  const [saved, setSaved] = useState<LeadPayload | null>(null);
   const [error, setError] = useState<string | null>(null);
+  // the lead being captured, pushed by the SDR agent after each answer
+  const live = useAgentState<LeadPayload>("lead");
 
   useEffect(() => {
     const fetchLead = async () => {
@@ -26,11 +29,11 @@ export const LeadSummaryCard: React.FC = () => {
         const res = await fetch("/api/lead-summary");
         if (!res.ok) {
           setError("No lead captured yet.");
-          setData(null);
+          setSaved(null);
           return;
         }
         const json = (await res.json()) as LeadPayload;
-        setData(json);
+        setSaved(json);
         setError(null);
       } catch {
         setError("Unable to load latest lead.");
@@ -38,11 +41,12 @@ export const LeadSummaryCard: React.FC = () => {
     };
 
     fetchLead();
-    const id = setInterval(fetchLead, 3000);
-    return () => clearInterval(id);
   }, []);
 
-  if (error) {
+  const started = live && Object.values(live.lead).some((value) => value);
+  const data = started ? live : saved;
+
+  if (error && !data) {
     return (
       <div className="mt-4 mx-auto max-w-2xl rounded-xl border bg-white/70 p-4 text-sm text-muted-foreground shadow-sm">
         {error}
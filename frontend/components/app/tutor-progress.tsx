@@ -1,6 +1,13 @@
 "use client";
 
 import React, { useEffect, useState } from "react";
+import { useAgentState } from "@/hooks/useAgentState";
+
+type TutorState = {
+  mode: string;
+  concept_id: string | null;
+  progress: ProgressMap;
+};
 
 type ProgressMap = {
   [conceptId: string]: {
@@ -18,26 +25,24 @@ const CONCEPT_LABELS: Record<string, string> = {
 };
 
 export const TutorProgress: React.FC = () => {
-  const [progress, setProgress] = useState<ProgressMap>({});
+  const [saved, setSaved] = useState<ProgressMap>({});
   const [loaded, setLoaded] = useState(false);
+  // live counts pushed by the tutor agent during a session
+  const live = useAgentState<TutorState>("tutor");
 
   useEffect(() => {
-    const fetchData = () => {
-      fetch("/api/tutor-progress")
-        .then((res) => res.json())
-        .then((data) => {
-          setProgress(data || {});
-          setLoaded(true);
-        })
-        .catch(() => setLoaded(true));
-    };
-
-    fetchData();
-    const interval = setInterval(fetchData, 3000);
-    return () => clearInterval(interval);
+    fetch("/api/tutor-progress")
+      .then((res) => res.json())
+      .then((data) => {
+        setSaved(data || {});
+        setLoaded(true);
+      })
+      .catch(() => setLoaded(true));
   }, []);
 
-  if (!loaded) {
+  const progress = live?.progress ?? saved;
+
+  if (!loaded && !live) {
     return (
       <div className="mt-4 text-sm text-muted-foreground">
         Loading tutor progress…
@@ -1,22 +1,28 @@
 "use client";
 
 import React, { useEffect, useState } from "react";
+import { useMaybeRoomContext } from "@livekit/components-react";
+import { useAgentState } from "@/hooks/useAgentState";
 
 export const WellnessVisualizer = () => {
-  const [log, setLog] = useState<any>(null);
+  const [saved, setSaved] = useState<any>(null);
+  // the check-in in progress, pushed by the agent as answers come in
+  const live = useAgentState<any>("checkin");
+  // the agent keeps one log per participant identity
+  const identity = useMaybeRoomContext()?.localParticipant.identity;
 
   useEffect(() => {
-    const interval = setInterval(() => {
-      fetch("/api/wellness-log")
-        .then((res) => res.json())
-        .then((data) => {
-          if (!data.error) setLog(data);
-        })
-        .catch(() => {});
-    }, 2000);
-
-    return () => clearInterval(interval);
-  }, []);
+    if (!identity) return;
+    fetch(`/api/wellness-log?identity=${encodeURIComponent(identity)}`)
+      .then((res) => res.json())
+      .then((data) => {
+        if (!data.error) setSaved(data);
+      })
+      .catch(() => {});
+  }, [identity]);
+
+  const started = live && (live.mood || live.energy || live.stress || live.summary);
+  const log = started ? live : saved;
 
   if (!log) {
     return (
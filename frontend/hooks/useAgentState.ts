@@ -0,0 +1,79 @@
+import { useEffect, useState } from 'react';
+import { type RemoteParticipant, RoomEvent } from 'livekit-client';
+import { useMaybeRoomContext } from '@livekit/components-react';
+
+// Must match TOPIC in backend/src/state_publisher.py
+export const AGENT_STATE_TOPIC = 'agent-state';
+
+type AgentState = Record<string, unknown>;
+
+type StateMessage =
+  | { type: 'full'; seq: number; state: AgentState }
+  | { type: 'patch'; seq: number; patch: AgentState };
+
+/** Apply an RFC 7386 JSON merge patch (null deletes a key). */
+export function applyMergePatch(target: unknown, patch: unknown): unknown {
+  if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) {
+    return patch;
+  }
+  const base =
+    target !== null && typeof target === 'object' && !Array.isArray(target)
+      ? { ...(target as AgentState) }
+      : {};
+  for (const [key, value] of Object.entries(patch as AgentState)) {
+    if (value === null) {
+      delete base[key];
+    } else {
+      base[key] = applyMergePatch(base[key], value);
+    }
+  }
+  return base;
+}
+
+const decoder = new TextDecoder();
+
+/**
+ * Session state pushed by the agent over the data channel. Returns the
+ * given section (e.g. "cart", "lead") or undefined until the agent has
+ * sent it; outside a room it is always undefined.
+ */
+export function useAgentState<T>(section: string): T | undefined {
+  const room = useMaybeRoomContext();
+  const [state, setState] = useState<AgentState>({});
+
+  useEffect(() => {
+    if (!room) return;
+    let seq = -1;
+
+    const onData = (
+      payload: Uint8Array,
+      _participant?: RemoteParticipant,
+      _kind?: unknown,
+      topic?: string
+    ) => {
+      if (topic !== AGENT_STATE_TOPIC) return;
+      let message: StateMessage;
+      try {
+        message = JSON.parse(decoder.decode(payload));
+      } catch {
+        return;
+      }
+      if (message.type === 'full') {
+        seq = message.seq;
+        setState(message.state ?? {});
+      } else if (message.type === 'patch' && message.seq > seq) {
+        // patches are sent reliably and in order; a gap only happens before
+        // the first full snapshot, which the agent sends on join
+        seq = message.seq;
+        setState((prev) => applyMergePatch(prev, message.patch) as AgentState);
+      }
+    };
+
+    room.on(RoomEvent.DataReceived, onData);
+    return () => {
+      room.off(RoomEvent.DataReceived, onData);
+    };
+  }, [room]);
+
+  return state[section] as T | undefined;
+}